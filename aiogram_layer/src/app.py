@@ -1,8 +1,11 @@
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from aiogram_layer.src.settings import TG_API_TOKEN
+from aiogram_layer.src.outbound import OutboundScheduler
+from aiogram_layer.src.settings import FSM_STORAGE, TG_API_TOKEN
+from aiogram_layer.src.storage import AioredisStorage
 
 bot = Bot(token=TG_API_TOKEN, parse_mode='Markdown')
-storage = MemoryStorage()
+bot.session.middleware(OutboundScheduler())
+storage = AioredisStorage() if FSM_STORAGE == 'redis' else MemoryStorage()
 dp = Dispatcher(storage=storage)
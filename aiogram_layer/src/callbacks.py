@@ -14,4 +14,5 @@ class Callbacks(Enum):
 
 
 class CitiesCB(CallbackData, prefix='city'):  # type: ignore
-    coordinates: str
+    list_id: str
+    index: int
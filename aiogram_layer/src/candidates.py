@@ -0,0 +1,54 @@
+import time
+import zlib
+
+from aiogram.fsm.context import FSMContext
+
+from aiogram_layer.src.settings import CANDIDATES_TTL_SECONDS
+from services.repositories.api.api_schemas import GeocoderSchema
+
+
+def candidates_id(cities: list[GeocoderSchema]) -> str:
+    """
+    Returns short id of the list of cities for callback data.
+
+    :param cities: cities found by the name
+
+    :return: 8 hex digits
+    """
+    return format(zlib.crc32('|'.join(city.coordinates for city in cities).encode()), '08x')
+
+
+async def store_candidates(state: FSMContext, cities: list[GeocoderSchema]) -> str:
+    """
+    Stores cities found by the name in the state for CANDIDATES_TTL_SECONDS, replacing the previous list.
+
+    :param state: dialogue state
+    :param cities: cities found by the name
+
+    :return: id of the list
+    """
+    list_id = candidates_id(cities)
+    await state.update_data(candidates={
+        'id': list_id,
+        'cities': cities,
+        'expires_at': time.time() + CANDIDATES_TTL_SECONDS,
+    })
+    return list_id
+
+
+async def get_candidate(state: FSMContext, list_id: str, index: int) -> GeocoderSchema | None:
+    """
+    Returns the city chosen from the stored list.
+
+    :param state: dialogue state
+    :param list_id: id of the list from callback data
+    :param index: position of the city in the list
+
+    :return: city or None if the list is replaced or expired
+    """
+    candidates = (await state.get_data()).get('candidates')
+    if not candidates or candidates['id'] != list_id or candidates['expires_at'] < time.time():
+        return None
+    if not 0 <= index < len(candidates['cities']):
+        return None
+    return candidates['cities'][index]
@@ -0,0 +1,104 @@
+import time
+import zlib
+
+from pydantic import BaseModel, ValidationError
+
+from aiogram_layer.src.messages import COUNTRY_INFO, get_country_info_text
+from aiogram_layer.src.settings import CARD_LOCAL_CACHE_SECONDS
+from cache.cache_module import Cache
+from services.metrics import Metrics
+from services.service_schemas import CountryUOWSchema
+
+# Cards rendered with another template are not shown after the template is changed
+CARD_TEMPLATE_VERSION = zlib.crc32(COUNTRY_INFO.encode())
+
+
+class CountryCardSchema(BaseModel):
+    """
+    Rendered country card with the capital point needed to count the view without assembling the country.
+    """
+    version: int
+    generation: int = 0
+    text: str
+    capital_latitude: float
+    capital_longitude: float
+
+
+class CountryCards:
+    """
+    Cache of rendered country cards by ISO code: in process memory for CARD_LOCAL_CACHE_SECONDS
+    and in Redis until the country data is rewritten (see :meth:`Cache.delete_country_cards`).
+    A card is served only while its generation is the current generation of the country.
+    """
+    _local: dict[str, tuple[float, CountryCardSchema]] = {}
+
+    @staticmethod
+    async def get(iso_code: str) -> tuple[CountryCardSchema | None, int]:
+        """
+        Returns the rendered card of the current template version and generation.
+
+        :param iso_code: country ISO code
+
+        :return: card or None if it is not rendered yet, and the current generation to render the card with
+        """
+        generation = await Cache.get_card_generation(iso_code)
+        local = CountryCards._local.get(iso_code)
+        if local and local[0] > time.monotonic() and local[1].generation == generation:
+            Metrics.incr('country_card.local_hit')
+            return local[1], generation
+        raw_card = await Cache.get_country_card(iso_code)
+        if raw_card:
+            try:
+                card = CountryCardSchema.parse_raw(raw_card)
+            except ValidationError:
+                card = None
+            if card and card.version == CARD_TEMPLATE_VERSION and card.generation == generation:
+                Metrics.incr('country_card.hit')
+                CountryCards._remember(iso_code, card)
+                return card, generation
+        Metrics.incr('country_card.miss')
+        return None, generation
+
+    @staticmethod
+    async def render(iso_code: str, country_all_info: CountryUOWSchema, generation: int) -> CountryCardSchema:
+        """
+        Renders the card and stores it in both caches.
+
+        :param iso_code: country ISO code
+        :param country_all_info: all information about country
+        :param generation: generation returned by :meth:`get` before the country data was read,
+            so the card is ignored if the country was rewritten since
+
+        :return: card
+        """
+        card = CountryCardSchema(
+            version=CARD_TEMPLATE_VERSION,
+            generation=generation,
+            text=get_country_info_text(country_all_info),
+            capital_latitude=country_all_info.capital.latitude,
+            capital_longitude=country_all_info.capital.longitude,
+        )
+        await Cache.set_country_card(iso_code, card.json())
+        CountryCards._remember(iso_code, card)
+        return card
+
+    @staticmethod
+    def _remember(iso_code: str, card: CountryCardSchema) -> None:
+        """
+        Keeps the card in process memory.
+
+        :param iso_code: country ISO code
+        :param card: card
+
+        :return: None
+        """
+        CountryCards._local[iso_code] = (time.monotonic() + CARD_LOCAL_CACHE_SECONDS, card)
+
+    @staticmethod
+    def clear_local() -> None:
+        """
+        Drops cards kept in process memory.
+
+        :return: None
+        """
+        CountryCards._local.clear()
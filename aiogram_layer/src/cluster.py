@@ -0,0 +1,261 @@
+import asyncio
+import logging
+from itertools import groupby
+
+from aiogram import Bot, Dispatcher, loggers
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
+
+from aiogram_layer.src.settings import (
+    BOT_PARTITIONS,
+    UPDATES_STREAM_MAXLEN,
+    WORKER_BATCH_SIZE,
+    WORKER_BLOCK_MS,
+)
+from cache.cache_settings import REDIS_URL
+from cache.client import LazyRedis
+from services.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+PREFIX_UPDATES = 'updates:'
+OFFSET_KEY = 'updates:offset'
+GROUP = 'workers'
+POLLING_TIMEOUT = 10
+POLLING_BACKOFF_SECONDS = 5
+
+# Blocking reads hold a connection for WORKER_BLOCK_MS, so streams use their own client
+STREAMS = LazyRedis(REDIS_URL, decode_responses=True)
+
+
+def update_chat_id(update: Update) -> int:
+    """
+    Returns id of the chat the update belongs to, the user id for updates without a chat (inline queries).
+
+    :param update: update from Telegram
+
+    :return: chat id or 0 if the update has neither chat nor user
+    """
+    event = update.event
+    chat = getattr(event, 'chat', None) or getattr(getattr(event, 'message', None), 'chat', None)
+    if chat:
+        return chat.id
+    user = getattr(event, 'from_user', None)
+    return user.id if user else 0
+
+
+def stream_key(partition: int) -> str:
+    """
+    Returns key of the partition stream.
+
+    :param partition: partition number
+
+    :return: key
+    """
+    return f'{PREFIX_UPDATES}{partition}'
+
+
+def partition_of(chat_id: int, partitions: int = BOT_PARTITIONS) -> int:
+    """
+    Returns partition of the chat, updates of one chat are always in one partition and handled in order.
+
+    :param chat_id: chat id, negative for groups
+    :param partitions: number of partitions
+
+    :return: partition number
+    """
+    return chat_id % partitions
+
+
+def worker_partitions(index: int, workers: int, partitions: int = BOT_PARTITIONS) -> list[int]:
+    """
+    Returns partitions read by the worker.
+
+    :param index: worker number from 0
+    :param workers: number of workers
+    :param partitions: number of partitions
+
+    :return: partition numbers
+    """
+    return [partition for partition in range(partitions) if partition % workers == index]
+
+
+class UpdateIngress:
+    """
+    The only process polling Telegram: every update is added to the stream of its chat partition.
+    The polling offset is saved in the same transaction, so a restarted ingress neither loses nor repeats updates.
+    """
+
+    def __init__(self, bot: Bot, dispatcher: Dispatcher, partitions: int = BOT_PARTITIONS):
+        """
+        :param bot: bot to poll
+        :param dispatcher: dispatcher to resolve used update types
+        :param partitions: number of partition streams
+        """
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.partitions = partitions
+
+    async def publish(self, updates: list[Update]) -> int:
+        """
+        Adds updates to partition streams and saves the next offset.
+
+        :param updates: updates in order of id
+
+        :return: next offset
+        """
+        offset = updates[-1].update_id + 1
+        async with STREAMS.pipeline(transaction=True) as pipe:
+            for update in updates:
+                chat_id = update_chat_id(update)
+                pipe.xadd(
+                    stream_key(partition_of(chat_id, self.partitions)),
+                    {'chat': chat_id, 'update': update.json(exclude_none=True)},
+                    maxlen=UPDATES_STREAM_MAXLEN,
+                )
+            pipe.set(OFFSET_KEY, offset)
+            await pipe.execute()
+        Metrics.incr('cluster.ingress.updates', len(updates))
+        return offset
+
+    async def run(self) -> None:
+        """
+        Polls Telegram until cancelled.
+
+        :return: None
+        """
+        offset = int(await STREAMS.get(OFFSET_KEY) or 0) or None
+        allowed_updates = self.dispatcher.resolve_used_update_types()
+        while True:
+            try:
+                updates = await self.bot.get_updates(
+                    offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates
+                )
+            except Exception as e:
+                logger.error('Failed to get updates: %s: %s', e.__class__.__name__, e)
+                await asyncio.sleep(POLLING_BACKOFF_SECONDS)
+                continue
+            if updates:
+                offset = await self.publish(updates)
+
+
+class UpdateWorker:
+    """
+    Handles updates of its partitions with a consumer group per stream. Updates of one chat are
+    handled in order, updates of different chats in a batch are handled concurrently.
+    An update is acknowledged after it is handled, so updates of a stopped or crashed worker
+    are handled again by the worker that owns the partition after restart.
+    """
+
+    def __init__(self, bot: Bot, dispatcher: Dispatcher, index: int, workers: int, partitions: int = BOT_PARTITIONS):
+        """
+        :param bot: bot to answer with
+        :param dispatcher: dispatcher with handlers
+        :param index: worker number from 0
+        :param workers: number of workers
+        :param partitions: number of partition streams
+        """
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.consumer = f'worker-{index}'
+        self.streams = [stream_key(partition) for partition in worker_partitions(index, workers, partitions)]
+        self.workflow_data = {'dispatcher': dispatcher, 'bots': [bot]}
+        self._stopping = False
+
+    def stop(self) -> None:
+        """
+        Asks the worker to stop after the current batch.
+
+        :return: None
+        """
+        self._stopping = True
+
+    async def prepare(self) -> None:
+        """
+        Creates consumer groups and takes over updates left unacknowledged by other consumers:
+        partitions move between workers when the number of workers changes.
+
+        :return: None
+        """
+        for stream in self.streams:
+            groups = await STREAMS.xinfo_groups(stream) if await STREAMS.exists(stream) else []
+            if not any(group['name'] == GROUP for group in groups):
+                await STREAMS.xgroup_create(stream, GROUP, id='0', mkstream=True)
+            pending = await STREAMS.xpending_range(stream, GROUP, min='-', max='+', count=UPDATES_STREAM_MAXLEN)
+            message_ids = [entry['message_id'] for entry in pending if entry['consumer'] != self.consumer]
+            if message_ids:
+                await STREAMS.xclaim(stream, GROUP, self.consumer, min_idle_time=0, message_ids=message_ids)
+                Metrics.incr('cluster.worker.claimed', len(message_ids))
+
+    async def read(self, last_id: str, block: int | None = None) -> list[tuple[str, str, dict]]:
+        """
+        Reads a batch of updates from all streams of the worker.
+
+        :param last_id: "0" to read own unacknowledged updates, ">" to read new ones
+        :param block: milliseconds to wait for new updates
+
+        :return: list of stream, message id and fields
+        """
+        entries = await STREAMS.xreadgroup(
+            GROUP, self.consumer, {stream: last_id for stream in self.streams}, count=WORKER_BATCH_SIZE, block=block
+        )
+        return [(stream, message_id, fields) for stream, messages in entries or [] for message_id, fields in messages]
+
+    async def handle(self, messages: list[tuple[str, str, dict]]) -> None:
+        """
+        Handles a batch and acknowledges it. Pending entries trimmed from the stream by maxlen
+        are read without fields, they are acknowledged and skipped.
+
+        :param messages: list of stream, message id and fields
+
+        :return: None
+        """
+        trimmed = [message for message in messages if not message[2]]
+        if trimmed:
+            logger.warning('Skipped %d updates trimmed from streams before they were handled', len(trimmed))
+            Metrics.incr('cluster.worker.trimmed', len(trimmed))
+        updates = [message for message in messages if message[2]]
+        by_chat = groupby(sorted(updates, key=lambda message: int(message[2]['chat'])), lambda message: message[2]['chat'])
+        await asyncio.gather(*(self._handle_chat(list(chat_messages)) for _, chat_messages in by_chat))
+        for stream in {stream for stream, _, _ in messages}:
+            await STREAMS.xack(stream, GROUP, *(message_id for key, message_id, _ in messages if key == stream))
+
+    async def _handle_chat(self, messages: list[tuple[str, str, dict]]) -> None:
+        """
+        Handles updates of one chat in order. A failed update is logged and acknowledged like in polling.
+
+        :param messages: list of stream, message id and fields
+
+        :return: None
+        """
+        for _, _, fields in messages:
+            update = Update.parse_raw(fields['update'])
+            try:
+                response = await self.dispatcher.feed_update(self.bot, update, **self.workflow_data)
+                if isinstance(response, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=self.bot, result=response)
+            except Exception as e:
+                loggers.event.exception(
+                    'Cause exception while process update id=%d by bot id=%d\n%s: %s',
+                    update.update_id, self.bot.id, e.__class__.__name__, e,
+                )
+            Metrics.incr('cluster.worker.updates')
+
+    async def run(self) -> None:
+        """
+        Handles updates until stopped: own unacknowledged updates first, then new ones.
+
+        :return: None
+        """
+        await self.prepare()
+        await self.dispatcher.emit_startup(bot=self.bot, **self.workflow_data)
+        try:
+            while not self._stopping and (messages := await self.read('0')):
+                await self.handle(messages)
+            while not self._stopping:
+                messages = await self.read('>', block=WORKER_BLOCK_MS)
+                if messages:
+                    await self.handle(messages)
+        finally:
+            await self.dispatcher.emit_shutdown(bot=self.bot, **self.workflow_data)
+            await self.bot.session.close()
@@ -1,2 +1,2 @@
-# Invalid chars for city or country name
-INVALID_CHARS = set('!"#$%&()*+,./:;<=>?@[\\]^_`{|}~;№|')
+# INVALID_CHARS is defined in services.constants and re-exported for the bot modules
+from services.constants import INVALID_CHARS  # noqa: F401
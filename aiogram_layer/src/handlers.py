@@ -5,6 +5,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram_layer.src.app import dp
 from aiogram_layer.src.callbacks import Callbacks as cb
 from aiogram_layer.src.callbacks import CitiesCB
+from aiogram_layer.src.candidates import get_candidate, store_candidates
+from aiogram_layer.src.cards import CountryCards
+from aiogram_layer.src.inline import PlaceIndex
 from aiogram_layer.src.keyboards import (
     city_detail,
     country_detail,
@@ -17,6 +20,7 @@ from aiogram_layer.src.keyboards import (
 from aiogram_layer.src.messages import (
     ABOUT_MESSAGE,
     CITIES_LIST,
+    CITIES_LIST_EXPIRED,
     CITY_NOT_FOUND,
     COUNTRY_NOT_FOUND,
     COUNTRY_UNAVAILABLE,
@@ -26,6 +30,7 @@ from aiogram_layer.src.messages import (
     INVALID_CITY,
     INVALID_COUNTRY,
     NON_TRADING_CURRENCY,
+    PLACE_KINDS,
     RESTART_MESSAGE,
     START_MESSAGE,
     UNKNOWN_COMMAND,
@@ -33,13 +38,22 @@ from aiogram_layer.src.messages import (
     get_capital_weather_text,
     get_city_info_text,
     get_city_weather_text,
-    get_country_info_text,
     get_currency_rate_text,
 )
+from aiogram_layer.src.prefetch import (
+    choose_country,
+    chosen_place,
+    get_country_detail,
+    start_country_prefetch,
+)
+from aiogram_layer.src.progressive import ProgressiveReply
+from aiogram_layer.src.settings import INLINE_CACHE_TIME, INLINE_RESULTS_LIMIT
 from aiogram_layer.src.states import CountryCityForm, Form
 from aiogram_layer.src.validators import is_city_name_valid, is_country_name_valid
+from aiogram_layer.src.views import record_city_view, record_view
 from services.city_service import CityService
 from services.country_service import CountryService
+from services.repositories.api.resilience import UpstreamUnavailable
 
 
 @dp.message(Command('start', 'help'))
@@ -127,24 +141,21 @@ async def process_city_name(message: types.Message, state: FSMContext):
         )
 
     if isinstance(city_info, list):
-        builder = await create_cities_list_markup(city_info)
-        await state.update_data(data={city.coordinates: city for city in city_info})
+        list_id = await store_candidates(state, city_info)
+        builder = await create_cities_list_markup(list_id, city_info)
 
         return await message.answer(
             text=CITIES_LIST,
             reply_markup=builder.as_markup()
         )
-    async with CountryService() as uow:
-        country_all_info = await uow.get_country_all_info(city_info)
-        await state.update_data(
-            city_info=city_info,
-            country_detail=country_all_info,
-        )
+    await start_country_prefetch(state, city_info)
     text = get_city_info_text(city_info)
-    return await message.answer(
+    reply = await message.answer(
         text=text,
         reply_markup=city_detail,
     )
+    record_city_view(city_info)
+    return reply
 
 
 @dp.callback_query(CitiesCB.filter(), Form.city_search)
@@ -157,19 +168,20 @@ async def choose_city_from_list(callback: types.CallbackQuery, callback_data: Ci
     :param state:
     :return: city info
     """
-    data = await state.get_data()
-    city_info = data[callback_data.coordinates]
-    async with CountryService() as uow:
-        country_all_info = await uow.get_country_all_info(city_info)
-        await state.update_data(
-            city_info=city_info,
-            country_detail=country_all_info,
+    city_info = await get_candidate(state, callback_data.list_id, callback_data.index)
+    if not city_info:
+        return await callback.message.answer(
+            text=CITIES_LIST_EXPIRED,
+            reply_markup=to_main_menu,
         )
+    await start_country_prefetch(state, city_info)
     text = get_city_info_text(city_info)
-    return await callback.message.answer(
+    reply = await callback.message.answer(
         text=text,
         reply_markup=city_detail,
     )
+    record_city_view(city_info)
+    return reply
 
 
 @dp.callback_query(Text(cb.weather.value), CountryCityForm().city_search)
@@ -215,14 +227,15 @@ async def get_capital_weather(callback: types.CallbackQuery, state: FSMContext):
     """
     detail_text = WEATHER_NOT_AVAILABLE
     data = await state.get_data()
-    async with CountryService() as uow:
-        weather = await uow.get_capital_weather(data['country_info'])
-    if weather:
-        detail_text = get_capital_weather_text(weather)
-    return await callback.message.answer(
-        text=detail_text,
-        reply_markup=weather_detail,
-    )
+    async with ProgressiveReply(callback.message) as progress:
+        async with CountryService() as uow:
+            weather = await uow.get_capital_weather(data['country_info'])
+        if weather:
+            detail_text = get_capital_weather_text(weather)
+        return await progress.finish(
+            text=detail_text,
+            reply_markup=weather_detail,
+        )
 
 
 @dp.callback_query(
@@ -239,16 +252,23 @@ async def get_country_info(callback: types.CallbackQuery, state: FSMContext):
 
     :return: info about country
     """
-    data = await state.get_data()
-    if not data['country_detail']:
+    place = chosen_place(await state.get_data())
+    if place is None:
         return await callback.message.reply(
             text=COUNTRY_UNAVAILABLE,
             reply_markup=country_detail
         )
-    country_all_info = data['country_detail']
-    text = get_country_info_text(country_all_info)
+    card, generation = await CountryCards.get(place.country_code)
+    if not card:
+        country_all_info = await get_country_detail(state)
+        if not country_all_info:
+            return await callback.message.reply(
+                text=COUNTRY_UNAVAILABLE,
+                reply_markup=country_detail
+            )
+        card = await CountryCards.render(place.country_code, country_all_info, generation)
     return await callback.message.answer(
-        text=text,
+        text=card.text,
         reply_markup=country_detail,
     )
 
@@ -266,14 +286,20 @@ async def get_currency_rate(callback: types.CallbackQuery, state: FSMContext):
 
     :return: currency rate: national currency/ruble
     """
-    data = await state.get_data()
-    if not data['country_detail']:
+    country_all_info = await get_country_detail(state)
+    if not country_all_info:
         return await callback.message.answer(
             text=CURRENCIES_UNAVAILABLE,
             reply_markup=currency_detail
         )
-    async with CountryService() as uow:
-        currencies = await uow.get_currency_rates(data['country_detail'].currencies)
+    try:
+        async with CountryService() as uow:
+            currencies = await uow.get_currency_rates(country_all_info.currencies)
+    except UpstreamUnavailable:
+        return await callback.message.answer(
+            text=CURRENCIES_UNAVAILABLE,
+            reply_markup=currency_detail,
+        )
     if not currencies:
         return await callback.message.answer(
             text=NON_TRADING_CURRENCY,
@@ -346,28 +372,57 @@ async def process_country_name(message: types.Message, state: FSMContext):
 
     :return: info about country
     """
-    async with CountryService() as uow:
-        info = await uow.get_country_info(message.text)
-        if not info:
-            return await message.reply(
-                text=COUNTRY_NOT_FOUND,
-                reply_markup=to_main_menu,
-            )
-        country_all_info = await uow.get_country_all_info(info)
-        if not country_all_info:
-            return await message.reply(
-                text=COUNTRY_UNAVAILABLE,
-                reply_markup=to_main_menu,
-            )
-    await state.update_data(
-        country_info=info,
-        country_detail=country_all_info
-    )
-    text = get_country_info_text(country_all_info)
-    return await message.answer(
-        text=text,
-        reply_markup=country_detail,
-    )
+    async with ProgressiveReply(message) as progress:
+        async with CountryService() as uow:
+            info = await uow.get_country_info(message.text)
+            if not info:
+                return await progress.finish(
+                    text=COUNTRY_NOT_FOUND,
+                    reply_markup=to_main_menu,
+                    reply=True,
+                )
+            card, generation = await CountryCards.get(info.country_code)
+            if card:
+                await choose_country(state, info)
+            else:
+                country_all_info = await uow.get_country_all_info(info)
+                if not country_all_info:
+                    return await progress.finish(
+                        text=COUNTRY_UNAVAILABLE,
+                        reply_markup=to_main_menu,
+                        reply=True,
+                    )
+                await choose_country(state, info, country_all_info)
+                card = await CountryCards.render(info.country_code, country_all_info, generation)
+        reply = await progress.finish(
+            text=card.text,
+            reply_markup=country_detail,
+        )
+    record_view(card.capital_latitude, card.capital_longitude)
+    return reply
+
+
+@dp.inline_query()
+async def autocomplete_place(inline_query: types.InlineQuery):
+    """
+    This handler will be called when user types the bot name and a part of a country or city name in any chat.
+    Suggests matching names, the chosen one is sent as a message.
+
+    :param inline_query: inline query
+
+    :return: list of countries and cities starting with the query
+    """
+    places = await PlaceIndex.search(inline_query.query, INLINE_RESULTS_LIMIT)
+    results = [
+        types.InlineQueryResultArticle(
+            id=str(number),
+            title=name,
+            description=PLACE_KINDS[kind],
+            input_message_content=types.InputTextMessageContent(message_text=name),
+        )
+        for number, (name, kind) in enumerate(places)
+    ]
+    return await inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
 
 
 @dp.message()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+
+from aiogram_layer.src.settings import INLINE_INDEX_REFRESH_SECONDS
+from cache.cache_module import Cache
+from services.metrics import Metrics
+from services.prefix_index import PrefixIndex
+from services.repositories.db.cities import CityBDRepository
+from services.repositories.db.countries import CountryDBRepository
+
+logger = logging.getLogger(__name__)
+
+# A failed index build is retried by queries not earlier than this
+BUILD_RETRY_SECONDS = 30
+
+
+class PlaceIndex:
+    """
+    Prefix index of country and city names for inline autocomplete: names from database
+    and cached geocoder results. Built on bot warm-up or the first query, rebuilt in background
+    when it is older than INLINE_INDEX_REFRESH_SECONDS.
+    """
+    _index: PrefixIndex = PrefixIndex()
+    _built_at: float | None = None
+    _failed_at: float | None = None
+    _build_task: asyncio.Task | None = None
+
+    @staticmethod
+    async def build() -> PrefixIndex:
+        """
+        Loads all names and replaces the index.
+
+        :return: new index
+        """
+        countries = await CountryDBRepository().get_names()
+        cities = await CityBDRepository().get_names()
+        cached = await Cache.get_place_names()
+        index = PrefixIndex(
+            [(name, 'country') for name in countries] + [(name, 'city') for name in cities] + cached
+        )
+        PlaceIndex._index = index
+        PlaceIndex._built_at = time.monotonic()
+        PlaceIndex._failed_at = None
+        Metrics.gauge('inline.index_size', len(index))
+        return index
+
+    @staticmethod
+    async def search(query: str, limit: int) -> list[tuple[str, str]]:
+        """
+        Returns names starting with the query.
+
+        :param query: user input
+        :param limit: max number of names
+
+        :return: list of pairs of name and kind ("country" or "city"), empty while the index is not built
+        """
+        if PlaceIndex._built_at is None:
+            build = PlaceIndex._start_build()
+            if build is None:
+                return []
+            try:
+                await asyncio.shield(build)
+            except Exception:
+                # logged by _on_built
+                return []
+        elif time.monotonic() - PlaceIndex._built_at > INLINE_INDEX_REFRESH_SECONDS:
+            PlaceIndex._start_build()
+        started = time.monotonic()
+        places = PlaceIndex._index.search(query, limit)
+        Metrics.observe('inline.search', time.monotonic() - started)
+        return places
+
+    @staticmethod
+    def _start_build() -> asyncio.Task | None:
+        """
+        Starts index build unless it is in progress or failed less than BUILD_RETRY_SECONDS ago.
+
+        :return: build task or None if the build is postponed
+        """
+        if PlaceIndex._failed_at is not None and time.monotonic() - PlaceIndex._failed_at < BUILD_RETRY_SECONDS:
+            return None
+        if PlaceIndex._build_task is None or PlaceIndex._build_task.done():
+            PlaceIndex._build_task = asyncio.create_task(PlaceIndex.build())
+            PlaceIndex._build_task.add_done_callback(PlaceIndex._on_built)
+        return PlaceIndex._build_task
+
+    @staticmethod
+    def _on_built(task: asyncio.Task) -> None:
+        """
+        Logs an error of the index build, the build is retried after BUILD_RETRY_SECONDS.
+
+        :param task: finished build
+
+        :return: None
+        """
+        if not task.cancelled() and task.exception():
+            PlaceIndex._failed_at = time.monotonic()
+            logger.error('Place index build failed', exc_info=task.exception())
@@ -47,9 +47,9 @@ to_main_menu = InlineKeyboardMarkup(
 )
 
 
-async def create_cities_list_markup(city_info):
+async def create_cities_list_markup(list_id, city_info):
     builder = InlineKeyboardBuilder()
-    for city in city_info:
-        builder.button(text=city.full_address, callback_data=CitiesCB(coordinates=city.coordinates))
+    for index, city in enumerate(city_info):
+        builder.button(text=city.full_address, callback_data=CitiesCB(list_id=list_id, index=index))
     builder.adjust(1, True)
     return builder
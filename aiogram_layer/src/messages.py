@@ -84,6 +84,9 @@ NON_TRADING_CURRENCY = '''
 CITIES_LIST = '''
 По указанному названию нашлось несколько вариантов:
 '''
+CITIES_LIST_EXPIRED = '''
+Список городов устарел, введите название города ещё раз
+'''
 WEATHER_NOT_AVAILABLE = '''
 Извините, информация о погоде сейчас недоступна
 '''
@@ -93,6 +96,13 @@ COUNTRY_UNAVAILABLE = '''
 CURRENCIES_UNAVAILABLE = '''
 Извините, информация о курсах валют сейчас недоступна
 '''
+PLACE_KINDS = {
+    'country': 'Страна',
+    'city': 'Город',
+}
+LOADING_MESSAGE = '''
+Ищу информацию...
+'''
 UNKNOWN_COMMAND = '''
 'Неизвестная команда.\nДля перехода в главное меню используйте команду: /start'
 '''
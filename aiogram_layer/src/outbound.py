@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, SendChatAction, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from aiogram_layer.src.settings import (
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_GROUP_RATE,
+    OUTBOUND_MAX_RETRIES,
+)
+from services.metrics import Metrics
+from services.repositories.api.rate_limit import TokenBucket
+
+# Max number of chats whose rate limit state is kept
+MAX_TRACKED_CHATS = 10000
+# Methods which are not counted by Telegram as messages
+UNPACED_METHODS = (SendChatAction,)
+
+
+class Priority(IntEnum):
+    interactive = 0
+    background = 1
+
+
+_priority: ContextVar[Priority] = ContextVar('outbound_priority', default=Priority.interactive)
+
+
+@contextmanager
+def outbound_priority(priority: Priority) -> Iterator[None]:
+    """
+    Sets priority of Telegram requests sent inside the block, e.g. for notifications not caused by the user.
+
+    :param priority: priority of requests
+
+    :return: None
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """
+    Paces messages sent by the bot to Telegram limits: OUTBOUND_GLOBAL_RATE messages per second in total
+    and OUTBOUND_CHAT_RATE (OUTBOUND_GROUP_RATE for groups) per chat with bursts up to OUTBOUND_CHAT_BURST.
+    Waiting messages are sent in order of priority: interactive replies before background ones.
+    A request rejected with 429 is sent again after `retry_after` seconds.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        chat_rate: float = OUTBOUND_CHAT_RATE,
+        group_rate: float = OUTBOUND_GROUP_RATE,
+        chat_burst: int = OUTBOUND_CHAT_BURST,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+    ):
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: OrderedDict[int | str, TokenBucket] = OrderedDict()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of messages waiting for the global limit.
+        """
+        return len(self._waiters)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or isinstance(method, UNPACED_METHODS):
+            return await make_request(bot, method)
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            await self._wait_chat(chat_id)
+            await self._wait_turn(_priority.get())
+            started = time.monotonic()
+            Metrics.observe('telegram.outbound.wait', started - queued)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                Metrics.incr('telegram.outbound.retry_after')
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(error.retry_after)
+                continue
+            Metrics.observe('telegram.outbound.latency', time.monotonic() - started)
+            return response
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        """
+        Returns rate limit of the chat, the least recently used chats are forgotten.
+
+        :param chat_id: chat id, negative for groups and channels
+
+        :return: token bucket of the chat
+        """
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+            if len(self._chat_buckets) > MAX_TRACKED_CHATS:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def _wait_chat(self, chat_id: int | str) -> None:
+        """
+        Waits for the per-chat limit.
+
+        :param chat_id: chat id
+
+        :return: None
+        """
+        bucket = self._chat_bucket(chat_id)
+        while delay := await bucket.take():
+            await asyncio.sleep(delay)
+
+    async def _wait_turn(self, priority: Priority) -> None:
+        """
+        Waits for the global limit behind messages of higher or the same priority queued earlier.
+
+        :param priority: priority of the message
+
+        :return: None
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        Metrics.gauge('telegram.outbound.queue_depth', self.depth)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """
+        Lets waiting messages go one by one as global tokens become available.
+
+        :return: None
+        """
+        while self._waiters:
+            if self._waiters[0][2].cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            delay = await self.global_bucket.take()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+            Metrics.gauge('telegram.outbound.queue_depth', self.depth)
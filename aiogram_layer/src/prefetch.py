@@ -0,0 +1,133 @@
+import asyncio
+import logging
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+
+from services.country_service import CountryService
+from services.repositories.api.api_schemas import GeocoderSchema
+from services.service_schemas import CountryUOWSchema
+
+logger = logging.getLogger(__name__)
+
+# Country details being loaded for the city chosen in a dialogue, the latest one per dialogue
+_country_tasks: dict[StorageKey, asyncio.Task] = {}
+
+
+def chosen_place(data: dict) -> GeocoderSchema | None:
+    """
+    Returns the city or the country chosen in the dialogue.
+
+    :param data: dialogue state data
+
+    :return: geocoder data of the chosen place or None
+    """
+    return data.get('city_info') or data.get('country_info')
+
+
+async def _load_country_detail(state: FSMContext, place: GeocoderSchema) -> CountryUOWSchema | None:
+    """
+    Loads country details of the place and stores them in the state if the place is still chosen.
+
+    :param state: dialogue state
+    :param place: chosen city or country
+
+    :return: country details or None if they are unavailable
+    """
+    async with CountryService() as uow:
+        country_all_info = await uow.get_country_all_info(place)
+    if chosen_place(await state.get_data()) == place:
+        await state.update_data(country_detail=country_all_info)
+    return country_all_info
+
+
+async def _choose_place(state: FSMContext, **place: GeocoderSchema) -> None:
+    """
+    Replaces the chosen place in the state, dropping country details of the previous one.
+
+    :param state: dialogue state
+    :param place: city_info or country_info
+
+    :return: None
+    """
+    data = await state.get_data()
+    for key in ('city_info', 'country_info', 'country_detail'):
+        data.pop(key, None)
+    data.update(place)
+    await state.set_data(data)
+
+
+async def choose_country(
+    state: FSMContext, country_info: GeocoderSchema, country_all_info: CountryUOWSchema | None = None
+) -> None:
+    """
+    Chooses the country in the state. Its details are loaded on demand if they are not given.
+
+    :param state: dialogue state
+    :param country_info: chosen country
+    :param country_all_info: optional country details
+
+    :return: None
+    """
+    await _choose_place(state, country_info=country_info)
+    if country_all_info:
+        await state.update_data(country_detail=country_all_info)
+
+
+async def start_country_prefetch(state: FSMContext, city_info: GeocoderSchema) -> None:
+    """
+    Chooses the city in the state and starts loading its country details in background,
+    so the city reply is not delayed and 'Подробнее о стране' does not wait for API.
+    A previous load of the same dialogue is cancelled.
+
+    :param state: dialogue state
+    :param city_info: chosen city
+
+    :return: None
+    """
+    await _choose_place(state, city_info=city_info)
+    previous = _country_tasks.pop(state.key, None)
+    if previous:
+        previous.cancel()
+    task = asyncio.create_task(_load_country_detail(state, city_info))
+    _country_tasks[state.key] = task
+    task.add_done_callback(lambda done: _forget_country_task(state.key, done))
+
+
+def _forget_country_task(key: StorageKey, task: asyncio.Task) -> None:
+    """
+    Removes the finished load and logs its error.
+
+    :param key: dialogue key
+    :param task: finished load
+
+    :return: None
+    """
+    if _country_tasks.get(key) is task:
+        del _country_tasks[key]
+    if not task.cancelled() and task.exception():
+        logger.error('Country details prefetch failed', exc_info=task.exception())
+
+
+async def get_country_detail(state: FSMContext) -> CountryUOWSchema | None:
+    """
+    Returns country details of the chosen place: from the state, from the load in progress
+    or loads them now if the load was lost (e.g. the dialogue is continued by another bot process).
+
+    :param state: dialogue state
+
+    :return: country details or None if they are unavailable
+    """
+    data = await state.get_data()
+    if 'country_detail' in data:
+        return data['country_detail']
+    task = _country_tasks.get(state.key)
+    if task:
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            return None
+    place = chosen_place(data)
+    if place is None:
+        return None
+    return await _load_country_detail(state, place)
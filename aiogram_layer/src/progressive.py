@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+from aiogram import types
+from aiogram.enums import ChatAction
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import SendChatAction
+
+from aiogram_layer.src.messages import LOADING_MESSAGE
+from aiogram_layer.src.settings import PROGRESSIVE_PLACEHOLDER_DELAY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressiveReply:
+    """
+    Reply which is shown to the user before its text is ready.
+    'Typing' chat action is sent at once, a placeholder message is sent if the reply is not ready
+    in `placeholder_delay` seconds, then the placeholder is edited with the final text.
+    The placeholder is edited exactly once, there are no intermediate edits.
+
+    Usage::
+
+        async with ProgressiveReply(message) as progress:
+            text = await build_text()
+            return await progress.finish(text, reply_markup=markup)
+    """
+
+    def __init__(
+        self,
+        message: types.Message,
+        placeholder: str = LOADING_MESSAGE,
+        placeholder_delay: float = PROGRESSIVE_PLACEHOLDER_DELAY_SECONDS,
+    ):
+        self.message = message
+        self.placeholder_text = placeholder
+        self.placeholder_delay = placeholder_delay
+        self.placeholder: types.Message | None = None
+        self._placeholder_task: asyncio.Task | None = None
+        self._sending_placeholder = False
+
+    async def __aenter__(self) -> 'ProgressiveReply':
+        self._placeholder_task = asyncio.create_task(self._send_placeholder())
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        if self._placeholder_task and not self._placeholder_task.done():
+            self._placeholder_task.cancel()
+
+    async def _send_placeholder(self) -> None:
+        """
+        Sends chat action at once and the placeholder message after `placeholder_delay`.
+        Errors are logged, without the placeholder the reply is sent as a new message.
+
+        :return: None
+        """
+        try:
+            await SendChatAction(chat_id=self.message.chat.id, action=ChatAction.TYPING)
+            await asyncio.sleep(self.placeholder_delay)
+            self._sending_placeholder = True
+            self.placeholder = await self.message.answer(text=self.placeholder_text)
+        except Exception as e:
+            logger.warning('Failed to send placeholder: %s: %s', e.__class__.__name__, e)
+
+    async def _wait_placeholder(self) -> None:
+        """
+        Waits for the placeholder being sent or cancels the delayed one.
+
+        :return: None
+        """
+        task = self._placeholder_task
+        if task is None or task.cancelled():
+            return
+        if not task.done() and not self._sending_placeholder:
+            task.cancel()
+            return
+        await task
+
+    async def finish(self, text: str, reply_markup: types.InlineKeyboardMarkup | None = None, reply: bool = False):
+        """
+        Shows the final text: sends it as a new message if the placeholder is not sent,
+        otherwise edits the placeholder. If the edit fails the text is sent as a new message.
+
+        :param text: final text
+        :param reply_markup: optional keyboard
+        :param reply: send a new message as a reply to the user's message
+
+        :return: result of sendMessage or editMessageText
+        """
+        await self._wait_placeholder()
+        if self.placeholder is not None:
+            try:
+                return await self.placeholder.edit_text(text=text, reply_markup=reply_markup)
+            except TelegramAPIError as e:
+                logger.warning('Failed to edit placeholder: %s: %s', e.__class__.__name__, e)
+        send = self.message.reply if reply else self.message.answer
+        return await send(text=text, reply_markup=reply_markup)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+from aiogram_layer.src.inline import PlaceIndex
+from cache.cache_settings import REDIS
+from services.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+def install_event_loop(use_uvloop: bool) -> str:
+    """
+    Makes asyncio.run use uvloop if it is asked for and installed.
+
+    :param use_uvloop: try uvloop instead of the default loop
+
+    :return: name of the loop: "uvloop" or "asyncio"
+    """
+    if not use_uvloop:
+        return 'asyncio'
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning('uvloop is not installed, the default event loop is used')
+        return 'asyncio'
+    uvloop.install()
+    return 'uvloop'
+
+
+async def _timed(phases: dict[str, float], name: str, warm: Callable[[], Awaitable]) -> None:
+    """
+    Runs a warm-up step and records its duration, a failed step is logged and does not stop the start.
+
+    :param phases: durations by name to add to
+    :param name: step name
+    :param warm: step
+
+    :return: None
+    """
+    started = time.perf_counter()
+    try:
+        await warm()
+    except Exception as e:
+        logger.warning('Warm-up of %s failed: %s: %s', name, e.__class__.__name__, e)
+    phases[f'warm_up.{name}'] = time.perf_counter() - started
+
+
+async def warm_up(bot: Bot) -> dict[str, float]:
+    """
+    Opens connections before the first update: Telegram session, Redis pool and database connection
+    (in the thread of the async ORM), concurrently, and builds the index of inline autocomplete.
+
+    :param bot: bot to answer with
+
+    :return: durations of the steps in seconds
+    """
+    phases = {}
+    await asyncio.gather(
+        _timed(phases, 'telegram', bot.get_me),
+        _timed(phases, 'redis', REDIS.ping),
+        _timed(phases, 'database', sync_to_async(connection.ensure_connection)),
+        _timed(phases, 'inline_index', PlaceIndex.build),
+    )
+    return phases
+
+
+def startup_report(loop_name: str, phases: dict[str, float], total: float) -> str:
+    """
+    Records startup phases as metrics and formats them for the log.
+
+    :param loop_name: event loop in use
+    :param phases: durations by phase in seconds, warm-up steps overlap
+    :param total: seconds from the command start to polling
+
+    :return: one line report
+    """
+    for name, seconds in phases.items():
+        Metrics.observe(f'bot.startup.{name}', seconds)
+    Metrics.observe('bot.startup', total)
+    return f'Bot started on {loop_name} in {total:.3f}s (' + ', '.join(
+        f'{name}: {seconds:.3f}s' for name, seconds in phases.items()
+    ) + ')'
@@ -6,3 +6,36 @@ load_dotenv()
 
 
 TG_API_TOKEN = os.getenv('TG_API_TOKEN')
+# Progressive replies: a placeholder is sent if the reply is not ready in PLACEHOLDER_DELAY seconds,
+# then it is edited with the reply
+PROGRESSIVE_PLACEHOLDER_DELAY_SECONDS = float(os.getenv('PROGRESSIVE_PLACEHOLDER_DELAY_SECONDS', 0.5))
+# Outbound Telegram requests: messages per second in total, per private chat and per group,
+# max burst per chat and max resends after 429 Too Many Requests
+OUTBOUND_GLOBAL_RATE = float(os.getenv('OUTBOUND_GLOBAL_RATE', 30))
+OUTBOUND_CHAT_RATE = float(os.getenv('OUTBOUND_CHAT_RATE', 1))
+OUTBOUND_GROUP_RATE = float(os.getenv('OUTBOUND_GROUP_RATE', 20 / 60))
+OUTBOUND_CHAT_BURST = int(os.getenv('OUTBOUND_CHAT_BURST', 3))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', 3))
+# Rendered country cards are kept in process memory this long in addition to Redis
+CARD_LOCAL_CACHE_SECONDS = float(os.getenv('CARD_LOCAL_CACHE_SECONDS', 60))
+# Inline autocomplete: max results, seconds Telegram may cache results of a query, index rebuild period
+INLINE_RESULTS_LIMIT = int(os.getenv('INLINE_RESULTS_LIMIT', 20))
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', 300))
+INLINE_INDEX_REFRESH_SECONDS = float(os.getenv('INLINE_INDEX_REFRESH_SECONDS', 3600))
+# Cities found by an ambiguous name can be chosen from the list this long
+CANDIDATES_TTL_SECONDS = int(os.getenv('CANDIDATES_TTL_SECONDS', 600))
+# FSM storage: "memory" for a single process, "redis" to share dialogues between bot processes;
+# dialogues in Redis are dropped after FSM_DATA_TTL_SECONDS without changes, 0 means never
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory')
+FSM_DATA_TTL_SECONDS = int(os.getenv('FSM_DATA_TTL_SECONDS', 7 * 24 * 60 * 60))
+# Multi-process bot (runcluster): updates are split by chat id into BOT_PARTITIONS Redis streams
+# shared by BOT_WORKERS processes, so the number of workers may change without reordering a chat
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', 4))
+BOT_PARTITIONS = int(os.getenv('BOT_PARTITIONS', 16))
+UPDATES_STREAM_MAXLEN = int(os.getenv('UPDATES_STREAM_MAXLEN', 10000))
+WORKER_BATCH_SIZE = int(os.getenv('WORKER_BATCH_SIZE', 10))
+WORKER_BLOCK_MS = int(os.getenv('WORKER_BLOCK_MS', 1000))
+WORKER_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv('WORKER_SHUTDOWN_TIMEOUT_SECONDS', 30))
+# runbot: use uvloop if it is installed, open connections before polling
+BOT_UVLOOP = os.getenv('BOT_UVLOOP', 'False') == 'True'
+BOT_WARM_UP = os.getenv('BOT_WARM_UP', 'True') == 'True'
@@ -0,0 +1,112 @@
+import json
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from aiogram import Bot
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from pydantic import BaseModel
+
+from aiogram_layer.src.settings import FSM_DATA_TTL_SECONDS
+from cache.cache_settings import REDIS_URL
+from cache.client import LazyRedis
+from django_layer.countries_app.models import Country
+from services.repositories.api.api_schemas import CountrySchema, GeocoderSchema
+from services.repositories.db.schemas import CurrencyCodesSchema, LanguageNamesSchema
+from services.service_schemas import CityCoordinatesSchema, CountryUOWSchema
+
+if TYPE_CHECKING:
+    import aioredis
+
+PREFIX_FSM = 'fsm:'
+# Only these types are restored from dialogue data, anything else stays a plain dict
+SCHEMAS = {
+    schema.__name__: schema
+    for schema in (
+        GeocoderSchema, CountrySchema, CountryUOWSchema, CurrencyCodesSchema, LanguageNamesSchema,
+        CityCoordinatesSchema,
+    )
+}
+MODELS = {'Country': (Country, ('iso_code', 'name', 'population', 'area_size'))}
+
+
+def encode(value: Any) -> dict:
+    """
+    Tags schemas and models of dialogue data with their type, used as `default` of json.dumps.
+
+    :param value: value unknown to json
+
+    :return: json object with the type and fields
+    """
+    if isinstance(value, BaseModel) and SCHEMAS.get(type(value).__name__) is type(value):
+        return {'__schema__': type(value).__name__, 'fields': {name: getattr(value, name) for name in value.__fields__}}
+    if isinstance(value, Country):
+        return {'__model__': 'Country', 'fields': {name: getattr(value, name) for name in MODELS['Country'][1]}}
+    raise TypeError(f'Object of type {type(value).__name__} can not be stored in dialogue data')
+
+
+def decode(obj: dict) -> Any:
+    """
+    Restores tagged schemas and models of dialogue data, used as `object_hook` of json.loads.
+    Models are restored unsaved with the stored fields.
+
+    :param obj: json object
+
+    :return: schema, model or the object itself
+    """
+    if obj.get('__schema__') in SCHEMAS:
+        return SCHEMAS[obj['__schema__']].parse_obj(obj['fields'])
+    if obj.get('__model__') in MODELS:
+        model, fields = MODELS[obj['__model__']]
+        return model(**{name: obj['fields'][name] for name in fields})
+    return obj
+
+
+class AioredisStorage(BaseStorage):
+    """
+    FSM storage in Redis shared by all bot processes. State is stored as a string,
+    data is JSON with pydantic schemas (found cities, chosen country) tagged by type, see :func:`encode`.
+    """
+
+    def __init__(self, redis: 'aioredis.Redis | None' = None, ttl: int = FSM_DATA_TTL_SECONDS):
+        """
+        :param redis: client without decode_responses, created from REDIS_URL by default
+        :param ttl: seconds the dialogue is kept after the last change, 0 means forever
+        """
+        self.redis = redis or LazyRedis(REDIS_URL)
+        self.ttl = ttl or None
+
+    @staticmethod
+    def key(key: StorageKey, part: str) -> str:
+        """
+        Returns Redis key of the dialogue part.
+
+        :param key: dialogue key
+        :param part: "state" or "data"
+
+        :return: key
+        """
+        return f'{PREFIX_FSM}{key.bot_id}:{key.chat_id}:{key.user_id}:{key.destiny}:{part}'
+
+    async def set_state(self, bot: Bot, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        if state is None:
+            await self.redis.delete(self.key(key, 'state'))
+        else:
+            await self.redis.set(self.key(key, 'state'), state, ex=self.ttl)
+
+    async def get_state(self, bot: Bot, key: StorageKey) -> Optional[str]:
+        state = await self.redis.get(self.key(key, 'state'))
+        return state.decode() if isinstance(state, bytes) else state
+
+    async def set_data(self, bot: Bot, key: StorageKey, data: Dict[str, Any]) -> None:
+        if not data:
+            await self.redis.delete(self.key(key, 'data'))
+        else:
+            await self.redis.set(self.key(key, 'data'), json.dumps(data, default=encode), ex=self.ttl)
+
+    async def get_data(self, bot: Bot, key: StorageKey) -> Dict[str, Any]:
+        data = await self.redis.get(self.key(key, 'data'))
+        return json.loads(data, object_hook=decode) if data else {}
+
+    async def close(self) -> None:
+        await self.redis.close()
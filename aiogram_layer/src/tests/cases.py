@@ -1,6 +1,9 @@
+import time
+
 from aiogram_layer.src.keyboards import city_detail, main_menu, to_main_menu
 from aiogram_layer.src.messages import (
     CITIES_LIST,
+    CITIES_LIST_EXPIRED,
     CITY_INFO,
     CITY_NOT_FOUND,
     START_MESSAGE,
@@ -40,6 +43,13 @@ test_process_city_name_cases = [
 ]
 
 test_choose_city_from_list_cases = [
-    ('city:21.007139 52.23209', Form.city_search, {
-     city_info.coordinates: city_info}, get_city_info_text(city_info), city_detail),
+    ('city:fc0f6149:0', Form.city_search, {
+     'candidates': {'id': 'fc0f6149', 'cities': [city_info], 'expires_at': time.time() + 600}},
+     get_city_info_text(city_info), city_detail),
+    ('city:fc0f6149:1', Form.city_search, {
+     'candidates': {'id': 'fc0f6149', 'cities': [city_info], 'expires_at': time.time() + 600}},
+     CITIES_LIST_EXPIRED, to_main_menu),
+    ('city:fc0f6149:0', Form.city_search, {
+     'candidates': {'id': 'fc0f6149', 'cities': [city_info], 'expires_at': time.time() - 1}},
+     CITIES_LIST_EXPIRED, to_main_menu),
 ]
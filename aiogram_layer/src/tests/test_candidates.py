@@ -0,0 +1,44 @@
+import pytest
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from aiogram_layer.src import candidates
+from aiogram_layer.src.callbacks import CitiesCB
+from aiogram_layer.src.candidates import get_candidate, store_candidates
+from aiogram_layer.src.keyboards import create_cities_list_markup
+from aiogram_layer.src.tests.cases import city_info
+from aiogram_layer.src.tests.keyboards import warsaw_markup
+from services.repositories.api.api_schemas import GeocoderSchema
+
+
+@pytest.mark.asyncio
+async def test_candidates(monkeypatch: pytest.MonkeyPatch, bot: Bot) -> None:
+    """
+    Check that a city is chosen from the stored list by short callback data until the list expires
+
+    :param monkeypatch: fixture for monkey-patching
+    :param bot: mocked bot
+    """
+    other_city = GeocoderSchema(
+        name='Варшава',
+        full_address='Россия, Алтайский край, Змеиногорский муниципальный район,'
+                     ' муниципальное образование Кузьминский сельсовет, посёлок Варшава',
+        coordinates='81.777584 51.426931',
+        country_code='RU',
+        search_type='locality',
+    )
+    state = FSMContext(bot=bot, storage=MemoryStorage(), key=StorageKey(bot_id=bot.id, chat_id=3, user_id=3))
+
+    list_id = await store_candidates(state, [city_info, other_city])
+    markup = (await create_cities_list_markup(list_id, [city_info, other_city])).as_markup()
+
+    assert markup == warsaw_markup
+    callback_data = CitiesCB.unpack(markup.inline_keyboard[1][0].callback_data)
+    assert await get_candidate(state, callback_data.list_id, callback_data.index) == other_city
+    assert await get_candidate(state, 'ffffffff', 0) is None
+    assert await get_candidate(state, list_id, 2) is None
+
+    monkeypatch.setattr(candidates.time, 'time', lambda: 10 ** 10)
+    assert await get_candidate(state, list_id, 0) is None
@@ -0,0 +1,53 @@
+import pytest
+
+from aiogram_layer.src import cards
+from aiogram_layer.src.cards import CountryCards
+from cache.cache_module import Cache
+from services.repositories.db.schemas import CurrencyCodesSchema, LanguageNamesSchema
+from services.service_schemas import CityCoordinatesSchema, CountryUOWSchema
+
+
+@pytest.mark.asyncio
+async def test_country_card_cache(monkeypatch: pytest.MonkeyPatch, country_data) -> None:
+    """
+    Check that the rendered card is served from memory and Redis, and cards of an old template
+    or rendered before the country was rewritten are ignored
+
+    :param monkeypatch: fixture for monkey-patching
+    :param country_data: country from the cache fixtures
+    """
+    country_all_info = CountryUOWSchema(
+        detail=country_data,
+        languages=LanguageNamesSchema(languages=country_data.languages),
+        currencies=CurrencyCodesSchema(currency_codes=list(country_data.currencies)),
+        capital=CityCoordinatesSchema(
+            name=country_data.capital,
+            latitude=country_data.capital_latitude,
+            longitude=country_data.capital_longitude,
+        ),
+    )
+    await Cache.delete_country_cards([country_data.iso_code])
+    CountryCards.clear_local()
+    card, generation = await CountryCards.get(country_data.iso_code)
+    assert card is None
+
+    card = await CountryCards.render(country_data.iso_code, country_all_info, generation)
+    assert 'Россия' in card.text
+    assert card.capital_latitude == country_data.capital_latitude
+    assert await CountryCards.get(country_data.iso_code) == (card, generation)
+
+    CountryCards.clear_local()
+    assert await CountryCards.get(country_data.iso_code) == (card, generation)
+
+    # the country is rewritten by another process, the card in memory is stale
+    await Cache.delete_country_cards([country_data.iso_code])
+    assert await CountryCards.get(country_data.iso_code) == (None, generation + 1)
+    # the card rendered from data read before the rewrite is not served
+    await CountryCards.render(country_data.iso_code, country_all_info, generation)
+    assert await CountryCards.get(country_data.iso_code) == (None, generation + 1)
+
+    card = await CountryCards.render(country_data.iso_code, country_all_info, generation + 1)
+    CountryCards.clear_local()
+    monkeypatch.setattr(cards, 'CARD_TEMPLATE_VERSION', card.version + 1)
+    assert await CountryCards.get(country_data.iso_code) == (None, generation + 1)
+    await Cache.delete_country_cards([country_data.iso_code])
@@ -0,0 +1,103 @@
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+
+from aiogram_layer.src.cluster import (
+    GROUP,
+    STREAMS,
+    UpdateIngress,
+    UpdateWorker,
+    partition_of,
+    stream_key,
+    update_chat_id,
+    worker_partitions,
+)
+from aiogram_layer.src.tests.fixtures import (
+    TEST_USER_CHAT,
+    get_callback_query,
+    get_message,
+    get_update,
+)
+
+PARTITIONS = 2
+
+
+def test_partitions() -> None:
+    """
+    Check that every partition is read by exactly one worker and a chat always maps to one partition
+    """
+    owned = [worker_partitions(index, 3, 16) for index in range(3)]
+
+    assert sorted(sum(owned, [])) == list(range(16))
+    assert partition_of(-1001, 16) == partition_of(-1001, 16) == 7
+    assert update_chat_id(get_update(message=get_message('/start'))) == TEST_USER_CHAT.id
+    assert update_chat_id(get_update(call=get_callback_query('city:f7c4556f:0'))) == TEST_USER_CHAT.id
+
+
+@pytest.mark.asyncio
+async def test_updates_are_handled_after_rebalancing(bot: Bot) -> None:
+    """
+    Check that updates published by the ingress are handled in order and acknowledged,
+    and that updates left unacknowledged by a stopped worker are taken over by the new owner
+
+    :param bot: mocked bot
+    """
+    await STREAMS.delete(*(stream_key(partition) for partition in range(PARTITIONS)))
+    handled = []
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def remember(message: Message) -> None:
+        handled.append(message.text)
+
+    updates = [
+        get_update(message=get_message(text)).copy(update={'update_id': update_id})
+        for update_id, text in enumerate(['first', 'second', 'third'])
+    ]
+    stream = stream_key(partition_of(TEST_USER_CHAT.id, PARTITIONS))
+
+    old_worker = UpdateWorker(bot, dispatcher, 0, 2, PARTITIONS)
+    await old_worker.prepare()
+    assert await UpdateIngress(bot, dispatcher, PARTITIONS).publish(updates) == 3
+    assert len(await old_worker.read('>')) == 3
+
+    worker = UpdateWorker(bot, dispatcher, 0, 1, PARTITIONS)
+    worker.consumer = 'worker-new'
+    await worker.prepare()
+    assert await old_worker.read('0') == []
+    await worker.handle(await worker.read('0'))
+
+    assert handled == ['first', 'second', 'third']
+    assert (await STREAMS.xpending(stream, GROUP))['pending'] == 0
+
+
+@pytest.mark.asyncio
+async def test_trimmed_updates_are_acknowledged(bot: Bot) -> None:
+    """
+    Check that a pending update trimmed from the stream by maxlen is acknowledged and skipped
+
+    :param bot: mocked bot
+    """
+    await STREAMS.delete(*(stream_key(partition) for partition in range(PARTITIONS)))
+    handled = []
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def remember(message: Message) -> None:
+        handled.append(message.text)
+
+    updates = [
+        get_update(message=get_message(text)).copy(update={'update_id': update_id})
+        for update_id, text in enumerate(['trimmed', 'kept'])
+    ]
+    stream = stream_key(partition_of(TEST_USER_CHAT.id, PARTITIONS))
+    worker = UpdateWorker(bot, dispatcher, 0, 1, PARTITIONS)
+    await worker.prepare()
+    await UpdateIngress(bot, dispatcher, PARTITIONS).publish(updates)
+    assert len(await worker.read('>')) == 2
+    await STREAMS.xtrim(stream, maxlen=1, approximate=False)
+
+    await worker.handle(await worker.read('0'))
+
+    assert handled == ['kept']
+    assert (await STREAMS.xpending(stream, GROUP))['pending'] == 0
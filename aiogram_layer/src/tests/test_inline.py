@@ -0,0 +1,65 @@
+import pytest
+
+from aiogram_layer.src.inline import PlaceIndex
+from cache.cache_module import Cache
+from services.prefix_index import PrefixIndex
+from services.repositories.db.cities import CityBDRepository
+from services.repositories.db.countries import CountryDBRepository
+
+
+@pytest.mark.asyncio
+async def test_place_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that the index is built once from database and cache names on the first query
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    builds = 0
+
+    async def country_names(self):
+        nonlocal builds
+        builds += 1
+        return ['Польша', 'Португалия']
+
+    async def city_names(self):
+        return ['Познань']
+
+    async def cached_names():
+        return [('Пловдив', 'city'), ('Польша', 'country')]
+
+    monkeypatch.setattr(CountryDBRepository, 'get_names', country_names)
+    monkeypatch.setattr(CityBDRepository, 'get_names', city_names)
+    monkeypatch.setattr(Cache, 'get_place_names', cached_names)
+    monkeypatch.setattr(PlaceIndex, '_index', PrefixIndex())
+    monkeypatch.setattr(PlaceIndex, '_built_at', None)
+    monkeypatch.setattr(PlaceIndex, '_failed_at', None)
+    monkeypatch.setattr(PlaceIndex, '_build_task', None)
+
+    assert await PlaceIndex.search('по', 10) == [('Познань', 'city'), ('Польша', 'country'), ('Португалия', 'country')]
+    assert await PlaceIndex.search('пл', 10) == [('Пловдив', 'city')]
+    assert builds == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_place_index_build(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that queries get no names while the index build fails, and the build is not retried by every query
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    builds = 0
+
+    async def country_names(self):
+        nonlocal builds
+        builds += 1
+        raise ConnectionError('database is unavailable')
+
+    monkeypatch.setattr(CountryDBRepository, 'get_names', country_names)
+    monkeypatch.setattr(PlaceIndex, '_index', PrefixIndex())
+    monkeypatch.setattr(PlaceIndex, '_built_at', None)
+    monkeypatch.setattr(PlaceIndex, '_failed_at', None)
+    monkeypatch.setattr(PlaceIndex, '_build_task', None)
+
+    assert await PlaceIndex.search('по', 10) == []
+    assert await PlaceIndex.search('по', 10) == []
+    assert builds == 1
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendChatAction, SendMessage
+
+from aiogram_layer.src.outbound import OutboundScheduler, Priority, outbound_priority
+from services.metrics import Metrics
+
+
+@pytest.mark.asyncio
+async def test_interactive_messages_go_first(bot: Bot) -> None:
+    """
+    Check that messages waiting for the global limit are sent in order of priority
+
+    :param bot: mocked bot
+    """
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method.text)
+        return method
+
+    scheduler = OutboundScheduler(global_rate=50)
+    scheduler.global_bucket.tokens = 0
+    with outbound_priority(Priority.background):
+        background = asyncio.create_task(scheduler(make_request, bot, SendMessage(chat_id=1, text='background')))
+    interactive = asyncio.create_task(scheduler(make_request, bot, SendMessage(chat_id=2, text='interactive')))
+    await asyncio.gather(background, interactive)
+
+    assert sent == ['interactive', 'background']
+    assert scheduler.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_limit(bot: Bot) -> None:
+    """
+    Check that messages to one chat over the burst wait for the chat limit, chat actions are not paced
+
+    :param bot: mocked bot
+    """
+    async def make_request(bot, method):
+        return method
+
+    scheduler = OutboundScheduler(chat_rate=20, chat_burst=2)
+    started = asyncio.get_running_loop().time()
+    for _ in range(3):
+        await scheduler(make_request, bot, SendMessage(chat_id=1, text='text'))
+    assert asyncio.get_running_loop().time() - started >= 0.04
+
+    scheduler = OutboundScheduler(chat_rate=0.001, chat_burst=1)
+    await scheduler(make_request, bot, SendMessage(chat_id=1, text='text'))
+    for _ in range(3):
+        await asyncio.wait_for(scheduler(make_request, bot, SendChatAction(chat_id=1, action='typing')), 0.1)
+
+
+@pytest.mark.asyncio
+async def test_retry_after(bot: Bot) -> None:
+    """
+    Check that a message rejected by flood control is sent again
+
+    :param bot: mocked bot
+    """
+    calls = 0
+
+    async def make_request(bot, method):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise TelegramRetryAfter(method=method, message='Too Many Requests', retry_after=0)
+        return method
+
+    Metrics.reset()
+    method = SendMessage(chat_id=1, text='text')
+
+    assert await OutboundScheduler()(make_request, bot, method) is method
+    assert calls == 2
+    assert Metrics.snapshot()['counters']['telegram.outbound.retry_after'] == 1
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from aiogram_layer.src import prefetch
+from aiogram_layer.src.tests.cases import city_info
+from services.country_service import CountryService
+
+
+@pytest.mark.asyncio
+async def test_country_prefetch(monkeypatch: pytest.MonkeyPatch, bot: Bot) -> None:
+    """
+    Check that country details are loaded in background into the state and awaited by the next handler
+
+    :param monkeypatch: fixture for monkey-patching
+    :param bot: mocked bot
+    """
+    loaded = asyncio.Event()
+    calls: list = []
+
+    async def return_mock(self, country_info):
+        calls.append(country_info)
+        await loaded.wait()
+        return 'country detail'
+
+    monkeypatch.setattr(CountryService, 'get_country_all_info', return_mock)
+    state = FSMContext(bot=bot, storage=MemoryStorage(), key=StorageKey(bot_id=bot.id, chat_id=1, user_id=1))
+    await state.update_data(country_detail='previous country')
+
+    await prefetch.start_country_prefetch(state, city_info)
+
+    data = await state.get_data()
+    assert data['city_info'] == city_info
+    assert 'country_detail' not in data
+
+    pending = asyncio.create_task(prefetch.get_country_detail(state))
+    await asyncio.sleep(0)
+    assert not pending.done()
+    loaded.set()
+
+    assert await pending == 'country detail'
+    assert (await state.get_data())['country_detail'] == 'country detail'
+    assert await prefetch.get_country_detail(state) == 'country detail'
+    assert calls == [city_info]
+    assert not prefetch._country_tasks
+
+
+@pytest.mark.asyncio
+async def test_country_prefetch_lost(monkeypatch: pytest.MonkeyPatch, bot: Bot) -> None:
+    """
+    Check that country details are loaded on demand if there is no load in progress
+
+    :param monkeypatch: fixture for monkey-patching
+    :param bot: mocked bot
+    """
+    async def return_mock(self, country_info):
+        return 'country detail'
+
+    monkeypatch.setattr(CountryService, 'get_country_all_info', return_mock)
+    state = FSMContext(bot=bot, storage=MemoryStorage(), key=StorageKey(bot_id=bot.id, chat_id=2, user_id=2))
+    await state.update_data(city_info=city_info)
+
+    assert await prefetch.get_country_detail(state) == 'country detail'
+    assert (await state.get_data())['country_detail'] == 'country detail'
+
+
+@pytest.mark.asyncio
+async def test_country_detail_without_place(bot: Bot) -> None:
+    """
+    Check that there are no country details if no place is chosen in the dialogue
+
+    :param bot: mocked bot
+    """
+    state = FSMContext(bot=bot, storage=MemoryStorage(), key=StorageKey(bot_id=bot.id, chat_id=3, user_id=3))
+
+    assert await prefetch.get_country_detail(state) is None
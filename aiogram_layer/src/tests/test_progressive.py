@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+
+from aiogram_layer.src.progressive import ProgressiveReply
+from aiogram_layer.src.tests.fixtures import TEST_USER_CHAT
+
+
+class FakeMessage:
+    def __init__(self, calls: list, failing: set | None = None):
+        self.chat = TEST_USER_CHAT
+        self.calls = calls
+        self.failing = failing or set()
+
+    async def answer(self, text, reply_markup=None):
+        if text in self.failing:
+            await asyncio.sleep(0.01)
+            raise TelegramNetworkError(method=None, message='timeout')
+        self.calls.append(('answer', text))
+        return FakeMessage(self.calls, self.failing)
+
+    async def reply(self, text, reply_markup=None):
+        self.calls.append(('reply', text))
+        return FakeMessage(self.calls)
+
+    async def edit_text(self, text, reply_markup=None):
+        if text in self.failing:
+            raise TelegramBadRequest(method=None, message='message to edit not found')
+        self.calls.append(('edit', text))
+        return self
+
+
+@pytest.mark.asyncio
+async def test_fast_reply_has_no_placeholder(bot: Bot) -> None:
+    """
+    Check that a reply ready before the placeholder delay is sent as a single message
+
+    :param bot: mocked bot
+    """
+    calls: list = []
+    async with ProgressiveReply(FakeMessage(calls), placeholder_delay=1) as progress:
+        await progress.finish('final', reply=True)
+
+    assert calls == [('reply', 'final')]
+
+
+@pytest.mark.asyncio
+async def test_slow_reply_edits_placeholder(bot: Bot) -> None:
+    """
+    Check that a slow reply edits the placeholder
+
+    :param bot: mocked bot
+    """
+    calls: list = []
+    async with ProgressiveReply(FakeMessage(calls), placeholder='wait', placeholder_delay=0) as progress:
+        await asyncio.sleep(0.01)
+        await progress.finish('final')
+
+    assert calls == [('answer', 'wait'), ('edit', 'final')]
+
+
+@pytest.mark.asyncio
+async def test_failed_placeholder_is_replaced_by_message(bot: Bot) -> None:
+    """
+    Check that the reply is sent as a new message if the placeholder being sent fails
+
+    :param bot: mocked bot
+    """
+    calls: list = []
+    async with ProgressiveReply(FakeMessage(calls, failing={'wait'}), placeholder='wait',
+                                placeholder_delay=0) as progress:
+        while not progress._sending_placeholder:
+            await asyncio.sleep(0)
+        await progress.finish('final')
+
+    assert calls == [('answer', 'final')]
+
+
+@pytest.mark.asyncio
+async def test_failed_edit_is_replaced_by_message(bot: Bot) -> None:
+    """
+    Check that the reply is sent as a new message if the placeholder can not be edited
+
+    :param bot: mocked bot
+    """
+    calls: list = []
+    async with ProgressiveReply(FakeMessage(calls, failing={'final'}), placeholder='wait',
+                                placeholder_delay=0) as progress:
+        await asyncio.sleep(0.01)
+        await progress.finish('final', reply=True)
+
+    assert calls == [('answer', 'wait'), ('reply', 'final')]
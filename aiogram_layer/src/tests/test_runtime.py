@@ -0,0 +1,25 @@
+import pytest
+
+from aiogram_layer.src.runtime import install_event_loop, startup_report, warm_up
+from aiogram_layer.src.tests.mocks import MockedBot
+from services.metrics import Metrics
+
+
+@pytest.mark.asyncio
+async def test_startup_report(bot: MockedBot) -> None:
+    """
+    Check that warm-up steps are timed even when a step fails (no database in this test)
+    and the report is recorded in metrics
+
+    :param bot: mocked bot
+    """
+    Metrics.reset()
+
+    phases = await warm_up(bot)
+
+    assert set(phases) == {'warm_up.telegram', 'warm_up.redis', 'warm_up.database', 'warm_up.inline_index'}
+    assert not bot.session.closed
+    assert install_event_loop(False) == 'asyncio'
+    report = startup_report('asyncio', {'imports': 0.5, **phases}, 1.25)
+    assert report.startswith('Bot started on asyncio in 1.250s (imports: 0.500s, warm_up.')
+    assert Metrics.snapshot()['timings']['bot.startup']['count'] == 1
@@ -0,0 +1,56 @@
+import pytest
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+
+from aiogram_layer.src.states import CountryCityForm
+from aiogram_layer.src.storage import AioredisStorage
+from aiogram_layer.src.tests.cases import city_info
+from django_layer.countries_app.models import Country
+from services.repositories.db.schemas import CurrencyCodesSchema, LanguageNamesSchema
+from services.service_schemas import CityCoordinatesSchema, CountryUOWSchema
+
+country_detail = CountryUOWSchema(
+    detail=Country(iso_code='PL', name='Польша', population=37958138, area_size=312679),
+    languages=LanguageNamesSchema(languages=['польский']),
+    currencies=CurrencyCodesSchema(currency_codes=['PLN']),
+    capital=CityCoordinatesSchema(name='Варшава', latitude=52.23, longitude=21.01),
+)
+
+
+@pytest.mark.asyncio
+async def test_redis_storage(bot: Bot) -> None:
+    """
+    Check that the dialogue with pydantic schemas and models in data survives a new storage instance (another process)
+
+    :param bot: mocked bot
+    """
+    key = StorageKey(bot_id=bot.id, chat_id=-7, user_id=7)
+    storage = AioredisStorage()
+    state = FSMContext(bot=bot, storage=storage, key=key)
+    await state.clear()
+
+    await state.set_state(CountryCityForm.city_search)
+    await state.update_data(
+        city_info=city_info,
+        candidates={'id': 'f7c4556f', 'cities': [city_info], 'expires_at': 1.5},
+        country_detail=country_detail,
+    )
+    await storage.close()
+
+    storage = AioredisStorage()
+    state = FSMContext(bot=bot, storage=storage, key=key)
+    assert await state.get_state() == CountryCityForm.city_search.state
+    data = await state.get_data()
+    assert data == {
+        'city_info': city_info,
+        'candidates': {'id': 'f7c4556f', 'cities': [city_info], 'expires_at': 1.5},
+        'country_detail': country_detail,
+    }
+    assert data['country_detail'].detail.population == 37958138
+
+    await state.clear()
+    assert await state.get_state() is None
+    assert await state.get_data() == {}
+    assert not await storage.redis.exists(storage.key(key, 'state'), storage.key(key, 'data'))
+    await storage.close()
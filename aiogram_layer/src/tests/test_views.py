@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from aiogram_layer.src import views
+from aiogram_layer.src.tests.cases import city_info
+from cache.cache_module import Cache
+from cache.cache_settings import POPULARITY_KEY
+from cache.test.methods import clear_redis
+
+
+@pytest.mark.asyncio
+async def test_views_are_counted_in_background() -> None:
+    """
+    Check that a city view is counted by a tracked background task which is forgotten when finished
+    """
+    await clear_redis([POPULARITY_KEY])
+
+    views.record_city_view(city_info)
+    assert len(views._background_tasks) == 1
+    await asyncio.gather(*views._background_tasks)
+
+    longitude, latitude = map(float, city_info.coordinates.split())
+    assert await Cache.get_popular_places(10) == [(round(latitude, 2), round(longitude, 2))]
+    assert not views._background_tasks
+    await clear_redis([POPULARITY_KEY])
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+
+from services.city_service import CityService
+from services.repositories.api.api_schemas import GeocoderSchema
+
+logger = logging.getLogger(__name__)
+
+# Views are counted in background, tasks are kept until they finish
+_background_tasks: set[asyncio.Task] = set()
+
+
+def record_view(latitude: float, longitude: float) -> None:
+    """
+    Counts a view of the place for popular weather prefetch in background, so the reply does not wait for Redis.
+
+    :param latitude: place latitude
+    :param longitude: place longitude
+
+    :return: None
+    """
+    task = asyncio.create_task(_record_view(latitude, longitude))
+    _background_tasks.add(task)
+    task.add_done_callback(_forget_task)
+
+
+def record_city_view(city_info: GeocoderSchema) -> None:
+    """
+    Counts a view of the city, see :func:`record_view`.
+
+    :param city_info: chosen city
+
+    :return: None
+    """
+    long, lat = city_info.coordinates.split()
+    record_view(float(lat), float(long))
+
+
+async def _record_view(latitude: float, longitude: float) -> None:
+    """
+    Counts a view of the place.
+
+    :param latitude: place latitude
+    :param longitude: place longitude
+
+    :return: None
+    """
+    async with CityService() as uow:
+        await uow.record_view(latitude, longitude)
+
+
+def _forget_task(task: asyncio.Task) -> None:
+    """
+    Removes the finished task and logs its error.
+
+    :param task: finished task
+
+    :return: None
+    """
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.error('Failed to count a view', exc_info=task.exception())
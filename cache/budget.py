@@ -0,0 +1,203 @@
+import time
+from typing import TYPE_CHECKING
+
+from cache.cache_settings import CACHE_QUOTAS, PREFIX_BUDGET
+from cache.cache_settings import REDIS as redis
+from services.metrics import Metrics
+
+if TYPE_CHECKING:
+    from aioredis.client import Pipeline
+
+# Accounts the written key in the LRU index and the sizes hash of its prefix, then evicts
+# least recently used keys of the prefix while the quota is exceeded. Returns the number of evicted keys.
+# Evicted keys are read from the index, not passed in KEYS, so the script assumes a single Redis node:
+# on a cluster they may live in another slot. Keys expired by TTL stay in the index until
+# the next eviction reaches them or :meth:`CacheBudget.prune` is run by the periodic job.
+TRACK_SCRIPT = """
+local old = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+redis.call('INCRBY', KEYS[3], tonumber(ARGV[2]) - old)
+local max_keys, max_bytes = tonumber(ARGV[4]), tonumber(ARGV[5])
+local evicted = 0
+while true do
+    local count = redis.call('ZCARD', KEYS[1])
+    local total = tonumber(redis.call('GET', KEYS[3]) or '0')
+    if (max_keys == 0 or count <= max_keys) and (max_bytes == 0 or total <= max_bytes) then
+        break
+    end
+    local member = redis.call('ZPOPMIN', KEYS[1])[1]
+    if not member then
+        break
+    end
+    redis.call('DECRBY', KEYS[3], tonumber(redis.call('HGET', KEYS[2], member) or '0'))
+    redis.call('HDEL', KEYS[2], member)
+    evicted = evicted + redis.call('DEL', member)
+end
+if evicted > 0 then
+    redis.call('INCRBY', KEYS[4], evicted)
+end
+return evicted
+"""
+
+TTL_BUCKETS = [(60, '< 1m'), (60 * 60, '< 1h'), (24 * 60 * 60, '< 1d')]
+
+
+class CacheBudget:
+    """
+    Approximate memory accounting and per-prefix quotas for cache entries.
+    Every prefix from CACHE_QUOTAS has a sorted set of its keys by last access time (LRU index),
+    a hash of approximate entry sizes, a total size counter and an evictions counter.
+    """
+
+    @staticmethod
+    def prefix_of(key: str) -> str | None:
+        """
+        Returns the budgeted prefix of the key.
+
+        :param key: redis key
+
+        :return: prefix from CACHE_QUOTAS or None
+        """
+        for prefix in CACHE_QUOTAS:
+            if key.startswith(prefix):
+                return prefix
+        return None
+
+    @staticmethod
+    def index_keys(prefix: str) -> list[str]:
+        """
+        Returns service keys of the prefix: LRU index, sizes hash, total size and evictions counter.
+
+        :param prefix: cache prefix
+
+        :return: list of redis keys
+        """
+        return [f'{PREFIX_BUDGET}{prefix}:{part}' for part in ('lru', 'sizes', 'bytes', 'evicted')]
+
+    @staticmethod
+    def touch(pipe: 'Pipeline', keys: list[str]) -> None:
+        """
+        Adds LRU index update of already tracked keys to the pipeline.
+
+        :param pipe: redis pipeline
+        :param keys: list of read keys
+
+        :return: None
+        """
+        now = time.time()
+        for key in keys:
+            prefix = CacheBudget.prefix_of(key)
+            if prefix:
+                pipe.zadd(CacheBudget.index_keys(prefix)[0], {key: now}, xx=True)
+
+    @staticmethod
+    def track(pipe: 'Pipeline', key: str, size: int) -> None:
+        """
+        Adds accounting of the written key and quota enforcement to the pipeline.
+        The pipeline result of the call is the number of evicted keys, see :meth:`count_evicted`.
+
+        :param pipe: redis pipeline
+        :param key: written key
+        :param size: approximate size of the entry in bytes
+
+        :return: None
+        """
+        prefix = CacheBudget.prefix_of(key)
+        if prefix:
+            max_keys, max_bytes = CACHE_QUOTAS[prefix]
+            pipe.eval(TRACK_SCRIPT, 4, *CacheBudget.index_keys(prefix), key, size, time.time(), max_keys, max_bytes)
+
+    @staticmethod
+    def count_evicted(keys: list[str], evicted: list[int]) -> None:
+        """
+        Counts evictions reported by :meth:`track` calls in metrics.
+
+        :param keys: written keys in order of :meth:`track` calls
+        :param evicted: results of :meth:`track` calls
+
+        :return: None
+        """
+        for key, count in zip([key for key in keys if CacheBudget.prefix_of(key)], evicted):
+            if count:
+                Metrics.incr(f'cache.evicted.{CacheBudget.prefix_of(key)}', count)
+
+    @staticmethod
+    async def prune(prefix: str) -> int:
+        """
+        Removes from the index keys of the prefix which have already expired by themselves.
+
+        :param prefix: cache prefix
+
+        :return: number of removed index entries
+        """
+        lru, sizes, total, _ = CacheBudget.index_keys(prefix)
+        members = await redis.zrange(lru, 0, -1)
+        async with redis.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.exists(member)
+            exists = await pipe.execute()
+        expired = [member for member, is_alive in zip(members, exists) if not is_alive]
+        if expired:
+            expired_sizes = await redis.hmget(sizes, expired)
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(lru, *expired)
+                pipe.hdel(sizes, *expired)
+                pipe.decrby(total, sum(int(size or 0) for size in expired_sizes))
+                await pipe.execute()
+        await redis.close()
+        return len(expired)
+
+    @staticmethod
+    async def report(prefix: str, sample_size: int = 1000) -> dict:
+        """
+        Collects statistics of the prefix: key count, memory and TTL distribution.
+        Memory is measured with MEMORY USAGE on a sample of keys and extrapolated to all keys.
+
+        :param prefix: cache prefix
+        :param sample_size: max number of keys to measure
+
+        :return: dict with statistics
+        """
+        keys_count, sample = 0, []
+        async for key in redis.scan_iter(match=f'{prefix}*', count=1000):
+            keys_count += 1
+            if len(sample) < sample_size:
+                sample.append(key)
+        lru, _, total, evicted = CacheBudget.index_keys(prefix)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(lru).mget([total, evicted])
+            for key in sample:
+                pipe.ttl(key)
+            tracked_keys, (tracked_bytes, evicted_count), *ttls = await pipe.execute()
+        ttl_distribution = {label: 0 for label in ['no expiry', *(label for _, label in TTL_BUCKETS), '>= 1d']}
+        for ttl in ttls:
+            if ttl < 0:
+                ttl_distribution['no expiry'] += 1
+                continue
+            label = next((label for limit, label in TTL_BUCKETS if ttl < limit), '>= 1d')
+            ttl_distribution[label] += 1
+        from aioredis.exceptions import RedisError
+
+        # MEMORY USAGE may be disabled on managed servers
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in sample:
+                    pipe.memory_usage(key)
+                sample_memory = [usage or 0 for usage in await pipe.execute()]
+            memory = round(sum(sample_memory) / len(sample_memory) * keys_count) if sample_memory else 0
+        except RedisError:
+            memory = None
+        await redis.close()
+        max_keys, max_bytes = CACHE_QUOTAS.get(prefix, (0, 0))
+        return {
+            'keys': keys_count,
+            'memory_bytes': memory,
+            'sampled_keys': len(sample),
+            'ttl_distribution': ttl_distribution,
+            'tracked_keys': tracked_keys,
+            'tracked_bytes': int(tracked_bytes or 0),
+            'evicted': int(evicted_count or 0),
+            'max_keys': max_keys,
+            'max_bytes': max_bytes,
+        }
@@ -1,29 +1,101 @@
+import asyncio
 import json
+import logging
+import math
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
 
+from pydantic import BaseModel, ValidationError
+
+from cache.budget import CacheBudget
+from cache.cache_settings import (
+    CACHE_BATCH_SIZE,
+    CURRENCY_RATES_KEY,
+    EARLY_REFRESH_BETA,
+    EARLY_REFRESH_DELTA_SECONDS,
+    FENCE_TOKEN_TTL_SECONDS,
+)
 from cache.cache_settings import LIVE_CACHE_SECONDS as TTL
-from cache.cache_settings import PREFIX_CITY, PREFIX_COUNTRY
+from cache.cache_settings import LIVE_CARD_CACHE_SECONDS as CARD_TTL
+from cache.cache_settings import LIVE_CITY_CACHE_SECONDS as CITY_TTL
+from cache.cache_settings import LIVE_WEATHER_CACHE_SECONDS as WEATHER_TTL
+from cache.cache_settings import (
+    NEW_CURRENCY_COUNTRIES_KEY,
+    POPULARITY_DECAY,
+    POPULARITY_KEY,
+    POPULARITY_MIN_SCORE,
+    PREFIX_CARD,
+    PREFIX_CARD_GENERATION,
+    PREFIX_CITY,
+    PREFIX_COUNTRY,
+    PREFIX_CURRENCY_INDEX,
+    PREFIX_FENCE,
+    PREFIX_LOCK,
+    PREFIX_WEATHER,
+    REBUILD_LOCK_TIMEOUT_MS,
+)
 from cache.cache_settings import REDIS as redis
+from cache.cache_settings import STALE_WEATHER_CACHE_SECONDS
+from services.query import normalize_query
 from services.repositories.api.api_schemas import (
     CitySchema,
     CountrySchema,
     GeocoderSchema,
+    WeatherSchema,
 )
+from services.repositories.api.weather import Coordinates, round_coordinates
+
+logger = logging.getLogger(__name__)
+
+Schema = TypeVar('Schema', bound=BaseModel)
+OnExpiring = Callable[[], Awaitable[None]] | None
+
+# SET NX PX the lock with the next fencing token as its value, returns the token or nil
+ACQUIRE_LOCK_SCRIPT = """
+local token = tonumber(redis.call('GET', KEYS[2]) or '0') + 1
+if redis.call('SET', KEYS[1], token, 'NX', 'PX', ARGV[1]) then
+    redis.call('SET', KEYS[2], token, 'EX', ARGV[2])
+    return token
+end
+return false
+"""
+# Deletes the lock only if it still holds the given token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+# Writes the value only if no newer fencing token was issued since the given one
+FENCED_SET_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
 
 
 class Cache:
+    # keys with a background refresh in progress in this process and the refresh tasks themselves
+    _refreshing: set[str] = set()
+    _background_tasks: set[asyncio.Task] = set()
 
     @staticmethod
-    async def get_country(coordinates: str) -> CountrySchema | None:
+    async def get_country(coordinates: str, on_expiring: OnExpiring = None) -> CountrySchema | None:
         """
         The function receives information about the country from the cache,
         if there is no entry in the cache, it returns None.
 
         :param coordinates
+        :param on_expiring: optional coroutine function, started in background
+            when the entry is close to expiration (the cached value is still returned)
 
         :return: information about the country
         """
-        country_data = await redis.get(f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}')
-        await redis.close()
+        country_data = await Cache._get_with_refresh(
+            f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}', on_expiring)
         if country_data:
             return CountrySchema(**json.loads(country_data))
         return None
@@ -38,25 +110,87 @@ class Cache:
 
         :return: information about the city
         """
-        city_data = await redis.get(f'{PREFIX_CITY}{coordinates.replace(" ", "_")}')
-        await redis.close()
+        city_data = await Cache._get(f'{PREFIX_CITY}{coordinates.replace(" ", "_")}')
         if city_data:
             return CitySchema(**json.loads(city_data))
         return None
 
     @staticmethod
-    async def create_or_update_country(coordinates: str, country_data: CountrySchema) -> None:
+    async def create_or_update_country(
+        coordinates: str, country_data: CountrySchema, fencing_token: int | None = None
+    ) -> bool:
         """
         Function creates or updates country cache
 
         :param coordinates:
         :param country_data
+        :param fencing_token: token from :meth:`acquire_country_lock`, if given the entry
+            is written only while no newer token was issued for the country
+
+        :return: True if the entry was written
+        """
+        key_country = f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}'
+        value = json.dumps(dict(country_data))
+        if fencing_token is None:
+            await Cache._set(key_country, value, TTL)
+            await Cache.delete_country_cards([country_data.iso_code])
+            await Cache.index_country_currencies({coordinates: country_data})
+            return True
+        written = bool(await redis.eval(
+            FENCED_SET_SCRIPT, 2, key_country, f'{PREFIX_FENCE}{key_country}', fencing_token, value, TTL,
+        ))
+        if written:
+            await Cache._track(key_country, value)
+            await Cache.delete_country_cards([country_data.iso_code])
+            await Cache.index_country_currencies({coordinates: country_data})
+        await redis.close()
+        return written
+
+    @staticmethod
+    async def acquire_country_lock(coordinates: str) -> int | None:
+        """
+        Tries to take the rebuild lock of the country entry for REBUILD_LOCK_TIMEOUT_MS.
+
+        :param coordinates: coordinates of a country
+
+        :return: fencing token if the lock is taken, None if another worker holds it
+        """
+        key_country = f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}'
+        token = await redis.eval(
+            ACQUIRE_LOCK_SCRIPT, 2, f'{PREFIX_LOCK}{key_country}', f'{PREFIX_FENCE}{key_country}',
+            REBUILD_LOCK_TIMEOUT_MS, FENCE_TOKEN_TTL_SECONDS,
+        )
+        await redis.close()
+        return int(token) if token else None
+
+    @staticmethod
+    async def release_country_lock(coordinates: str, fencing_token: int) -> None:
+        """
+        Releases the rebuild lock of the country entry if it is still held with the token.
+
+        :param coordinates: coordinates of a country
+        :param fencing_token: token from :meth:`acquire_country_lock`
 
         :return: None
         """
         key_country = f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}'
-        await redis.set(key_country, json.dumps(dict(country_data)), TTL)
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, f'{PREFIX_LOCK}{key_country}', fencing_token)
+        await redis.close()
+
+    @staticmethod
+    async def acquire_job_lock(name: str, timeout_ms: int) -> bool:
+        """
+        Tries to take the lock of a periodic job run. The lock is not released after the run,
+        so the run is done by one process only until the lock expires.
+
+        :param name: name of the job run
+        :param timeout_ms: lock lifetime
+
+        :return: True if the lock is taken, False if another process took it
+        """
+        taken = await redis.set(f'{PREFIX_LOCK}job:{name}', 1, nx=True, px=timeout_ms)
         await redis.close()
+        return bool(taken)
 
     @staticmethod
     async def create_or_update_city(city_data: CitySchema) -> None:
@@ -68,75 +202,655 @@ class Cache:
         :return: None
         """
         key_city = f'{PREFIX_CITY}{city_data.longitude}_{city_data.latitude}'
-        await redis.set(key_city, json.dumps(dict(city_data)), TTL)
-        await redis.close()
+        await Cache._set(key_city, json.dumps(dict(city_data)), CITY_TTL)
 
     @staticmethod
     async def get_city_geocoder(city_name: str) -> GeocoderSchema | list[GeocoderSchema] | None:
         """
         Get geocoder data from cache
 
-        :param: city_name
+        :param: city_name, the key is normalized with :func:`normalize_query`
 
         :return:
         """
-        key = f'{PREFIX_CITY}{city_name}'
-        cache_data = await redis.get(key)
-        await redis.close()
+        cache_data = await Cache._get(f'{PREFIX_CITY}{normalize_query(city_name)}')
         if not cache_data:
             return None
-        city_data = json.loads(cache_data)
-        if isinstance(city_data, list):
-            for city in city_data:
-                GeocoderSchema.parse_obj(city)
-            return [GeocoderSchema.parse_obj(city) for city in city_data]
-
-        return GeocoderSchema.parse_obj(city_data)
+        return Cache._load_city_geocoder(json.loads(cache_data))
 
     @staticmethod
-    async def set_city_geocoder(city_schema: GeocoderSchema | list[GeocoderSchema]) -> None:
+    async def set_city_geocoder(
+        city_schema: GeocoderSchema | list[GeocoderSchema], query: str | None = None
+    ) -> None:
         """
         Function creates or updates city geocoder cache
 
         :param city_schema:
+        :param query: user's query to store the entry under, the city name by default
 
         :return: None
         """
-        if isinstance(city_schema, list):
-            city_name = city_schema[0].name
-            data = [city.dict() for city in city_schema]
-        else:
-            city_name = city_schema.name
-            data = city_schema.dict()
-        key = f'{PREFIX_CITY}{city_name}'
-        await redis.set(key, json.dumps(data), TTL)
-        await redis.close()
+        city_name, data = Cache._dump_city_geocoder(city_schema)
+        await Cache._set(f'{PREFIX_CITY}{normalize_query(query or city_name)}', json.dumps(data), CITY_TTL)
 
     @staticmethod
-    async def get_country_by_name(country_name: str) -> GeocoderSchema | None:
+    async def get_country_by_name(country_name: str, on_expiring: OnExpiring = None) -> GeocoderSchema | None:
         """
         Get geocoder data from cache
 
-        :param country_name
+        :param country_name: the key is normalized with :func:`normalize_query`
+        :param on_expiring: optional coroutine function, started in background
+            when the entry is close to expiration (the cached value is still returned)
 
         :return: GeocoderSchema
         """
-        country_data = await redis.get(f'{PREFIX_COUNTRY}{country_name}')
-        await redis.close()
+        country_data = await Cache._get_with_refresh(f'{PREFIX_COUNTRY}{normalize_query(country_name)}', on_expiring)
         if country_data:
             return GeocoderSchema(**json.loads(country_data))
 
         return None
 
     @staticmethod
-    async def set_country_geocoder(country: GeocoderSchema) -> None:
+    async def set_country_geocoder(country: GeocoderSchema, country_name: str | None = None) -> None:
         """
         Function creates or updates city geocoder cache
 
         :param country: GeocoderSchema
+        :param country_name: name to store the entry under, country.name by default
+
+        :return: None
+        """
+        key = f'{PREFIX_COUNTRY}{normalize_query(country_name or country.name)}'
+        await Cache._set(key, json.dumps(country.dict()), TTL)
+
+    @staticmethod
+    async def get_many_weather(
+        coordinates: list[Coordinates], allow_stale: bool = False
+    ) -> list[WeatherSchema | None]:
+        """
+        Get current weather from cache, coordinates are rounded with :func:`round_coordinates`.
+
+        :param coordinates: list of (latitude, longitude) pairs
+        :param allow_stale: also return weather older than LIVE_WEATHER_CACHE_SECONDS,
+            kept for STALE_WEATHER_CACHE_SECONDS more as a fallback when the weather API is unavailable
+
+        :return: list of weather in the same order as coordinates
+        """
+        keys = [Cache._weather_key(point) for point in coordinates]
+        now = time.time()
+        result: list[WeatherSchema | None] = []
+        for data in await Cache._get_many(keys):
+            if not isinstance(data, dict) or not allow_stale and now - data.get('fetched_at', 0) > WEATHER_TTL:
+                result.append(None)
+                continue
+            result.append(Cache._parse_or_none(WeatherSchema, data.get('weather')))
+        return result
+
+    @staticmethod
+    async def set_many_weather(weather: dict[Coordinates, WeatherSchema]) -> None:
+        """
+        Function creates or updates weather cache, the entry is fresh for LIVE_WEATHER_CACHE_SECONDS
+        and stays as stale for STALE_WEATHER_CACHE_SECONDS more.
+
+        :param weather: current weather by (latitude, longitude)
+
+        :return: None
+        """
+        now = time.time()
+        await Cache._set_many([
+            (
+                Cache._weather_key(point),
+                json.dumps({'weather': weather_data.dict(), 'fetched_at': now}),
+                WEATHER_TTL + STALE_WEATHER_CACHE_SECONDS,
+            )
+            for point, weather_data in weather.items()
+        ])
+
+    @staticmethod
+    async def record_view(point: Coordinates) -> None:
+        """
+        Increments popularity of the place which weather may be requested.
+
+        :param point: (latitude, longitude)
+
+        :return: None
+        """
+        await redis.zincrby(POPULARITY_KEY, 1, ' '.join(map(str, round_coordinates(*point))))
+        await redis.close()
+
+    @staticmethod
+    async def get_popular_places(limit: int) -> list[Coordinates]:
+        """
+        Returns the most popular places.
+
+        :param limit: max number of places
+
+        :return: list of (latitude, longitude) from the most popular
+        """
+        members = await redis.zrevrange(POPULARITY_KEY, 0, limit - 1)
+        await redis.close()
+        points = [member.split() for member in members]
+        return [(float(latitude), float(longitude)) for latitude, longitude in points]
+
+    @staticmethod
+    async def decay_popularity() -> None:
+        """
+        Multiplies popularity of all places by POPULARITY_DECAY and forgets places below POPULARITY_MIN_SCORE,
+        so the ranking follows recent views.
+
+        :return: None
+        """
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(POPULARITY_KEY, {POPULARITY_KEY: POPULARITY_DECAY})
+            pipe.zremrangebyscore(POPULARITY_KEY, '-inf', f'({POPULARITY_MIN_SCORE}')
+            await pipe.execute()
+        await redis.close()
+
+    @staticmethod
+    async def get_country_card(iso_code: str) -> str | None:
+        """
+        The function receives the rendered country card from the cache.
+
+        :param iso_code: country ISO code
+
+        :return: raw card or None
+        """
+        return await Cache._get(f'{PREFIX_CARD}{iso_code}')
+
+    @staticmethod
+    async def set_country_card(iso_code: str, card: str) -> None:
+        """
+        Stores the rendered country card until the country is rewritten.
+
+        :param iso_code: country ISO code
+        :param card: raw card
+
+        :return: None
+        """
+        await Cache._set(f'{PREFIX_CARD}{iso_code}', card, CARD_TTL)
+
+    @staticmethod
+    async def get_card_generation(iso_code: str) -> int:
+        """
+        Returns the generation of the country cards, see :meth:`delete_country_cards`.
+
+        :param iso_code: country ISO code
+
+        :return: generation, 0 if the country was never rewritten
+        """
+        generation = await redis.get(f'{PREFIX_CARD_GENERATION}{iso_code}')
+        await redis.close()
+        return int(generation or 0)
+
+    @staticmethod
+    async def delete_country_cards(iso_codes: list[str]) -> None:
+        """
+        Drops rendered cards of the countries and increases their generation, called on every write
+        of country data. Cards rendered from data read before the write have an older generation
+        and are ignored, also in process memory of other bot processes.
+
+        :param iso_codes: country ISO codes
+
+        :return: None
+        """
+        if not iso_codes:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*(f'{PREFIX_CARD}{iso_code}' for iso_code in iso_codes))
+            for iso_code in iso_codes:
+                pipe.incr(f'{PREFIX_CARD_GENERATION}{iso_code}')
+            await pipe.execute()
+        await redis.close()
+
+    @staticmethod
+    async def get_place_names() -> list[tuple[str, str]]:
+        """
+        Collects names of all cached countries and cities, including geocoder results.
+
+        :return: list of pairs of name and kind ("country" or "city")
+        """
+        keys = [key async for key in redis.scan_iter(match=f'{PREFIX_COUNTRY}*')]
+        kinds = ['country'] * len(keys)
+        city_keys = [key async for key in redis.scan_iter(match=f'{PREFIX_CITY}*')]
+        keys.extend(city_keys)
+        kinds.extend(['city'] * len(city_keys))
+        names = []
+        # plain MGET: reading every entry must not mark it as recently used for the cache budget
+        for start in range(0, len(keys), CACHE_BATCH_SIZE):
+            values = await redis.mget(keys[start:start + CACHE_BATCH_SIZE])
+            for kind, value in zip(kinds[start:start + CACHE_BATCH_SIZE], values):
+                try:
+                    data = json.loads(value) if value else None
+                except ValueError:
+                    continue
+                for item in data if isinstance(data, list) else [data]:
+                    if isinstance(item, dict) and item.get('name'):
+                        names.append((item['name'], kind))
+            await asyncio.sleep(0)
+        await redis.close()
+        return names
+
+    @staticmethod
+    async def get_many_countries(coordinates_list: list[str]) -> list[CountrySchema | None]:
+        """
+        Batch version of :meth:`get_country`. Entries which are missing
+        or are not a valid country record are returned as None.
+
+        :param coordinates_list: list of country coordinates
+
+        :return: list of countries in the same order as coordinates
+        """
+        keys = [f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}' for coordinates in coordinates_list]
+        return [Cache._parse_or_none(CountrySchema, data) for data in await Cache._get_many(keys)]
+
+    @staticmethod
+    async def get_many_cities(coordinates_list: list[str]) -> list[CitySchema | None]:
+        """
+        Batch version of :meth:`get_city`.
+
+        :param coordinates_list: list of city coordinates
+
+        :return: list of cities in the same order as coordinates
+        """
+        keys = [f'{PREFIX_CITY}{coordinates.replace(" ", "_")}' for coordinates in coordinates_list]
+        return [Cache._parse_or_none(CitySchema, data) for data in await Cache._get_many(keys)]
+
+    @staticmethod
+    async def get_many_city_geocoders(
+        city_names: list[str]
+    ) -> list[GeocoderSchema | list[GeocoderSchema] | None]:
+        """
+        Batch version of :meth:`get_city_geocoder`.
+
+        :param city_names: list of city names
+
+        :return: list of geocoder data in the same order as city names
+        """
+        keys = [f'{PREFIX_CITY}{normalize_query(city_name)}' for city_name in city_names]
+        result = []
+        for data in await Cache._get_many(keys):
+            try:
+                result.append(Cache._load_city_geocoder(data) if data else None)
+            except ValidationError:
+                result.append(None)
+        return result
+
+    @staticmethod
+    async def set_many_countries(
+        countries: dict[str, CountrySchema], ttls: dict[str, int] | None = None, with_rates: bool = False
+    ) -> None:
+        """
+        Batch version of :meth:`create_or_update_country`.
+
+        :param countries: countries by coordinates
+        :param ttls: optional lifetime in seconds by coordinates, LIVE_CACHE_SECONDS by default
+        :param with_rates: currencies of the countries are current rates, see :meth:`index_country_currencies`
+
+        :return: None
+        """
+        ttls = ttls or {}
+        await Cache._set_many([
+            (
+                f'{PREFIX_COUNTRY}{coordinates.replace(" ", "_")}',
+                json.dumps(dict(country_data)),
+                ttls.get(coordinates, int(TTL)),
+            )
+            for coordinates, country_data in countries.items()
+        ])
+        await Cache.delete_country_cards([country_data.iso_code for country_data in countries.values()])
+        await Cache.index_country_currencies(countries, with_rates)
+
+    @staticmethod
+    async def index_country_currencies(countries: dict[str, CountrySchema], with_rates: bool = False) -> None:
+        """
+        Adds cached countries to the reverse index of their currencies, so the currency refresh
+        rewrites only countries whose rates changed. The index lives as long as countries
+        and may keep expired countries, they are removed by :meth:`forget_currency_countries`.
+        Countries cached with currency names are also added to the new countries,
+        which the next currency refresh fills with rates.
+
+        :param countries: countries by coordinates
+        :param with_rates: currencies of the countries are already current rates
 
         :return: None
         """
-        key = f'{PREFIX_COUNTRY}{country.name}'
-        await redis.set(key, json.dumps(country.dict()), TTL)
+        codes = {}
+        for coordinates, country_data in countries.items():
+            for code in country_data.currencies:
+                codes.setdefault(code, []).append(coordinates.replace(' ', '_'))
+        if not codes:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for code, coordinates_list in codes.items():
+                pipe.sadd(f'{PREFIX_CURRENCY_INDEX}{code}', *coordinates_list)
+                pipe.expire(f'{PREFIX_CURRENCY_INDEX}{code}', int(TTL))
+            if not with_rates:
+                pipe.sadd(NEW_CURRENCY_COUNTRIES_KEY, *(coordinates.replace(' ', '_') for coordinates in countries))
+                pipe.expire(NEW_CURRENCY_COUNTRIES_KEY, int(TTL))
+            await pipe.execute()
         await redis.close()
+
+    @staticmethod
+    async def get_new_currency_countries() -> list[str]:
+        """
+        Returns coordinates of countries cached since the last currency refresh.
+
+        :return: list of country coordinates
+        """
+        coordinates_list = await redis.smembers(NEW_CURRENCY_COUNTRIES_KEY)
+        await redis.close()
+        return sorted(coordinates_list)
+
+    @staticmethod
+    async def forget_new_currency_countries(coordinates_list: list[str]) -> None:
+        """
+        Removes countries processed by the currency refresh from the new countries.
+
+        :param coordinates_list: country coordinates
+
+        :return: None
+        """
+        if not coordinates_list:
+            return
+        await redis.srem(NEW_CURRENCY_COUNTRIES_KEY, *coordinates_list)
+        await redis.close()
+
+    @staticmethod
+    async def get_currency_countries(codes: list[str]) -> list[str]:
+        """
+        Returns coordinates of cached countries using any of the currencies.
+
+        :param codes: currency codes like ["USD", "EUR"]
+
+        :return: list of country coordinates
+        """
+        if not codes:
+            return []
+        coordinates_list = await redis.sunion(*(f'{PREFIX_CURRENCY_INDEX}{code}' for code in codes))
+        await redis.close()
+        return sorted(coordinates_list)
+
+    @staticmethod
+    async def forget_currency_countries(codes: list[str], coordinates_list: list[str]) -> None:
+        """
+        Removes expired countries from the reverse index of the currencies.
+
+        :param codes: currency codes
+        :param coordinates_list: coordinates of countries which are not cached any more
+
+        :return: None
+        """
+        if not codes or not coordinates_list:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for code in codes:
+                pipe.srem(f'{PREFIX_CURRENCY_INDEX}{code}', *coordinates_list)
+            await pipe.execute()
+        await redis.close()
+
+    @staticmethod
+    async def get_currency_rates() -> dict[str, float] | None:
+        """
+        Returns the last processed currency rates.
+
+        :return: rates by currency code or None if no rates were processed yet
+        """
+        rates = await redis.get(CURRENCY_RATES_KEY)
+        await redis.close()
+        return json.loads(rates) if rates else None
+
+    @staticmethod
+    async def set_currency_rates(rates: dict[str, float]) -> None:
+        """
+        Saves the processed currency rates, they are kept until the next change.
+
+        :param rates: rates by currency code
+
+        :return: None
+        """
+        await redis.set(CURRENCY_RATES_KEY, json.dumps(rates, sort_keys=True))
+        await redis.close()
+
+    @staticmethod
+    async def set_many_cities(cities: list[CitySchema], ttls: list[int] | None = None) -> None:
+        """
+        Batch version of :meth:`create_or_update_city`.
+
+        :param cities: list of cities
+        :param ttls: optional lifetime in seconds for every city, LIVE_CITY_CACHE_SECONDS by default
+
+        :return: None
+        :raises ValueError: if the number of ttls differs from the number of cities
+        """
+        ttls = ttls or [int(CITY_TTL)] * len(cities)
+        await Cache._set_many([
+            (f'{PREFIX_CITY}{city_data.longitude}_{city_data.latitude}', json.dumps(dict(city_data)), ttl)
+            for city_data, ttl in zip(cities, ttls, strict=True)
+        ])
+
+    @staticmethod
+    async def set_many_city_geocoders(
+        city_schemas: list[GeocoderSchema | list[GeocoderSchema]], ttls: list[int] | None = None
+    ) -> None:
+        """
+        Batch version of :meth:`set_city_geocoder`.
+
+        :param city_schemas: list of geocoder data
+        :param ttls: optional lifetime in seconds for every entry, LIVE_CITY_CACHE_SECONDS by default
+
+        :return: None
+        :raises ValueError: if the number of ttls differs from the number of entries
+        """
+        ttls = ttls or [int(CITY_TTL)] * len(city_schemas)
+        items = []
+        for city_schema, ttl in zip(city_schemas, ttls, strict=True):
+            city_name, data = Cache._dump_city_geocoder(city_schema)
+            items.append((f'{PREFIX_CITY}{normalize_query(city_name)}', json.dumps(data), ttl))
+        await Cache._set_many(items)
+
+    @staticmethod
+    async def _get(key: str) -> str | None:
+        """
+        Reads the key and marks it as recently used for the cache budget.
+
+        :param key: redis key
+
+        :return: raw cached value or None
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            CacheBudget.touch(pipe, [key])
+            data, *_ = await pipe.execute()
+        await redis.close()
+        return data
+
+    @staticmethod
+    async def _set(key: str, value: str, ttl: int | str) -> None:
+        """
+        Writes the key and accounts it in the cache budget, evicting entries over the prefix quota.
+
+        :param key: redis key
+        :param value: raw value
+        :param ttl: lifetime in seconds
+
+        :return: None
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, ttl)
+            CacheBudget.track(pipe, key, len(value))
+            _, *evicted = await pipe.execute()
+        CacheBudget.count_evicted([key], evicted)
+        await redis.close()
+
+    @staticmethod
+    async def _track(key: str, value: str) -> None:
+        """
+        Accounts already written key in the cache budget.
+
+        :param key: redis key
+        :param value: written raw value
+
+        :return: None
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            CacheBudget.track(pipe, key, len(value))
+            evicted = await pipe.execute()
+        CacheBudget.count_evicted([key], evicted)
+
+    @staticmethod
+    async def _get_with_refresh(key: str, on_expiring: OnExpiring) -> str | None:
+        """
+        Reads the key. If on_expiring is given, also reads the key ttl and
+        starts on_expiring in background when :meth:`_should_refresh_early` decides so.
+
+        :param key: redis key
+        :param on_expiring: optional coroutine function
+
+        :return: raw cached value or None
+        """
+        if on_expiring is None:
+            return await Cache._get(key)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(key).ttl(key)
+            CacheBudget.touch(pipe, [key])
+            data, ttl, *_ = await pipe.execute()
+        if data and Cache._should_refresh_early(ttl):
+            Cache._schedule_refresh(key, on_expiring)
+        await redis.close()
+        return data
+
+    @staticmethod
+    def _should_refresh_early(ttl: int) -> bool:
+        """
+        XFetch probabilistic early expiration: the closer the entry is to expiration,
+        the more likely the request refreshes it.
+
+        :param ttl: remaining lifetime of the entry in seconds, negative if the entry has no expiration
+
+        :return: True if the entry should be refreshed now
+        """
+        if ttl < 0:
+            return False
+        return -EARLY_REFRESH_DELTA_SECONDS * EARLY_REFRESH_BETA * math.log(1 - random.random()) >= ttl
+
+    @staticmethod
+    def _schedule_refresh(key: str, on_expiring: Callable[[], Awaitable[None]]) -> None:
+        """
+        Starts on_expiring in background, unless a refresh of the key is already running in this process.
+
+        :param key: redis key
+        :param on_expiring: coroutine function
+
+        :return: None
+        """
+        if key in Cache._refreshing:
+            return
+        Cache._refreshing.add(key)
+        task = asyncio.create_task(on_expiring())
+        Cache._background_tasks.add(task)
+
+        def _on_done(done_task: asyncio.Task) -> None:
+            Cache._refreshing.discard(key)
+            Cache._background_tasks.discard(done_task)
+            if not done_task.cancelled() and done_task.exception():
+                logger.warning('Background refresh of %s failed', key, exc_info=done_task.exception())
+
+        task.add_done_callback(_on_done)
+
+    @staticmethod
+    async def _get_many(keys: list[str]) -> list:
+        """
+        Reads keys with MGET in chunks of CACHE_BATCH_SIZE, yielding to the event loop between chunks.
+        Read keys are marked as recently used for the cache budget.
+
+        :param keys: list of redis keys
+
+        :return: list of decoded json values (None for missing keys) in the same order as keys
+        """
+        values = []
+        for start in range(0, len(keys), CACHE_BATCH_SIZE):
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.mget(keys[start:start + CACHE_BATCH_SIZE])
+                CacheBudget.touch(pipe, keys[start:start + CACHE_BATCH_SIZE])
+                chunk, *_ = await pipe.execute()
+            values.extend(json.loads(value) if value else None for value in chunk)
+            await asyncio.sleep(0)
+        await redis.close()
+        return values
+
+    @staticmethod
+    async def _set_many(items: list[tuple[str, str, int]]) -> None:
+        """
+        Writes keys with pipelined SET in chunks of CACHE_BATCH_SIZE, yielding to the event loop between chunks.
+        Written keys are accounted in the cache budget.
+
+        :param items: list of (key, value, ttl) tuples
+
+        :return: None
+        """
+        for start in range(0, len(items), CACHE_BATCH_SIZE):
+            chunk = items[start:start + CACHE_BATCH_SIZE]
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, value, ttl in chunk:
+                    pipe.set(key, value, ttl)
+                for key, value, _ in chunk:
+                    CacheBudget.track(pipe, key, len(value))
+                evicted = (await pipe.execute())[len(chunk):]
+            CacheBudget.count_evicted([key for key, _, _ in chunk], evicted)
+            await asyncio.sleep(0)
+        await redis.close()
+
+    @staticmethod
+    def _weather_key(point: Coordinates) -> str:
+        """
+        Returns weather cache key of the rounded coordinates.
+
+        :param point: (latitude, longitude)
+
+        :return: redis key
+        """
+        latitude, longitude = round_coordinates(*point)
+        return f'{PREFIX_WEATHER}{latitude}_{longitude}'
+
+    @staticmethod
+    def _parse_or_none(schema: type[Schema], data: dict | None) -> Schema | None:
+        """
+        Parses cached data into schema, returns None for missing or foreign data.
+
+        :param schema: pydantic schema
+        :param data: decoded json value
+
+        :return: schema object or None
+        """
+        if not isinstance(data, dict):
+            return None
+        try:
+            return schema.parse_obj(data)
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def _load_city_geocoder(city_data: dict | list) -> GeocoderSchema | list[GeocoderSchema]:
+        """
+        Converts decoded geocoder cache value into schema or list of schemas.
+
+        :param city_data: decoded json value
+
+        :return: GeocoderSchema or list of GeocoderSchema
+        """
+        if isinstance(city_data, list):
+            return [GeocoderSchema.parse_obj(city) for city in city_data]
+        return GeocoderSchema.parse_obj(city_data)
+
+    @staticmethod
+    def _dump_city_geocoder(city_schema: GeocoderSchema | list[GeocoderSchema]) -> tuple[str, dict | list]:
+        """
+        Converts geocoder schema or list of schemas into cache name and value.
+
+        :param city_schema: GeocoderSchema or list of GeocoderSchema
+
+        :return: city name and value to dump into json
+        """
+        if isinstance(city_schema, list):
+            return city_schema[0].name, [city.dict() for city in city_schema]
+        return city_schema.name, city_schema.dict()
@@ -1,13 +1,76 @@
 import os
 
-import aioredis
 from dotenv import load_dotenv
 
+from cache.client import LazyRedis
+
 load_dotenv()
 
 
 REDIS_URL = os.environ['REDIS_URL']
 LIVE_CACHE_SECONDS = os.environ['LIVE_CACHE_SECONDS']
-REDIS = aioredis.from_url(REDIS_URL, decode_responses=True)
+REDIS = LazyRedis(REDIS_URL, decode_responses=True)
 PREFIX_COUNTRY = 'country_'
 PREFIX_CITY = 'city_'
+PREFIX_WEATHER = 'weather_'
+PREFIX_CARD = 'card_'
+# Generation of country cards is increased on every write of the country, cards of older generations are stale
+PREFIX_CARD_GENERATION = 'generation:card_'
+PREFIX_LOCK = 'lock:'
+PREFIX_FENCE = 'fence:'
+PREFIX_BUDGET = 'budget:'
+POPULARITY_KEY = 'popular:weather'
+# Reverse index currency code -> cached country keys, countries cached with currency names
+# since the last currency refresh and the last processed CBR rates
+PREFIX_CURRENCY_INDEX = 'currency_countries:'
+NEW_CURRENCY_COUNTRIES_KEY = f'{PREFIX_CURRENCY_INDEX}new'
+CURRENCY_RATES_KEY = 'currency:rates'
+
+# Geocoder results are keyed by user input, so they may live shorter than countries
+LIVE_CITY_CACHE_SECONDS = os.getenv('LIVE_CITY_CACHE_SECONDS', LIVE_CACHE_SECONDS)
+LIVE_WEATHER_CACHE_SECONDS = int(os.getenv('LIVE_WEATHER_CACHE_SECONDS', 600))
+# Expired weather is kept this long to be shown while the weather API is unavailable
+STALE_WEATHER_CACHE_SECONDS = int(os.getenv('STALE_WEATHER_CACHE_SECONDS', 3 * 60 * 60))
+# Rendered country cards are dropped when the country is rewritten, so they may live as long as countries
+LIVE_CARD_CACHE_SECONDS = os.getenv('LIVE_CARD_CACHE_SECONDS', LIVE_CACHE_SECONDS)
+
+# Per-prefix quotas as (max keys, max approximate bytes), 0 means unlimited.
+# When a quota is exceeded, least recently used entries of the prefix are evicted.
+CACHE_QUOTAS = {
+    PREFIX_COUNTRY: (
+        int(os.getenv('COUNTRY_CACHE_MAX_KEYS', 10000)),
+        int(os.getenv('COUNTRY_CACHE_MAX_BYTES', 0)),
+    ),
+    PREFIX_CITY: (
+        int(os.getenv('CITY_CACHE_MAX_KEYS', 50000)),
+        int(os.getenv('CITY_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    ),
+    PREFIX_WEATHER: (
+        int(os.getenv('WEATHER_CACHE_MAX_KEYS', 10000)),
+        0,
+    ),
+    PREFIX_CARD: (
+        int(os.getenv('CARD_CACHE_MAX_KEYS', 1000)),
+        0,
+    ),
+}
+
+# Popularity of viewed places for weather prefetch: every prefetch run multiplies scores by DECAY
+# and drops places below MIN_SCORE, weather of TOP_N places is refreshed
+POPULARITY_DECAY = float(os.getenv('POPULARITY_DECAY', 0.9))
+POPULARITY_MIN_SCORE = float(os.getenv('POPULARITY_MIN_SCORE', 0.1))
+POPULAR_WEATHER_TOP_N = int(os.getenv('POPULAR_WEATHER_TOP_N', 50))
+
+# Max number of keys sent to Redis in one MGET or pipeline by batch operations
+CACHE_BATCH_SIZE = int(os.getenv('CACHE_BATCH_SIZE', 500))
+
+# Probabilistic early expiration (XFetch) for country entries:
+# an entry is refreshed in background when -DELTA * BETA * log(rand) >= remaining ttl
+EARLY_REFRESH_DELTA_SECONDS = float(os.getenv('EARLY_REFRESH_DELTA_SECONDS', 60))
+EARLY_REFRESH_BETA = float(os.getenv('EARLY_REFRESH_BETA', 1.0))
+
+# Distributed lock for expensive country rebuilds
+REBUILD_LOCK_TIMEOUT_MS = int(os.getenv('REBUILD_LOCK_TIMEOUT_MS', 10000))
+REBUILD_LOCK_WAIT_SECONDS = float(os.getenv('REBUILD_LOCK_WAIT_SECONDS', 5))
+REBUILD_LOCK_POLL_SECONDS = float(os.getenv('REBUILD_LOCK_POLL_SECONDS', 0.1))
+FENCE_TOKEN_TTL_SECONDS = 24 * 60 * 60
@@ -0,0 +1,42 @@
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import aioredis
+
+
+class LazyRedis:
+    """
+    Redis client created on first use, so importing settings neither imports aioredis
+    nor creates a connection pool. Attributes are delegated to the client.
+    """
+
+    def __init__(self, url: str, **kwargs: Any):
+        """
+        :param url: Redis url
+        :param kwargs: other arguments of :func:`aioredis.from_url`
+        """
+        self._url = url
+        self._kwargs = kwargs
+        self._client: 'aioredis.Redis | None' = None
+
+    @property
+    def client(self) -> 'aioredis.Redis':
+        """
+        Returns the client, creates it on the first call.
+
+        :return: Redis client
+        """
+        if self._client is None:
+            import aioredis
+
+            self._client = aioredis.from_url(self._url, **self._kwargs)
+        return self._client
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.client, name)
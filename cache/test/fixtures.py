@@ -4,6 +4,7 @@ import pytest_asyncio
 
 from cache.cache_settings import PREFIX_CITY, PREFIX_COUNTRY
 from cache.test.methods import clear_redis, create_test_data
+from services.query import normalize_query
 from services.repositories.api.api_schemas import CitySchema, CountrySchema
 
 COUNTRY_COORDINATES_KEY = '99.505405 61.698657'
@@ -13,7 +14,7 @@ LAT = 55.75
 CITY_COORDINATES_KEY = f'{LONG}_{LAT}'
 KEY_CITY = f'{PREFIX_CITY}{CITY_COORDINATES_KEY}'
 KEY_COUNTRY = f'{PREFIX_COUNTRY}{COUNTRY_COORDINATES_KEY.replace(" ", "_")}'
-KEY_COUNTRY_NAME = f'{PREFIX_COUNTRY}{COUNTRY_NAME}'
+KEY_COUNTRY_NAME = f'{PREFIX_COUNTRY}{normalize_query(COUNTRY_NAME)}'
 
 # async def ggggg():
 #    await clear_redis([KEY_CITY])
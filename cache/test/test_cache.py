@@ -1,8 +1,32 @@
+import asyncio
+import random
+
 import pytest
 from pytest_asyncio import fixture as async_fixture
 
+from cache import cache_module
+from cache.budget import CacheBudget
 from cache.cache_module import Cache
-from cache.test.fixtures import CITY_COORDINATES_KEY, COUNTRY_COORDINATES_KEY
+from cache.cache_settings import (
+    CACHE_QUOTAS,
+    POPULARITY_KEY,
+    PREFIX_CITY,
+    PREFIX_WEATHER,
+)
+from cache.cache_settings import REDIS as redis
+from cache.cache_settings import REDIS_URL
+from cache.client import LazyRedis
+from cache.test.fixtures import (
+    BAD_RESULT,
+    CITY_COORDINATES_KEY,
+    COUNTRY_COORDINATES_KEY,
+    GOOD_RECORD_KEY,
+    KEY_CITY,
+    ONE_BAD_VALUE_KEY,
+)
+from cache.test.methods import clear_redis, create_test_data
+from services.metrics import Metrics
+from services.repositories.api.api_schemas import WeatherSchema
 
 
 class TestCacheCity:
@@ -83,3 +107,272 @@ class TestCacheCountry:
         Test for getting an existing country entry in the cache.
         """
         assert await Cache.get_country(COUNTRY_COORDINATES_KEY) == country_data
+
+
+class TestCacheBatch:
+    """
+    Cache batch operations test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_get_many_countries(
+        self,
+        _create_cache_country: async_fixture,
+        country_data: async_fixture,
+    ) -> None:
+        """
+        Test for getting existing and missing country entries in one call, order is preserved.
+        """
+        result = await Cache.get_many_countries([GOOD_RECORD_KEY, COUNTRY_COORDINATES_KEY])
+        assert result == [None, country_data]
+
+    @pytest.mark.asyncio
+    async def test_set_many_countries(
+        self,
+        _clear_cache_country: async_fixture,
+        country_data: async_fixture,
+    ) -> None:
+        """
+        Test for creating country entries in one call.
+        """
+        await Cache.set_many_countries({COUNTRY_COORDINATES_KEY: country_data, GOOD_RECORD_KEY: country_data})
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY) == country_data
+        assert await Cache.get_country(GOOD_RECORD_KEY) == country_data
+
+    @pytest.mark.asyncio
+    async def test_set_many_cities(
+        self,
+        _clear_cache_city: async_fixture,
+        city_data: async_fixture,
+    ) -> None:
+        """
+        Test for creating city entries in one call, every city needs its own ttl.
+        """
+        with pytest.raises(ValueError):
+            await Cache.set_many_cities([city_data, city_data], [60])
+        assert await Cache.get_many_cities([CITY_COORDINATES_KEY]) == [None]
+
+        await Cache.set_many_cities([city_data])
+        assert await Cache.get_many_cities([CITY_COORDINATES_KEY]) == [city_data]
+
+    @pytest.mark.asyncio
+    async def test_set_many_weather(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Test for weather entries, close coordinates share one entry, expired entries are returned only as stale.
+        """
+        weather = WeatherSchema(
+            temperature=1.5, temperature_feels_like=-1.0, max_temperature=2.0, min_temperature=1.0,
+            weather_type='ясно', humidity=80, wind_speed=3.5,
+        )
+        await Cache.set_many_weather({(55.751, 37.618): weather})
+        assert await Cache.get_many_weather([(55.7512, 37.6184), (0.0, 0.0)]) == [weather, None]
+
+        monkeypatch.setattr(cache_module, 'WEATHER_TTL', -1)
+        assert await Cache.get_many_weather([(55.751, 37.618)]) == [None]
+        assert await Cache.get_many_weather([(55.751, 37.618)], allow_stale=True) == [weather]
+        await clear_redis([f'{PREFIX_WEATHER}55.75_37.62'])
+
+
+class TestCacheEarlyRefresh:
+    """
+    Cache probabilistic early refresh test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_get_country_starts_one_refresh(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        _clear_cache_country: async_fixture,
+        country_data: async_fixture,
+    ) -> None:
+        """
+        An entry close to expiration is returned and refreshed in background only once.
+        """
+        monkeypatch.setattr(random, 'random', lambda: 0.999999)
+        await Cache.set_many_countries({COUNTRY_COORDINATES_KEY: country_data}, {COUNTRY_COORDINATES_KEY: 5})
+        release = asyncio.Event()
+        refreshes = []
+
+        async def refresh() -> None:
+            refreshes.append(COUNTRY_COORDINATES_KEY)
+            await release.wait()
+
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY, on_expiring=refresh) == country_data
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY, on_expiring=refresh) == country_data
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*Cache._background_tasks)
+        assert refreshes == [COUNTRY_COORDINATES_KEY]
+
+    @pytest.mark.asyncio
+    async def test_get_country_fresh_entry_not_refreshed(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        _clear_cache_country: async_fixture,
+        country_data: async_fixture,
+    ) -> None:
+        """
+        An entry far from expiration is not refreshed.
+        """
+        monkeypatch.setattr(random, 'random', lambda: 0.0)
+        await Cache.set_many_countries({COUNTRY_COORDINATES_KEY: country_data}, {COUNTRY_COORDINATES_KEY: 5})
+        refreshes = []
+
+        async def refresh() -> None:
+            refreshes.append(COUNTRY_COORDINATES_KEY)
+
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY, on_expiring=refresh) == country_data
+        await asyncio.sleep(0)
+        assert refreshes == []
+
+
+class TestCacheCountryLock:
+    """
+    Cache country rebuild lock test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_lock_is_exclusive(self) -> None:
+        """
+        The lock can be taken again only after it is released, with a newer fencing token.
+        """
+        token = await Cache.acquire_country_lock(COUNTRY_COORDINATES_KEY)
+        assert token is not None
+        assert await Cache.acquire_country_lock(COUNTRY_COORDINATES_KEY) is None
+        await Cache.release_country_lock(COUNTRY_COORDINATES_KEY, token)
+        next_token = await Cache.acquire_country_lock(COUNTRY_COORDINATES_KEY)
+        await Cache.release_country_lock(COUNTRY_COORDINATES_KEY, next_token)
+        assert next_token > token
+
+    @pytest.mark.asyncio
+    async def test_fenced_write_with_stale_token(
+        self,
+        _clear_cache_country: async_fixture,
+        country_data: async_fixture,
+    ) -> None:
+        """
+        A cache write with a stale fencing token is rejected.
+        """
+        token = await Cache.acquire_country_lock(COUNTRY_COORDINATES_KEY)
+        await Cache.release_country_lock(COUNTRY_COORDINATES_KEY, token)
+        next_token = await Cache.acquire_country_lock(COUNTRY_COORDINATES_KEY)
+
+        assert await Cache.create_or_update_country(COUNTRY_COORDINATES_KEY, country_data, token) is False
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY) is None
+        assert await Cache.create_or_update_country(COUNTRY_COORDINATES_KEY, country_data, next_token) is True
+        assert await Cache.get_country(COUNTRY_COORDINATES_KEY) == country_data
+        await Cache.release_country_lock(COUNTRY_COORDINATES_KEY, next_token)
+
+
+class TestCacheBudget:
+    """
+    Cache per-prefix quota test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entry_is_evicted(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        _clear_cache_city: async_fixture,
+        city_data: async_fixture,
+    ) -> None:
+        """
+        Writing over the prefix quota evicts the least recently used entry and reports it.
+        """
+        monkeypatch.setitem(CACHE_QUOTAS, PREFIX_CITY, (1, 0))
+        Metrics.reset()
+        other_city = city_data.copy(update={'longitude': city_data.longitude + 1})
+        await Cache.create_or_update_city(city_data)
+        await Cache.set_many_cities([other_city])
+
+        assert await Cache.get_city(CITY_COORDINATES_KEY) is None
+        assert await Cache.get_city(f'{other_city.longitude}_{other_city.latitude}') == other_city
+        assert Metrics.snapshot()['counters'][f'cache.evicted.{PREFIX_CITY}'] >= 1
+        await clear_redis([f'{PREFIX_CITY}{other_city.longitude}_{other_city.latitude}'])
+        assert await CacheBudget.prune(PREFIX_CITY) == 1
+        report = await CacheBudget.report(PREFIX_CITY)
+        assert report['tracked_keys'] == 0
+        assert report['evicted'] >= 1
+
+
+class TestCachePopularity:
+    """
+    Cache popularity of viewed places test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_popular_places(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Places are ranked by views, decay forgets rarely viewed places.
+        """
+        await clear_redis([POPULARITY_KEY])
+        await Cache.record_view((55.751, 37.618))
+        await Cache.record_view((55.7512, 37.6184))
+        await Cache.record_view((59.94, 30.31))
+        assert await Cache.get_popular_places(10) == [(55.75, 37.62), (59.94, 30.31)]
+
+        monkeypatch.setattr(cache_module, 'POPULARITY_MIN_SCORE', 1)
+        await Cache.decay_popularity()
+        assert await Cache.get_popular_places(10) == [(55.75, 37.62)]
+        await clear_redis([POPULARITY_KEY])
+
+
+class TestCacheCountryCard:
+    """
+    Cache rendered country cards test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_card_is_dropped_on_country_write(self, country_data: async_fixture) -> None:
+        """
+        Card is stored by ISO code and dropped when the country is rewritten in single or batch mode.
+        """
+        await Cache.set_country_card(country_data.iso_code, 'card')
+        assert await Cache.get_country_card(country_data.iso_code) == 'card'
+
+        await Cache.create_or_update_country(COUNTRY_COORDINATES_KEY, country_data)
+        assert await Cache.get_country_card(country_data.iso_code) is None
+
+        await Cache.set_country_card(country_data.iso_code, 'card')
+        await Cache.set_many_countries({COUNTRY_COORDINATES_KEY: country_data})
+        assert await Cache.get_country_card(country_data.iso_code) is None
+
+
+class TestCachePlaceNames:
+    """
+    Cache place names for autocomplete test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_place_names(self, country_data: async_fixture, city_data: async_fixture) -> None:
+        """
+        Names of cached countries and cities are collected, broken entries are skipped.
+        """
+        await Cache.create_or_update_country(COUNTRY_COORDINATES_KEY, country_data)
+        await Cache.create_or_update_city(city_data)
+        await create_test_data(f'country_{GOOD_RECORD_KEY}', country_data)
+        await redis.set(f'country_{ONE_BAD_VALUE_KEY}', BAD_RESULT)
+
+        names = await Cache.get_place_names()
+
+        assert (country_data.name, 'country') in names
+        assert (city_data.name, 'city') in names
+        await clear_redis([KEY_CITY, f'country_{ONE_BAD_VALUE_KEY}'])
+
+
+class TestLazyRedis:
+    """
+    Lazy Redis client test.
+    All tests are atomic.
+    """
+    @pytest.mark.asyncio
+    async def test_client_is_created_on_first_use(self) -> None:
+        """
+        The client is created by the first command, not by the settings import.
+        """
+        client = LazyRedis(REDIS_URL, decode_responses=True)
+        assert not client.created
+
+        assert await client.ping()
+        assert client.created
+        await client.close()
@@ -1,3 +1,11 @@
-from django_layer.celery import app as celery_app
+def __getattr__(name):
+    """
+    Imports the Celery app on first use: the bot and management commands do not need Celery.
+    """
+    if name == 'celery_app':
+        from django_layer.celery import app
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 __all__ = ('celery_app',)
@@ -3,14 +3,29 @@ import os
 from celery import Celery
 from celery.schedules import crontab
 
+from tasks.tasks_settings import SCHEDULER_BACKEND
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_layer.settings')
 
 app = Celery('django_layer')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
-app.conf.beat_schedule = {
+# With the async scheduler the jobs are run by the bot process or `manage.py runscheduler`
+app.conf.beat_schedule = {} if SCHEDULER_BACKEND == 'async' else {
     'update_cache': {
         'task': 'tasks.tasks.run_update_cache',
         'schedule': crontab(minute='*/1')
     },
+    'prefetch_popular_weather': {
+        'task': 'tasks.tasks.run_prefetch_popular_weather',
+        'schedule': crontab(minute='*/5')
+    },
+    'prune_cache_budget': {
+        'task': 'tasks.tasks.run_prune_cache_budget',
+        'schedule': crontab(minute='0')
+    },
+    'refresh_country_mirror': {
+        'task': 'tasks.tasks.run_refresh_country_mirror',
+        'schedule': crontab(hour='3', minute='0')
+    },
 }
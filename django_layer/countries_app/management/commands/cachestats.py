@@ -0,0 +1,32 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from cache.budget import CacheBudget
+from cache.cache_settings import CACHE_QUOTAS
+
+
+class Command(BaseCommand):
+    help = 'Reports key count, memory, TTL distribution and evictions per cache prefix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=1000, help='max number of keys to measure per prefix')
+        parser.add_argument('--prune', action='store_true', help='drop expired keys from the budget index first')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.main(options['sample'], options['prune']))
+
+    async def main(self, sample: int, prune: bool) -> None:
+        for prefix in CACHE_QUOTAS:
+            if prune:
+                pruned = await CacheBudget.prune(prefix)
+                self.stdout.write(f'{prefix}: pruned {pruned} expired index entries')
+            stats = await CacheBudget.report(prefix, sample)
+            memory = 'n/a' if stats['memory_bytes'] is None else f'~{stats["memory_bytes"]} bytes'
+            self.stdout.write(
+                f'{prefix}: {stats["keys"]} keys, {memory} (sampled {stats["sampled_keys"]})\n'
+                f'  tracked: {stats["tracked_keys"]}/{stats["max_keys"] or "unlimited"} keys, '
+                f'{stats["tracked_bytes"]}/{stats["max_bytes"] or "unlimited"} bytes, '
+                f'{stats["evicted"]} evicted\n'
+                f'  ttl: ' + ', '.join(f'{label}: {count}' for label, count in stats['ttl_distribution'].items())
+            )
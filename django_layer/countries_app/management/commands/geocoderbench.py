@@ -0,0 +1,70 @@
+import asyncio
+import io
+import time
+import tracemalloc
+from typing import Awaitable, Callable
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.repositories.api import geocoder
+from services.repositories.api.geocoder import GeocoderAPIRepository
+
+
+class BytesResponse:
+    """
+    Saved response body with the reading interface of aiohttp response and its stream.
+    """
+
+    def __init__(self, body: bytes):
+        self._body = body
+        self._buffer = io.BytesIO(body)
+
+    async def read(self, n: int = -1) -> bytes:
+        if n == -1 and not self._buffer.tell():
+            return self._body
+        return self._buffer.read(n)
+
+
+class Command(BaseCommand):
+    help = 'Compares parse time and peak memory of full and streaming parse of a saved geocoder response'
+
+    def add_arguments(self, parser):
+        parser.add_argument('response_path', help='path to a saved geocoder JSON response')
+        parser.add_argument('--repeat', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if geocoder.ijson is None:
+            raise CommandError('streaming parse requires the `ijson` package')
+        with open(options['response_path'], 'rb') as response_file:
+            body = response_file.read()
+        asyncio.run(self.main(body, options['repeat']))
+
+    async def main(self, body: bytes, repeat: int) -> None:
+        repository = GeocoderAPIRepository()
+        self.stdout.write(f'response size: {len(body)} bytes, {repeat} runs')
+        for name, parse in (
+            ('full', lambda: repository._parse_response(BytesResponse(body))),
+            ('streaming', lambda: repository._parse_stream(BytesResponse(body))),
+        ):
+            seconds, peak = await self.measure(parse, repeat)
+            self.stdout.write(f'{name}: {seconds / repeat * 1000:.3f} ms per parse, peak memory {peak / 1024:.1f} KiB')
+
+    @staticmethod
+    async def measure(parse: Callable[[], Awaitable], repeat: int) -> tuple[float, int]:
+        """
+        Runs parse `repeat` times, measures total time and then peak memory of one run.
+
+        :param parse: coroutine function which parses the response
+        :param repeat: number of runs
+
+        :return: total seconds and peak traced memory in bytes
+        """
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await parse()
+        seconds = time.perf_counter() - started
+        tracemalloc.start()
+        await parse()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return seconds, peak
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from services.query import dedup_report
+
+
+class Command(BaseCommand):
+    help = 'Replays a query log (one city or country name per line) and reports geocoder requests saved by normalization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log_path', help='path to the query log')
+
+    def handle(self, *args, **options):
+        with open(options['log_path'], encoding='utf-8') as log:
+            report = dedup_report(line.rstrip('\n') for line in log if line.strip())
+        self.stdout.write(
+            f'queries: {report["total"]}\n'
+            f'geocoder requests with raw keys: {report["unique_raw"]}\n'
+            f'geocoder requests with normalized keys: {report["unique_normalized"]}\n'
+            f'removed requests: {report["removed_requests"]} ({report["removed_share"]:.1%})'
+        )
+        for key, variants in report['top_merged']:
+            self.stdout.write(f'  {key}: {variants} spellings')
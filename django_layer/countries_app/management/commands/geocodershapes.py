@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from aiohttp import ClientSession
+from django.core.management.base import BaseCommand
+
+from services.repositories.api.api_settings import GEOCODER_URL, YANDEX_API_KEY
+from services.repositories.api.geocoder import GeocoderAPIRepository
+
+
+class Command(BaseCommand):
+    help = 'Measures geocoder response size and latency per query shape on the given names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='+', help='city names to search')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--country', action='store_true', help='search names as countries')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.main(options['names'], options['repeat'], options['country']))
+
+    async def main(self, names: list[str], repeat: int, is_country: bool) -> None:
+        shapes = {
+            'unshaped': lambda name: {'geocode': name},
+            'configured': lambda name: GeocoderAPIRepository.build_params(name, is_country),
+            'results=1': lambda name: {'geocode': name, 'results': 1},
+            'lang=en_US': lambda name: {**GeocoderAPIRepository.build_params(name, is_country), 'lang': 'en_US'},
+        }
+        url = f'{GEOCODER_URL}{YANDEX_API_KEY}'
+        async with ClientSession() as session:
+            for shape, build in shapes.items():
+                sizes, latencies = [], []
+                for name in names:
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        async with session.get(url=url, params=build(name)) as resp:
+                            body = await resp.read()
+                        latencies.append(time.perf_counter() - started)
+                        sizes.append(len(body))
+                latencies.sort()
+                self.stdout.write(
+                    f'{shape}: avg {sum(sizes) / len(sizes):.0f} bytes, '
+                    f'median {latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms'
+                )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from services.importtime import STARTUP_IMPORTS, by_package, profile_imports
+
+
+class Command(BaseCommand):
+    help = 'Reports import time per module of an entry point measured in a new interpreter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', default='bot', choices=list(STARTUP_IMPORTS),
+                            help='bot (main.py, runbot), cluster (runcluster), beat (Celery) or django')
+        parser.add_argument('--top', type=int, default=20, help='number of the slowest modules to show')
+
+    def handle(self, *args, **options):
+        try:
+            records = profile_imports(options['target'])
+        except RuntimeError as e:
+            raise CommandError(f'Failed to import {options["target"]}: {e}')
+        top = options['top']
+        total = sum(record.cumulative_us for record in records if record.depth == 0)
+        self.stdout.write(f'{options["target"]}: {len(records)} modules imported in {total / 1000:.1f} ms')
+        self.stdout.write('Slowest modules with nested imports (cumulative, self):')
+        for record in sorted(records, key=lambda record: record.cumulative_us, reverse=True)[:top]:
+            self.stdout.write(
+                f'  {record.cumulative_us / 1000:8.1f} ms {record.self_us / 1000:8.1f} ms  {record.module}'
+            )
+        self.stdout.write('Own import time by package:')
+        for package, self_us in list(by_package(records).items())[:top]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {package}')
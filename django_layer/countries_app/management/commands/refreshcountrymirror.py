@@ -0,0 +1,16 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from services.repositories.api.api_settings import COUNTRY_MIRROR_PATH
+from tasks.jobs import refresh_country_mirror
+
+
+class Command(BaseCommand):
+    help = 'Downloads all countries from restcountries into the local country mirror'
+
+    def handle(self, *args, **options):
+        saved = asyncio.run(refresh_country_mirror())
+        if not saved:
+            raise CommandError('restcountries request failed, the mirror is not changed')
+        self.stdout.write(f'Saved {saved} countries to {COUNTRY_MIRROR_PATH}')
@@ -1,13 +1,44 @@
+import argparse
 import asyncio
+import time
 
+from aiogram import Bot, Dispatcher
 from django.core.management.base import BaseCommand
 
-from aiogram_layer.src.app import bot, dp
+from aiogram_layer.src.runtime import install_event_loop, startup_report, warm_up
+from aiogram_layer.src.settings import BOT_UVLOOP, BOT_WARM_UP
+from tasks.tasks_settings import SCHEDULER_BACKEND
 
 
 class Command(BaseCommand):
-    async def main(self):
-        return await dp.start_polling(bot)
+    help = 'Runs the bot with long polling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uvloop', action=argparse.BooleanOptionalAction, default=BOT_UVLOOP, help='use uvloop if installed')
+        parser.add_argument('--warm-up', action=argparse.BooleanOptionalAction, default=BOT_WARM_UP,
+                            help='open Telegram, Redis and database connections before polling')
+
+    async def main(self, bot: Bot, dp: Dispatcher, loop_name: str, phases: dict, started: float, warm: bool):
+        if warm:
+            warm_started = time.perf_counter()
+            phases.update(await warm_up(bot))
+            phases['warm_up'] = time.perf_counter() - warm_started
+        self.stdout.write(startup_report(loop_name, phases, time.perf_counter() - started))
+        if SCHEDULER_BACKEND != 'async':
+            return await dp.start_polling(bot)
+        from tasks.scheduler import AsyncScheduler, default_jobs
+
+        scheduler = AsyncScheduler(default_jobs())
+        scheduler.start()
+        try:
+            return await dp.start_polling(bot)
+        finally:
+            await scheduler.stop()
 
     def handle(self, *args, **options):
-        asyncio.run(self.main())
+        started = time.perf_counter()
+        loop_name = install_event_loop(options['uvloop'])
+        # Handlers are imported here to be counted in the startup report
+        from aiogram_layer.src.app import bot, dp
+        phases = {'imports': time.perf_counter() - started}
+        asyncio.run(self.main(bot, dp, loop_name, phases, started, options['warm_up']))
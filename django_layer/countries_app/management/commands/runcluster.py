@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from aiogram_layer.src.settings import (
+    BOT_PARTITIONS,
+    BOT_WORKERS,
+    OUTBOUND_GLOBAL_RATE,
+    WORKER_SHUTDOWN_TIMEOUT_SECONDS,
+)
+from tasks.tasks_settings import SCHEDULER_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks that worker processes are alive
+SUPERVISE_INTERVAL_SECONDS = 1
+
+
+def run_worker(index: int, workers: int) -> None:
+    """
+    Entry point of a worker process, stops after the current batch on SIGTERM or SIGINT.
+
+    :param index: worker number from 0
+    :param workers: number of workers
+
+    :return: None
+    """
+    django.setup()
+    from aiogram_layer.src.app import bot, dp
+    from aiogram_layer.src.cluster import UpdateWorker
+
+    async def main():
+        worker = UpdateWorker(bot, dp, index, workers)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, worker.stop)
+        await worker.run()
+
+    asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = 'Runs the bot as one polling process and worker processes sharing updates through Redis streams'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=BOT_WORKERS, help='number of worker processes')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if not 0 < workers <= BOT_PARTITIONS:
+            raise CommandError(f'Number of workers must be from 1 to BOT_PARTITIONS ({BOT_PARTITIONS})')
+        # Workers share dialogues through Redis and the Telegram limit for the bot
+        os.environ['FSM_STORAGE'] = 'redis'
+        os.environ['OUTBOUND_GLOBAL_RATE'] = str(OUTBOUND_GLOBAL_RATE / workers)
+        asyncio.run(self.main(workers))
+
+    async def main(self, workers: int) -> None:
+        from aiogram_layer.src.app import bot, dp
+        from aiogram_layer.src.cluster import UpdateIngress
+
+        context = multiprocessing.get_context('spawn')
+        processes = {}
+
+        def start(index: int) -> None:
+            processes[index] = context.Process(target=run_worker, args=(index, workers), name=f'worker-{index}')
+            processes[index].start()
+
+        for index in range(workers):
+            start(index)
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+        ingress = asyncio.create_task(UpdateIngress(bot, dp).run())
+        # Periodic jobs run once per cluster, next to the ingress
+        scheduler = None
+        if SCHEDULER_BACKEND == 'async':
+            from tasks.scheduler import AsyncScheduler, default_jobs
+
+            scheduler = AsyncScheduler(default_jobs())
+            scheduler.start()
+        self.stdout.write(f'Started ingress and {workers} workers')
+        try:
+            while not stopping.is_set() and not ingress.done():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stopping.wait(), SUPERVISE_INTERVAL_SECONDS)
+                for index, process in processes.items():
+                    if not stopping.is_set() and not process.is_alive():
+                        logger.error('Worker %d exited with code %s, restarting', index, process.exitcode)
+                        start(index)
+        finally:
+            if scheduler:
+                await scheduler.stop()
+            ingress.cancel()
+            try:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await ingress
+            finally:
+                await bot.session.close()
+                await asyncio.to_thread(self.stop_workers, list(processes.values()))
+
+    @staticmethod
+    def stop_workers(processes: list[multiprocessing.Process]) -> None:
+        """
+        Lets workers finish their batches, kills those not stopped in WORKER_SHUTDOWN_TIMEOUT_SECONDS.
+        Updates of a killed worker stay unacknowledged and are handled after restart.
+
+        :param processes: worker processes
+
+        :return: None
+        """
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + WORKER_SHUTDOWN_TIMEOUT_SECONDS
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.error('Worker %s did not stop in time, killing', process.name)
+                process.kill()
+                process.join()
@@ -0,0 +1,26 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tasks.scheduler import AsyncScheduler, default_jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs periodic jobs with the async scheduler instead of Celery beat and worker'
+
+    async def main(self) -> None:
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopping.set)
+        scheduler = AsyncScheduler(default_jobs())
+        scheduler.start()
+        self.stdout.write('Started jobs: ' + ', '.join(job.name for job in scheduler.jobs))
+        try:
+            await stopping.wait()
+        finally:
+            await scheduler.stop()
+
+    def handle(self, *args, **options):
+        asyncio.run(self.main())
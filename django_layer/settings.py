@@ -42,9 +42,11 @@ ALLOWED_HOSTS = [
 
 # Application definition
 
+# The bot process (main.py) does not serve the admin site and skips loading it
+DJANGO_ADMIN_ENABLED = os.getenv('DJANGO_ADMIN_ENABLED', 'True') == 'True'
+
 INSTALLED_APPS = [
-    'jazzmin',
-    'django.contrib.admin',
+    *(['jazzmin', 'django.contrib.admin'] if DJANGO_ADMIN_ENABLED else []),
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -4,6 +4,7 @@ import os
 def main():
     """Run telegram bot."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_layer.settings')
+    os.environ.setdefault('DJANGO_ADMIN_ENABLED', 'False')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -1,10 +1,14 @@
+import logging
+
 from cache.cache_module import Cache
 from services.abstract_uow import AbstractUnitOfWork
 from services.repositories.api.api_schemas import GeocoderSchema, WeatherSchema
 from services.repositories.api.geocoder import GeocoderAPIRepository
-from services.repositories.api.weather import WeatherAPIRepository
+from services.repositories.api.weather import Coordinates, WeatherAPIRepository
 from services.repositories.db.cities import CityBDRepository
 
+logger = logging.getLogger(__name__)
+
 
 class CityService(AbstractUnitOfWork):
     """
@@ -29,7 +33,7 @@ class CityService(AbstractUnitOfWork):
             return city_cache
         city_info = await self.geocoder.get_city(name)
         if city_info:
-            await self.cache.set_city_geocoder(city_schema=city_info)
+            await self.cache.set_city_geocoder(city_schema=city_info, query=name)
             return city_info
 
         return None
@@ -42,5 +46,50 @@ class CityService(AbstractUnitOfWork):
         :param longitude: city longitude
         :return: pydantic schema with weather data
         """
-        weather = await self.weather_repo.get_weather(latitude, longitude)
-        return weather
+        return (await self.get_cities_weather([(latitude, longitude)]))[0]
+
+    async def get_cities_weather(self, coordinates: list[Coordinates]) -> list[WeatherSchema | None]:
+        """
+        Get current weather for many places: from cache, missing ones with one bulk request,
+        which results are written to cache. Places the weather API failed for get stale cached weather.
+
+        :param coordinates: list of (latitude, longitude) pairs
+        :return: weather or None for every pair, in the same order as coordinates
+        """
+        result = await self.cache.get_many_weather(coordinates)
+        missing = [point for point, weather in zip(coordinates, result) if weather is None]
+        if not missing:
+            return result
+        fetched = await self.refresh_cities_weather(missing)
+        result = [weather or fetched.get(point) for point, weather in zip(coordinates, result)]
+        failed = [point for point, weather in zip(coordinates, result) if weather is None]
+        if failed:
+            stale = dict(zip(failed, await self.cache.get_many_weather(failed, allow_stale=True)))
+            result = [weather or stale.get(point) for point, weather in zip(coordinates, result)]
+        return result
+
+    async def refresh_cities_weather(self, coordinates: list[Coordinates]) -> dict[Coordinates, WeatherSchema]:
+        """
+        Requests current weather for many places with one bulk request and writes it to cache.
+
+        :param coordinates: list of (latitude, longitude) pairs
+        :return: received weather by coordinates
+        """
+        fetched = {}
+        for point, weather in zip(coordinates, await self.weather_repo.get_weather_many(coordinates)):
+            if isinstance(weather, BaseException):
+                logger.warning('Weather request for %s failed', point, exc_info=weather)
+            elif weather:
+                fetched[point] = weather
+        await self.cache.set_many_weather(fetched)
+        return fetched
+
+    async def record_view(self, latitude: float, longitude: float) -> None:
+        """
+        Counts a view of the place for popular weather prefetch.
+
+        :param latitude: place latitude
+        :param longitude: place longitude
+        :return: None
+        """
+        await self.cache.record_view((latitude, longitude))
@@ -0,0 +1,2 @@
+# Invalid chars for city or country name
+INVALID_CHARS = set('!"#$%&()*+,./:;<=>?@[\\]^_`{|}~;№|')
@@ -4,8 +4,10 @@ from dataclasses import dataclass
 from pydantic.error_wrappers import ValidationError
 
 from cache.cache_module import Cache
+from cache.cache_settings import REBUILD_LOCK_POLL_SECONDS, REBUILD_LOCK_WAIT_SECONDS
 from django_layer.countries_app.models import Country
 from services.abstract_uow import AbstractUnitOfWork
+from services.metrics import Metrics
 from services.repositories.api.api_schemas import (
     CountrySchema,
     CurrencySchema,
@@ -15,6 +17,7 @@ from services.repositories.api.api_schemas import (
 from services.repositories.api.country_detail import CountryAPIRepository
 from services.repositories.api.currency import CurrencyAPIRepository
 from services.repositories.api.geocoder import GeocoderAPIRepository
+from services.repositories.api.resilience import UpstreamUnavailable
 from services.repositories.api.weather import WeatherAPIRepository
 from services.repositories.db.countries import CountryDBRepository
 from services.repositories.db.schemas import CurrencyCodesSchema, LanguageNamesSchema
@@ -41,12 +44,13 @@ class CountryService(AbstractUnitOfWork):
 
         :return: information about country as :class:`GeocoderSchema` object
         """
-        country_cache = await self.cache.get_country_by_name(country_name)
+        country_cache = await self.cache.get_country_by_name(
+            country_name, on_expiring=lambda: self.refresh_country_info(country_name))
         if country_cache:
             return country_cache
         country_info = await self.geocoder.get_country(country_name)
         if country_info:
-            await self.cache.set_country_geocoder(country_info)
+            await self.cache.set_country_geocoder(country_info, country_name)
         return country_info
 
     async def get_country_all_info(self, country_info: GeocoderSchema) -> CountryUOWSchema | None:
@@ -76,14 +80,13 @@ class CountryService(AbstractUnitOfWork):
 
         :return: detailed information about country as :class:`CountrySchema` object or Country object
         """
-        cache_country = await self.cache.get_country(country_info.coordinates)
+        cache_country = await self.cache.get_country(
+            country_info.coordinates, on_expiring=lambda: self.refresh_country(country_info))
         if cache_country:
             return cache_country
         db_country = await self.crud.get_by_pk(country_info.country_code)
         if not db_country:
-            country = await self.countries_repo.get_country_detail(country_info.country_code)
-            if country:
-                db_country = await self._create_db_and_cache_country(country, country_info.coordinates)
+            db_country = await self._rebuild_country(country_info)
         return db_country
 
     async def get_languages(self, country_info: GeocoderSchema) -> LanguageNamesSchema | None:
@@ -94,14 +97,14 @@ class CountryService(AbstractUnitOfWork):
 
         :return: country languages as :class:`LanguageNamesSchema` object
         """
-        cache_country = await self.cache.get_country(country_info.coordinates)
+        cache_country = await self.cache.get_country(
+            country_info.coordinates, on_expiring=lambda: self.refresh_country(country_info))
         if cache_country:
             return LanguageNamesSchema(languages=cache_country.languages)
         languages = await self.crud.get_country_languages(country_info.country_code)
         if not languages:
-            country = await self.countries_repo.get_country_detail(country_info.country_code)
-            if country:
-                db_country = await self._create_db_and_cache_country(country, country_info.coordinates)
+            db_country = await self._rebuild_country(country_info)
+            if db_country:
                 languages = await self.crud.get_country_languages(db_country.iso_code)
         return languages
 
@@ -113,14 +116,14 @@ class CountryService(AbstractUnitOfWork):
 
         :return: country currencies as :class:`CurrencyCodesSchema` object
         """
-        cache_country = await self.cache.get_country(country_info.coordinates)
+        cache_country = await self.cache.get_country(
+            country_info.coordinates, on_expiring=lambda: self.refresh_country(country_info))
         if cache_country:
             return CurrencyCodesSchema(currency_codes=[currency for currency in cache_country.currencies.keys()])
         currencies = await self.crud.get_country_currencies(country_info.country_code)
         if not currencies:
-            country = await self.countries_repo.get_country_detail(country_info.country_code)
-            if country:
-                db_country = await self._create_db_and_cache_country(country, country_info.coordinates)
+            db_country = await self._rebuild_country(country_info)
+            if db_country:
                 currencies = await self.crud.get_country_currencies(db_country.iso_code)
         return currencies
 
@@ -132,7 +135,8 @@ class CountryService(AbstractUnitOfWork):
 
         :return: country capital as :class:`CityCoordinatesSchema` object
         """
-        cache_country = await self.cache.get_country(country_info.coordinates)
+        cache_country = await self.cache.get_country(
+            country_info.coordinates, on_expiring=lambda: self.refresh_country(country_info))
         if cache_country:
             return CityCoordinatesSchema(
                 name=cache_country.capital,
@@ -151,12 +155,28 @@ class CountryService(AbstractUnitOfWork):
     async def get_currency_rates(self, currencies: CurrencyCodesSchema) -> list[CurrencySchema] | None:
         """
         Returns information about rates of currencies used in the country.
+        If the currency API is unavailable, the last rates processed by the refresh job are returned.
 
         :param currencies: country currencies as :class:`CurrencyCodesSchema` object
 
         :return: list of :class:`CurrencySchema` object or None
+        :raises UpstreamUnavailable: if the currency API is unavailable and there are no saved rates
         """
-        return await self.currency_repo.get_rate(currencies.currency_codes)
+        try:
+            return await self.currency_repo.get_rate(currencies.currency_codes)
+        except UpstreamUnavailable:
+            rates = await self.cache.get_currency_rates() or {}
+            saved = [
+                CurrencySchema.parse_obj({
+                    'ID': code, 'NumCode': '', 'CharCode': code, 'Nominal': 1,
+                    'Name': code, 'Value': rates[code], 'Previous': rates[code],
+                })
+                for code in currencies.currency_codes if code in rates
+            ]
+            if not saved:
+                raise
+            Metrics.incr('currency_rates.saved')
+            return saved
 
     async def get_capital_weather(self, country_info: GeocoderSchema) -> WeatherSchema | None:
         """
@@ -167,20 +187,121 @@ class CountryService(AbstractUnitOfWork):
         :return: capital weather as :class:`WeatherSchema` object or None
         """
         city = await self.get_capital_info(country_info)
-        if city:
-            return await self.weather_repo.get_weather(city.latitude, city.longitude)
+        if not city:
+            return None
+        point = (city.latitude, city.longitude)
+        weather = (await self.cache.get_many_weather([point]))[0]
+        if weather is None:
+            weather = await self.weather_repo.get_weather(*point)
+            if weather:
+                await self.cache.set_many_weather({point: weather})
+            else:
+                weather = (await self.cache.get_many_weather([point], allow_stale=True))[0]
+        return weather
+
+    async def refresh_country_info(self, country_name: str) -> None:
+        """
+        Re-fetches basic information about country from :class:`GeocoderAPIRepository` and rewrites the cache entry.
+
+        :param country_name: country name
+
+        :return: None
+        """
+        country_info = await self.geocoder.get_country(country_name)
+        if country_info:
+            await self.cache.set_country_geocoder(country_info, country_name)
+
+    async def refresh_country(self, country_info: GeocoderSchema) -> None:
+        """
+        Re-fetches country details from :class:`CountryAPIRepository`, updates database record and cache entry.
+
+        :param country_info: information about country as :class:`GeocoderSchema` object
+
+        :return: None
+        """
+        token = await self.cache.acquire_country_lock(country_info.coordinates)
+        if token is None:
+            # another worker is rebuilding the entry, the stale one is served meanwhile
+            Metrics.incr('country_rebuild.lock_contended')
+            return
+        try:
+            country = await self.countries_repo.get_country_detail(country_info.country_code)
+            if country:
+                db_country = await self.crud.update(country)
+                updated_country = await self.crud.update_country_schema(country, db_country)
+                await self._cache_country(country_info.coordinates, updated_country, token)
+        finally:
+            await self.cache.release_country_lock(country_info.coordinates, token)
+
+    async def _rebuild_country(self, country_info: GeocoderSchema) -> Country | None:
+        """
+        Creates country record in database and cache from :class:`CountryAPIRepository`.
+        Only one worker rebuilds the country at a time, the others wait for its result.
+
+        :param country_info: information about country as :class:`GeocoderSchema` object
+
+        :return: Country object or None
+        """
+        token = await self.cache.acquire_country_lock(country_info.coordinates)
+        if token is None:
+            Metrics.incr('country_rebuild.lock_contended')
+            return await self._wait_for_rebuild(country_info)
+        try:
+            # the country could be created by the previous lock holder
+            db_country = await self.crud.get_by_pk(country_info.country_code)
+            if db_country:
+                return db_country
+            country = await self.countries_repo.get_country_detail(country_info.country_code)
+            if country:
+                return await self._create_db_and_cache_country(country, country_info.coordinates, token)
+            return None
+        finally:
+            await self.cache.release_country_lock(country_info.coordinates, token)
+
+    async def _wait_for_rebuild(self, country_info: GeocoderSchema) -> Country | None:
+        """
+        Waits up to REBUILD_LOCK_WAIT_SECONDS for the country record created by another worker.
+
+        :param country_info: information about country as :class:`GeocoderSchema` object
+
+        :return: Country object or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + REBUILD_LOCK_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(REBUILD_LOCK_POLL_SECONDS)
+            db_country = await self.crud.get_by_pk(country_info.country_code)
+            if db_country:
+                return db_country
+        Metrics.incr('country_rebuild.wait_timeout')
         return None
 
-    async def _create_db_and_cache_country(self, country: CountrySchema, coordinates: str) -> Country:
+    async def _create_db_and_cache_country(
+        self, country: CountrySchema, coordinates: str, fencing_token: int | None = None
+    ) -> Country:
         """
         Create new country record in database and cache.
 
         :param country: information about country as :class:`GeocoderSchema` object
         :param coordinates: coordinates of a country
+        :param fencing_token: token of the rebuild lock
 
         :return: Country object
         """
         db_country = await self.crud.create(country)
         updated_country = await self.crud.update_country_schema(country, db_country)
-        await self.cache.create_or_update_country(coordinates, updated_country)
+        await self._cache_country(coordinates, updated_country, fencing_token)
         return db_country
+
+    async def _cache_country(self, coordinates: str, country: CountrySchema, fencing_token: int | None) -> None:
+        """
+        Writes country into cache, counting writes rejected because the lock has passed to another worker.
+
+        :param coordinates: coordinates of a country
+        :param country: country as :class:`CountrySchema` object
+        :param fencing_token: token of the rebuild lock
+
+        :return: None
+        """
+        if not await self.cache.create_or_update_country(coordinates, country, fencing_token):
+            Metrics.incr('country_rebuild.fenced_out')
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+# Imports done by each entry point before it handles the first request
+STARTUP_IMPORTS = {
+    'django': 'import django; django.setup()',
+    'bot': 'import django; django.setup(); import aiogram_layer.src.app, aiogram_layer.src.runtime',
+    'cluster': 'import django; django.setup(); import aiogram_layer.src.app, aiogram_layer.src.cluster',
+    'beat': 'import django; django.setup(); from django_layer import celery_app; '
+            'celery_app.loader.import_default_modules()',
+}
+# Environment of the entry point, main.py does not load the admin site
+STARTUP_ENV = {
+    'bot': {'DJANGO_ADMIN_ENABLED': 'False'},
+    'cluster': {'DJANGO_ADMIN_ENABLED': 'False'},
+}
+
+
+@dataclass
+class ImportRecord:
+    """
+    Import of one module as reported by `python -X importtime`.
+    """
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """
+    Parses `-X importtime` output.
+
+    :param output: stderr of the interpreter
+
+    :return: imports in the reported order (nested imports before the importing module)
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        name = module.lstrip(' ')
+        records.append(ImportRecord(
+            module=name,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(module) - len(name) - 1) // 2,
+        ))
+    return records
+
+
+def profile_imports(target: str) -> list[ImportRecord]:
+    """
+    Imports modules of the entry point in a new interpreter with `-X importtime`.
+
+    :param target: key of STARTUP_IMPORTS
+
+    :return: imports of the entry point
+    :raises RuntimeError: if the imports fail
+    """
+    env = {**os.environ, **STARTUP_ENV.get(target, {})}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'django_layer.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_IMPORTS[target]],
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.splitlines()[-1] if result.stderr else 'imports failed')
+    return parse_importtime(result.stderr)
+
+
+def by_package(records: list[ImportRecord]) -> dict[str, int]:
+    """
+    Sums own import time of modules by top level package.
+
+    :param records: imports
+
+    :return: microseconds by package, the slowest first
+    """
+    packages = defaultdict(int)
+    for record in records:
+        packages[record.module.split('.')[0]] += record.self_us
+    return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
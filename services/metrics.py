@@ -0,0 +1,74 @@
+from collections import Counter
+
+
+class Metrics:
+    """
+    In-process counters and timings. Used by cache, services and bot layers to count
+    notable events (lock contention, retries, throttled calls) and measure durations.
+    """
+    _counters: Counter = Counter()
+    _timings: dict[str, dict[str, float]] = {}
+    _gauges: dict[str, float] = {}
+
+    @staticmethod
+    def incr(name: str, value: int = 1) -> None:
+        """
+        Increments counter.
+
+        :param name: counter name, dot-separated (example: "country_rebuild.lock_contended")
+        :param value: increment
+
+        :return: None
+        """
+        Metrics._counters[name] += value
+
+    @staticmethod
+    def observe(name: str, seconds: float) -> None:
+        """
+        Records one duration measurement.
+
+        :param name: timing name, dot-separated
+        :param seconds: measured duration
+
+        :return: None
+        """
+        timing = Metrics._timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+    @staticmethod
+    def gauge(name: str, value: float) -> None:
+        """
+        Sets current value of a gauge (example: queue depth).
+
+        :param name: gauge name, dot-separated
+        :param value: current value
+
+        :return: None
+        """
+        Metrics._gauges[name] = value
+
+    @staticmethod
+    def snapshot() -> dict[str, dict]:
+        """
+        Returns current values of all counters, timings and gauges.
+
+        :return: dict with "counters", "timings" and "gauges" keys
+        """
+        return {
+            'counters': dict(Metrics._counters),
+            'timings': {name: dict(timing) for name, timing in Metrics._timings.items()},
+            'gauges': dict(Metrics._gauges),
+        }
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Drops all collected values.
+
+        :return: None
+        """
+        Metrics._counters.clear()
+        Metrics._timings.clear()
+        Metrics._gauges.clear()
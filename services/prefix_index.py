@@ -0,0 +1,46 @@
+from bisect import bisect_left
+from typing import Iterable
+
+from services.query import normalize_query
+
+# Sorts after every character of a normalized name, bounds the range of keys with a prefix
+MAX_CHAR = '\U0010ffff'
+
+
+class PrefixIndex:
+    """
+    Immutable index of names for autocomplete: normalized names in a sorted array,
+    names with a prefix are a contiguous range found with two binary searches.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, str]] = ()):
+        """
+        :param entries: pairs of name and kind (example: ("Москва", "city")),
+            of names with equal normalized form and kind the first one is indexed
+        """
+        unique = {}
+        for name, kind in entries:
+            if name:
+                unique.setdefault((normalize_query(name), kind), name)
+        items = sorted((key, kind, name) for (key, kind), name in unique.items())
+        self._keys = [key for key, _, _ in items]
+        self._items = [(name, kind) for _, kind, name in items]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, str]]:
+        """
+        Returns names starting with the prefix in alphabetical order.
+
+        :param prefix: user input, normalized the same way as names
+        :param limit: max number of names
+
+        :return: list of pairs of name and kind
+        """
+        key = normalize_query(prefix)
+        if not key:
+            return []
+        start = bisect_left(self._keys, key)
+        end = bisect_left(self._keys, key + MAX_CHAR, lo=start, hi=min(len(self._keys), start + limit))
+        return self._items[start:end]
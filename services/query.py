@@ -0,0 +1,70 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterable
+
+from services.constants import INVALID_CHARS
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def _is_edge_punctuation(char: str) -> bool:
+    """
+    Checks if the char is punctuation which may be trimmed from the edges of a query.
+
+    :param char: single char
+
+    :return: True for unicode punctuation and chars from INVALID_CHARS
+    """
+    return char in INVALID_CHARS or unicodedata.category(char).startswith('P')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes user's city or country name into a cache key part, so that
+    "Москва", "москва" and " Москва. " are the same geocoder query.
+    Applies NFKC, casefold, ё→е, whitespace collapse and trims punctuation from the edges.
+    Punctuation inside the name (e.g. "Ростов-на-Дону") is kept.
+
+    :param query: city or country name
+
+    :return: normalized query
+    """
+    query = unicodedata.normalize('NFKC', query).casefold().replace('ё', 'е')
+    query = WHITESPACE.sub(' ', query).strip()
+    start, end = 0, len(query)
+    while start < end and (_is_edge_punctuation(query[start]) or query[start].isspace()):
+        start += 1
+    while end > start and (_is_edge_punctuation(query[end - 1]) or query[end - 1].isspace()):
+        end -= 1
+    return query[start:end]
+
+
+def dedup_report(queries: Iterable[str]) -> dict:
+    """
+    Counts how many geocoder requests a replayed query log needs with raw and with normalized cache keys.
+
+    :param queries: user's queries in order of arrival
+
+    :return: dict with total queries, unique raw and normalized keys,
+        removed requests and the most merged normalized keys
+    """
+    raw, normalized = Counter(), Counter()
+    variants: dict[str, set[str]] = {}
+    for query in queries:
+        key = normalize_query(query)
+        raw[query] += 1
+        normalized[key] += 1
+        variants.setdefault(key, set()).add(query)
+    total = sum(raw.values())
+    removed = len(raw) - len(normalized)
+    return {
+        'total': total,
+        'unique_raw': len(raw),
+        'unique_normalized': len(normalized),
+        'removed_requests': removed,
+        'removed_share': removed / len(raw) if raw else 0.0,
+        'top_merged': sorted(
+            ((key, len(keys)) for key, keys in variants.items() if len(keys) > 1), key=lambda item: -item[1],
+        )[:10],
+    }
@@ -1,12 +1,32 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from http import HTTPStatus
+from typing import Awaitable, Callable, TypeVar
 
-from aiohttp import ClientResponse
+from aiohttp import ClientError, ClientResponse
+
+from services.metrics import Metrics
+from services.repositories.api.api_settings import RATE_LIMIT_MAX_WAIT_SECONDS
+from services.repositories.api.resilience import (
+    Upstream,
+    UpstreamThrottled,
+    UpstreamUnavailable,
+)
+from services.repositories.api.retry import RetryPolicy
+
+T = TypeVar('T')
+# Errors of a request which may succeed if it is sent again
+TRANSIENT_ERRORS = (ClientError, asyncio.TimeoutError)
 
 
 class AbstractAPIRepository(ABC):
     """
     Abstract class for all API repositories
     """
+    # name of the external API, repositories of the same API share circuit breaker and timeout
+    upstream: str = 'default'
+    retry_policy: RetryPolicy = RetryPolicy()
 
     @abstractmethod
     async def _send_request(self, url: str, params=None, body=None) -> ClientResponse:
@@ -21,3 +41,136 @@ class AbstractAPIRepository(ABC):
         Abstract function for parsing response
         """
         pass
+
+    async def _get(self, url: str, params=None, **kwargs) -> ClientResponse:
+        """
+        Sends GET request with :meth:`_send_request`, see :meth:`_retried`.
+
+        :param url: API url address
+        :param params: optional request's query params
+        :param kwargs: other arguments of :meth:`_send_request`
+
+        :return: response from API, the last one if retries are exhausted
+        :raises UpstreamUnavailable: if the circuit is open or the last attempt failed
+        """
+        return await self._retried(lambda: self._send_request(url=url, params=params, **kwargs))
+
+    async def _retried(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs request under the upstream circuit breaker and adaptive timeout.
+        Connection errors, timeouts, 429 and 5xx responses are retried by :attr:`retry_policy`
+        while the request deadline allows. Retry-After of the response overrides the backoff pause.
+        The circuit breaker counts one failure for all attempts of the request.
+
+        :param request: coroutine function which sends the request
+
+        :return: result of request, the last response if retries are exhausted
+        :raises UpstreamUnavailable: if the circuit is open or the last attempt failed
+        """
+        policy = self.retry_policy
+        breaker = Upstream.get(self.upstream).breaker
+        deadline = policy.deadline()
+        attempt = 1
+        while True:
+            try:
+                result = await self._guard(request, deadline=deadline, count_failure=False)
+            except UpstreamThrottled:
+                raise
+            except UpstreamUnavailable as error:
+                if not isinstance(error.__cause__, TRANSIENT_ERRORS):
+                    raise
+                if attempt >= policy.max_attempts:
+                    breaker.record_failure()
+                    raise
+                pause = policy.backoff(attempt)
+                if time.monotonic() + pause >= deadline:
+                    Metrics.incr(f'upstream.{self.upstream}.retry_gave_up')
+                    breaker.record_failure()
+                    raise
+            else:
+                if not policy.is_retryable(result) or attempt >= policy.max_attempts:
+                    if self._is_failure(result):
+                        breaker.record_failure()
+                    return result
+                pause = policy.retry_after(result)
+                if pause is None:
+                    pause = policy.backoff(attempt)
+                if time.monotonic() + pause >= deadline:
+                    Metrics.incr(f'upstream.{self.upstream}.retry_gave_up')
+                    if self._is_failure(result):
+                        breaker.record_failure()
+                    return result
+            Metrics.incr(f'upstream.{self.upstream}.retried')
+            await asyncio.sleep(pause)
+            attempt += 1
+
+    @staticmethod
+    def _is_failure(result) -> bool:
+        """
+        Checks if the result is a 5xx response.
+
+        :param result: result of request
+
+        :return: True if the upstream failed
+        """
+        return getattr(result, 'status', HTTPStatus.OK) >= HTTPStatus.INTERNAL_SERVER_ERROR
+
+    async def _guard(
+        self, request: Callable[[], Awaitable[T]], deadline: float | None = None, count_failure: bool = True,
+    ) -> T:
+        """
+        Runs request under the upstream circuit breaker, rate limiter and adaptive timeout.
+        Connection errors, timeouts and 5xx responses are failures of the upstream.
+
+        :param request: coroutine function which sends the request
+        :param deadline: optional time.monotonic() value, the timeout is shortened to not exceed it
+        :param count_failure: False if the caller counts the failure itself, as :meth:`_retried` does once for all attempts
+
+        :return: result of request
+        :raises UpstreamUnavailable: if the circuit is open or the request failed
+        :raises UpstreamThrottled: if no rate limit token is received in RATE_LIMIT_MAX_WAIT_SECONDS
+        """
+        upstream = Upstream.get(self.upstream)
+        if not upstream.breaker.allow():
+            Metrics.incr(f'upstream.{self.upstream}.short_circuited')
+            raise UpstreamUnavailable(self.upstream, 'circuit is open')
+        if upstream.limiter and not await upstream.limiter.acquire(RATE_LIMIT_MAX_WAIT_SECONDS):
+            upstream.breaker.record_cancel()
+            Metrics.incr(f'upstream.{self.upstream}.throttled')
+            raise UpstreamThrottled(self.upstream, 'rate limit is exhausted')
+        Metrics.incr(f'upstream.{self.upstream}.served')
+        started = time.monotonic()
+        timeout = upstream.timeout.current()
+        if deadline is not None:
+            timeout = max(0.0, min(timeout, deadline - started))
+        try:
+            result = await asyncio.wait_for(request(), timeout)
+        except asyncio.CancelledError:
+            upstream.breaker.record_cancel()
+            raise
+        except TRANSIENT_ERRORS as error:
+            self._record_failure(upstream, count_failure)
+            raise UpstreamUnavailable(self.upstream, type(error).__name__) from error
+        if self._is_failure(result):
+            self._record_failure(upstream, count_failure)
+            return result
+        elapsed = time.monotonic() - started
+        upstream.breaker.record_success()
+        upstream.timeout.observe(elapsed)
+        Metrics.observe(f'upstream.{self.upstream}.latency', elapsed)
+        return result
+
+    def _record_failure(self, upstream: Upstream, count_failure: bool) -> None:
+        """
+        Records a failed attempt. An uncounted failure only releases the half-open probe.
+
+        :param upstream: upstream of the repository
+        :param count_failure: count the failure in the circuit breaker
+
+        :return: None
+        """
+        if count_failure:
+            upstream.breaker.record_failure()
+        else:
+            upstream.breaker.record_cancel()
+        Metrics.incr(f'upstream.{self.upstream}.failed')
@@ -10,9 +10,64 @@ WEATHER_API_KEY = os.environ['WEATHER_API_KEY']
 YANDEX_API_KEY = os.environ['YANDEX_API_KEY']
 
 COUNTRY_INFO_URL = os.environ['COUNTRY_INFO_URL']
+COUNTRY_ALL_URL = os.getenv('COUNTRY_ALL_URL', 'https://restcountries.com/v3.1/all')
+# Only fields used by CountryAPIRepository are requested
+COUNTRY_INFO_FIELDS = 'cca2,translations,capital,capitalInfo,area,population,currencies,languages'
+# Local snapshot of all countries, refreshed by a periodic task, replaces per-country requests
+COUNTRY_MIRROR_ENABLED = os.getenv('COUNTRY_MIRROR_ENABLED', 'False') == 'True'
+COUNTRY_MIRROR_PATH = os.getenv('COUNTRY_MIRROR_PATH', 'country_mirror.json')
 WEATHER_INFO_URL = os.environ['WEATHER_INFO_URL']
 CURRENCY_INFO_URL = os.environ['CURRENCY_INFO_URL']
 
+# Parse geocoder responses incrementally from the network stream (requires optional `ijson` package)
+GEOCODER_STREAMING_PARSE = os.getenv('GEOCODER_STREAMING_PARSE', 'False') == 'True'
+# Geocoder query shaping: max results for city search, response language
+# and optional search area hint `bbox` ('lon1,lat1~lon2,lat2'), strict if GEOCODER_RESTRICT_AREA
+GEOCODER_CITY_RESULTS = int(os.getenv('GEOCODER_CITY_RESULTS', 10))
+GEOCODER_LANG = os.getenv('GEOCODER_LANG', 'ru_RU')
+GEOCODER_BBOX = os.getenv('GEOCODER_BBOX', '')
+GEOCODER_RESTRICT_AREA = os.getenv('GEOCODER_RESTRICT_AREA', 'False') == 'True'
+# Hedged geocoder requests: a second request is sent if the first one is slower than
+# the GEOCODER_HEDGE_QUANTILE of recent latencies, at most for GEOCODER_HEDGE_MAX_RATIO of requests
+GEOCODER_HEDGING = os.getenv('GEOCODER_HEDGING', 'False') == 'True'
+GEOCODER_HEDGE_QUANTILE = float(os.getenv('GEOCODER_HEDGE_QUANTILE', 0.9))
+GEOCODER_HEDGE_MAX_RATIO = float(os.getenv('GEOCODER_HEDGE_MAX_RATIO', 0.1))
+# Streaming parse stops after this number of locality/province results
+GEOCODER_MAX_RESULTS = int(os.getenv('GEOCODER_MAX_RESULTS', 10))
+
+# Bulk weather requests: max parallel requests and coordinates precision for de-duplication (2 digits ~ 1 km)
+WEATHER_BATCH_CONCURRENCY = int(os.getenv('WEATHER_BATCH_CONCURRENCY', 10))
+WEATHER_COORDINATES_PRECISION = int(os.getenv('WEATHER_COORDINATES_PRECISION', 2))
+
+# Circuit breaker: the upstream is not requested for RECOVERY seconds after THRESHOLD consecutive failures
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_SECONDS = float(os.getenv('CIRCUIT_RECOVERY_SECONDS', 30))
+# Adaptive timeout: QUANTILE of the last WINDOW latencies * MULTIPLIER, clamped to [MIN, MAX]
+ADAPTIVE_TIMEOUT_INITIAL_SECONDS = float(os.getenv('ADAPTIVE_TIMEOUT_INITIAL_SECONDS', 5))
+ADAPTIVE_TIMEOUT_MIN_SECONDS = float(os.getenv('ADAPTIVE_TIMEOUT_MIN_SECONDS', 1))
+ADAPTIVE_TIMEOUT_MAX_SECONDS = float(os.getenv('ADAPTIVE_TIMEOUT_MAX_SECONDS', 10))
+ADAPTIVE_TIMEOUT_QUANTILE = float(os.getenv('ADAPTIVE_TIMEOUT_QUANTILE', 0.99))
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', 3))
+ADAPTIVE_TIMEOUT_WINDOW = int(os.getenv('ADAPTIVE_TIMEOUT_WINDOW', 100))
+
+# Client-side rate limits per upstream as 'name=rate:burst,...' (requests per second and max burst),
+# shared by all replicas through Redis with RATE_LIMIT_BACKEND=redis.
+# A request waits for a token at most RATE_LIMIT_MAX_WAIT_SECONDS, then it is degraded to cache.
+RATE_LIMITS = {
+    name.strip(): (float(limit.split(':')[0]), int(limit.split(':')[1]))
+    for name, limit in (
+        item.split('=') for item in os.getenv('RATE_LIMITS', '').split(',') if item.strip()
+    )
+}
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('RATE_LIMIT_MAX_WAIT_SECONDS', 1))
+# Retries of GET requests on connection errors, timeouts, 429 and 5xx: at most MAX_ATTEMPTS attempts
+# with full-jitter exponential backoff from BASE to MAX delay, all within DEADLINE seconds of the handler SLA
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', 3))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv('RETRY_BASE_DELAY_SECONDS', 0.2))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv('RETRY_MAX_DELAY_SECONDS', 2))
+RETRY_DEADLINE_SECONDS = float(os.getenv('RETRY_DEADLINE_SECONDS', 8))
+
 COUNTRY = 'country'
 SEARCH_TYPE_LIST = ['province', 'locality']
 YANDEX_TAG_LIST = ['<fix>', '</fix>']
@@ -2,11 +2,19 @@ import json
 from dataclasses import dataclass
 from http import HTTPStatus
 
-from aiohttp import ClientConnectorError, ClientResponse, ClientSession
+from aiohttp import ClientResponse, ClientSession
+from pydantic import ValidationError
 
 from services.repositories.api.abstract_api_repository import AbstractAPIRepository
 from services.repositories.api.api_schemas import CountrySchema
-from services.repositories.api.api_settings import COUNTRY_INFO_URL
+from services.repositories.api.api_settings import (
+    COUNTRY_ALL_URL,
+    COUNTRY_INFO_FIELDS,
+    COUNTRY_INFO_URL,
+    COUNTRY_MIRROR_ENABLED,
+)
+from services.repositories.api.country_mirror import CountryMirror
+from services.repositories.api.resilience import UpstreamUnavailable
 
 
 @dataclass
@@ -16,25 +24,49 @@ class CountryAPIRepository(AbstractAPIRepository):
     by sending request to external API "Restcountries.com".
     Extends of the :class:`BaseAPIRepository` class.
     """
+    upstream = 'restcountries'
 
     async def get_country_detail(self, country_code: str) -> CountrySchema | None:
         """
         Return details about country by recieved country code.
+        With COUNTRY_MIRROR_ENABLED the details are taken from :class:`CountryMirror` without a request,
+        the API is used only while there is no snapshot yet.
 
         :param country_code: country iso code (example: "GB", "CA", "RU")
 
         :return: country details as :class:`CountrySchema` object or None
         """
+        if COUNTRY_MIRROR_ENABLED and CountryMirror.is_loaded():
+            return CountryMirror.get(country_code)
         url = f'{COUNTRY_INFO_URL}{country_code}'
         try:
-            response = await self._send_request(url=url)
-        except ClientConnectorError:
-            # may be better raise custom exception
+            response = await self._get(url=url, params={'fields': COUNTRY_INFO_FIELDS})
+        except UpstreamUnavailable:
             return None
         if response.status == HTTPStatus.OK:
             return await self._parse_response(response)
         return None
 
+    async def get_all_country_details(self) -> list[CountrySchema] | None:
+        """
+        Return details about all countries, countries with missing fields (e.g. without capital) are skipped.
+
+        :return: list of :class:`CountrySchema` objects or None
+        """
+        try:
+            response = await self._get(url=COUNTRY_ALL_URL, params={'fields': COUNTRY_INFO_FIELDS})
+        except UpstreamUnavailable:
+            return None
+        if response.status != HTTPStatus.OK:
+            return None
+        countries = []
+        for country_data in json.loads(await response.read()):
+            try:
+                countries.append(self.parse_country(country_data))
+            except (KeyError, IndexError, TypeError, ValidationError):
+                continue
+        return countries
+
     async def _send_request(self, url: str, params=None, body=None) -> ClientResponse:
         """
         Send GET response
@@ -46,7 +78,7 @@ class CountryAPIRepository(AbstractAPIRepository):
         :return: response from API
         """
         async with ClientSession() as session:
-            resp = await session.get(url=url)
+            resp = await session.get(url=url, params=params)
         return resp
 
     async def _parse_response(self, response: ClientResponse) -> CountrySchema:
@@ -57,7 +89,21 @@ class CountryAPIRepository(AbstractAPIRepository):
 
         :return: parsed response as :class:`CountrySchema` object
         """
-        country_data = (json.loads(await response.read()))[0]
+        country_data = json.loads(await response.read())
+        # restcountries returns an object instead of a list when fields are filtered
+        if isinstance(country_data, list):
+            country_data = country_data[0]
+        return self.parse_country(country_data)
+
+    @staticmethod
+    def parse_country(country_data: dict) -> CountrySchema:
+        """
+        Converts restcountries country document into schema.
+
+        :param country_data: restcountries country document
+
+        :return: country details as :class:`CountrySchema` object
+        """
         return CountrySchema(
             iso_code=country_data['cca2'],
             name=country_data['translations']['rus']['common'],
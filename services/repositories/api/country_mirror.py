@@ -0,0 +1,70 @@
+import json
+import os
+
+from pydantic import ValidationError
+
+from services.repositories.api.api_schemas import CountrySchema
+from services.repositories.api.api_settings import COUNTRY_MIRROR_PATH
+
+
+class CountryMirror:
+    """
+    Compact on-disk snapshot of all countries from restcountries, keyed by iso code.
+    The snapshot is loaded into memory once and reloaded when the file is replaced.
+    """
+    _countries: dict[str, dict] | None = None
+    _mtime: float | None = None
+
+    @staticmethod
+    def is_loaded() -> bool:
+        """
+        Loads the snapshot if the file was created or replaced since the last load.
+
+        :return: True if a snapshot is available
+        """
+        try:
+            mtime = os.path.getmtime(COUNTRY_MIRROR_PATH)
+        except OSError:
+            return CountryMirror._countries is not None
+        if mtime != CountryMirror._mtime:
+            with open(COUNTRY_MIRROR_PATH, encoding='utf-8') as mirror_file:
+                CountryMirror._countries = json.load(mirror_file)
+            CountryMirror._mtime = mtime
+        return True
+
+    @staticmethod
+    def get(country_code: str) -> CountrySchema | None:
+        """
+        Returns country details from the snapshot.
+
+        :param country_code: country iso code (example: "GB", "CA", "RU")
+
+        :return: country details as :class:`CountrySchema` object or None
+        """
+        countries = CountryMirror._countries if CountryMirror.is_loaded() else None
+        if countries is None:
+            return None
+        country_data = countries.get(country_code.upper())
+        if not country_data:
+            return None
+        try:
+            return CountrySchema.parse_obj(country_data)
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def save(countries: list[CountrySchema]) -> None:
+        """
+        Atomically replaces the snapshot file.
+
+        :param countries: details of all countries
+
+        :return: None
+        """
+        tmp_path = f'{COUNTRY_MIRROR_PATH}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as mirror_file:
+            json.dump(
+                {country.iso_code: country.dict() for country in countries},
+                mirror_file, ensure_ascii=False, separators=(',', ':'),
+            )
+        os.replace(tmp_path, COUNTRY_MIRROR_PATH)
@@ -6,12 +6,14 @@ from aiohttp import ClientResponse, ClientSession
 from services.repositories.api.abstract_api_repository import AbstractAPIRepository
 from services.repositories.api.api_schemas import AllRateSchema, CurrencySchema
 from services.repositories.api.api_settings import CURRENCY_INFO_URL
+from services.repositories.api.resilience import UpstreamUnavailable
 
 
 class CurrencyAPIRepository(AbstractAPIRepository):
     """
     This class is a repository for making requests in currency API.
     """
+    upstream = 'cbr'
 
     async def get_all_rate(self):
         """
@@ -19,7 +21,10 @@ class CurrencyAPIRepository(AbstractAPIRepository):
 
         :return AllRateSchema or None
         """
-        response = await self._send_request(url=CURRENCY_INFO_URL)
+        try:
+            response = await self._get(url=CURRENCY_INFO_URL)
+        except UpstreamUnavailable:
+            return None
         if response.status == HTTPStatus.OK:
             currencies = await self._parse_response(response)
             return AllRateSchema(all_rate={key: value.value for key, value in currencies.items()})
@@ -32,8 +37,9 @@ class CurrencyAPIRepository(AbstractAPIRepository):
         :param char_codes: list of currency codes like ["USD", "EUR"]
 
         :return: list of CurrencySchema if it exists else None
+        :raises UpstreamUnavailable: if the circuit is open or the request failed
         """
-        response = await self._send_request(url=CURRENCY_INFO_URL)
+        response = await self._get(url=CURRENCY_INFO_URL)
         if response.status == HTTPStatus.OK:
             currencies = await self._parse_response(response)
             if not currencies:
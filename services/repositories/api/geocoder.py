@@ -1,23 +1,73 @@
+import asyncio
 import json
-from typing import Optional
+import logging
+from http import HTTPStatus
+from typing import Any, Callable, Coroutine, Optional, Protocol, TypeVar
 
 from aiohttp import ClientResponse, ClientSession
 
+from services.metrics import Metrics
 from services.repositories.api.abstract_api_repository import AbstractAPIRepository
 from services.repositories.api.api_schemas import GeocoderSchema
 from services.repositories.api.api_settings import (
     COUNTRY,
+    GEOCODER_BBOX,
+    GEOCODER_CITY_RESULTS,
+    GEOCODER_HEDGE_MAX_RATIO,
+    GEOCODER_HEDGE_QUANTILE,
+    GEOCODER_HEDGING,
+    GEOCODER_LANG,
+    GEOCODER_MAX_RESULTS,
+    GEOCODER_RESTRICT_AREA,
+    GEOCODER_STREAMING_PARSE,
     GEOCODER_URL,
     SEARCH_TYPE_LIST,
     YANDEX_API_KEY,
     YANDEX_TAG_LIST,
 )
+from services.repositories.api.resilience import Upstream, UpstreamUnavailable
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+if GEOCODER_STREAMING_PARSE and ijson is None:
+    logger.warning('GEOCODER_STREAMING_PARSE is on, but ijson is not installed (poetry install -E streaming), '
+                   'geocoder responses are parsed after download')
+
+T = TypeVar('T')
 
 for_city = Optional[GeocoderSchema]
 for_country = Optional[list[GeocoderSchema]]
 
+COLLECTION = 'response.GeoObjectCollection'
+RESPONSE_META = f'{COLLECTION}.metaDataProperty.GeocoderResponseMetaData'
+FEATURE = f'{COLLECTION}.featureMember.item'
+# Streamed GeoObject fields: ijson prefix -> path in the GeoObject dict
+GEO_OBJECT_FIELDS = {
+    f'{FEATURE}.GeoObject.metaDataProperty.GeocoderMetaData.kind': ('metaDataProperty', 'GeocoderMetaData', 'kind'),
+    f'{FEATURE}.GeoObject.metaDataProperty.GeocoderMetaData.Address.formatted': (
+        'metaDataProperty', 'GeocoderMetaData', 'Address', 'formatted'),
+    f'{FEATURE}.GeoObject.metaDataProperty.GeocoderMetaData.Address.country_code': (
+        'metaDataProperty', 'GeocoderMetaData', 'Address', 'country_code'),
+    f'{FEATURE}.GeoObject.Point.pos': ('Point', 'pos'),
+}
+STREAM_CHUNK_SIZE = 16 * 1024
+# Max number of hedges which may be sent in a row, the budget grows by GEOCODER_HEDGE_MAX_RATIO per request
+HEDGE_BUDGET_CAP = 10
+
+
+class AsyncReader(Protocol):
+    async def read(self, n: int = -1) -> bytes:
+        ...
+
 
 class GeocoderAPIRepository(AbstractAPIRepository):
+    upstream = 'geocoder'
+    _hedge_budget: float = 0.0
 
     async def parse_fixed_request_name(self, row_fixed_name: str) -> str:
         """
@@ -68,14 +118,109 @@ class GeocoderAPIRepository(AbstractAPIRepository):
 
         :return: Latitude and Longitude and country code
         """
-        if is_country:
-            url = f'{GEOCODER_URL}{YANDEX_API_KEY}&geocode={city_or_country_name}&results=1'
-        else:
-            url = f'{GEOCODER_URL}{YANDEX_API_KEY}&geocode={city_or_country_name}'
-        response = await self._send_request(url=url)
+        url = f'{GEOCODER_URL}{YANDEX_API_KEY}'
+        params = self.build_params(city_or_country_name, is_country)
+        try:
+            if GEOCODER_HEDGING:
+                return await self._hedged(lambda: self._request_base_info(url, params))
+            return await self._request_base_info(url, params)
+        except UpstreamUnavailable:
+            return None
+
+    async def _request_base_info(self, url: str, params: dict) -> for_city | for_country:
+        """
+        Sends geocoder request and parses the response.
+
+        :param url: API url address
+        :param params: request's query params
 
+        :return: parse response
+        :raises UpstreamUnavailable: if the circuit is open or the request failed
+        """
+        if GEOCODER_STREAMING_PARSE and ijson is not None:
+            result = await self._retried(lambda: self._stream_request(url=url, params=params))
+            # the response itself is returned when its status is not 200, it has nothing to parse
+            return None if isinstance(result, ClientResponse) else result
+        response = await self._get(url=url, params=params)
         return await self._parse_response(response)
 
+    async def _hedged(self, request: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        """
+        Runs request, and if it has not finished in GEOCODER_HEDGE_QUANTILE of recent geocoder latencies,
+        runs an identical second one. The first successful result is returned, the other request is cancelled.
+        Hedges are limited by a budget which grows by GEOCODER_HEDGE_MAX_RATIO per request.
+
+        :param request: coroutine function which sends the request and parses the response
+
+        :return: result of the request which finished first
+        """
+        cls = GeocoderAPIRepository
+        cls._hedge_budget = min(HEDGE_BUDGET_CAP, cls._hedge_budget + GEOCODER_HEDGE_MAX_RATIO)
+        delay = Upstream.get(self.upstream).timeout.latency_quantile(GEOCODER_HEDGE_QUANTILE)
+        if delay is None:
+            return await request()
+        first = asyncio.create_task(request())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or cls._hedge_budget < 1:
+                return await first
+            cls._hedge_budget -= 1
+            Metrics.incr('geocoder.hedge.sent')
+            hedge = asyncio.create_task(request())
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            Metrics.incr('geocoder.hedge.won')
+                        return task.result()
+            return first.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def build_params(city_or_country_name: str, is_country: bool = False) -> dict:
+        """
+        Shapes geocoder query: limits results (one for a country, GEOCODER_CITY_RESULTS for a city),
+        sets response language and search area hints.
+        Yandex accepts `kind` only for reverse geocoding, so kinds are still filtered by :meth:`parse_many_result`.
+
+        :param city_or_country_name: country or city name
+        :param is_country: True for country search
+
+        :return: query params
+        """
+        params = {'geocode': city_or_country_name, 'results': 1 if is_country else GEOCODER_CITY_RESULTS}
+        if GEOCODER_LANG:
+            params['lang'] = GEOCODER_LANG
+        if GEOCODER_BBOX and not is_country:
+            params['bbox'] = GEOCODER_BBOX
+            params['rspn'] = int(GEOCODER_RESTRICT_AREA)
+        return params
+
+    async def _stream_request(
+        self, url: str, params: dict | None = None
+    ) -> for_city | for_country | ClientResponse:
+        """
+        Send GET request and parse the response body while it is being received.
+        A response with another status than 200 is returned unparsed, so :meth:`_retried`
+        retries it and counts it in the circuit breaker like a buffered response.
+
+        :param url: API url address
+        :param params: optional request's query params
+
+        :return: parse response or the response if its status is not 200
+        """
+        async with ClientSession() as session:
+            async with session.get(url=url, params=params) as resp:
+                if resp.status != HTTPStatus.OK:
+                    return resp
+                return await self._parse_stream(resp.content)
+
     async def _send_request(self, url: str, params=None, body=None) -> ClientResponse:
         """
         Send GET response
@@ -118,6 +263,54 @@ class GeocoderAPIRepository(AbstractAPIRepository):
             return await self.parse_many_result(right_name, main_data)
         return None
 
+    async def _parse_stream(self, stream: AsyncReader) -> for_city | for_country:
+        """
+        Incremental version of :meth:`_parse_response`. Keeps only `GeocoderResponseMetaData`
+        and the GeoObject fields used by :meth:`parse_one_result` and :meth:`parse_many_result`,
+        and stops reading once GEOCODER_MAX_RESULTS locality/province results are collected.
+
+        :param stream: object with coroutine `read(n)`, e.g. `ClientResponse.content`
+
+        :return: parse response
+        """
+        meta_data, features, geo_object = {}, [], None
+        matched = 0
+        try:
+            async for prefix, event, value in ijson.parse_async(stream, buf_size=STREAM_CHUNK_SIZE):
+                if prefix.startswith(RESPONSE_META) and event in ('string', 'number'):
+                    meta_data[prefix[len(RESPONSE_META) + 1:]] = value
+                elif prefix == FEATURE and event == 'start_map':
+                    geo_object = {}
+                elif prefix in GEO_OBJECT_FIELDS and geo_object is not None:
+                    *path, field = GEO_OBJECT_FIELDS[prefix]
+                    node = geo_object
+                    for part in path:
+                        node = node.setdefault(part, {})
+                    node[field] = value
+                elif prefix == FEATURE and event == 'end_map':
+                    features.append({'GeoObject': geo_object})
+                    kind = geo_object.get('metaDataProperty', {}).get('GeocoderMetaData', {}).get('kind')
+                    matched += kind in SEARCH_TYPE_LIST
+                    if 'found' in meta_data and (
+                        int(meta_data['found']) == 1 or matched >= GEOCODER_MAX_RESULTS
+                    ):
+                        break
+        except ijson.JSONError:
+            return None
+        try:
+            count_result = int(meta_data['found'])
+            right_name = meta_data['request']
+        except (KeyError, ValueError):
+            return None
+        if meta_data.get('suggest'):
+            right_name = await self.parse_fixed_request_name(meta_data['suggest'])
+        main_data = {'featureMember': features}
+        if count_result == 1 and features:
+            return await self.parse_one_result(right_name, main_data)
+        elif count_result > 1:
+            return await self.parse_many_result(right_name, main_data)
+        return None
+
     async def parse_one_result(self, right_name: str, main_data: dict) -> GeocoderSchema | None:
         """
         Function handles one result.
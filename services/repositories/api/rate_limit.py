@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from cache.cache_settings import REDIS as redis
+
+# Refills the bucket by elapsed time and takes one token.
+# Returns 0 if the token is taken, otherwise milliseconds until the next token.
+TAKE_TOKEN_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait_ms
+"""
+
+
+class TokenBucket:
+    """
+    In-process token bucket: `rate` requests per second on average with bursts up to `burst` requests.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    async def take(self) -> float:
+        """
+        Takes one token if available.
+
+        :return: 0 if the token is taken, otherwise seconds until the next token
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self, max_wait: float) -> bool:
+        """
+        Waits for a token at most `max_wait` seconds.
+
+        :param max_wait: max waiting time in seconds
+
+        :return: True if the token is taken, False if the request should be degraded
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            delay = await self.take()
+            if not delay:
+                return True
+            if time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket stored in Redis, so the limit is shared by all bot replicas.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        super().__init__(rate, burst)
+        self.key = f'ratelimit:{name}'
+
+    async def take(self) -> float:
+        """
+        Takes one token from the shared bucket if available.
+
+        :return: 0 if the token is taken, otherwise seconds until the next token
+        """
+        wait_ms = await redis.eval(TAKE_TOKEN_SCRIPT, 1, self.key, self.rate, self.burst)
+        await redis.close()
+        return int(wait_ms) / 1000
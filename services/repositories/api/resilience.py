@@ -0,0 +1,206 @@
+import time
+from collections import deque
+from enum import Enum
+
+from services.repositories.api.api_settings import (
+    ADAPTIVE_TIMEOUT_INITIAL_SECONDS,
+    ADAPTIVE_TIMEOUT_MAX_SECONDS,
+    ADAPTIVE_TIMEOUT_MIN_SECONDS,
+    ADAPTIVE_TIMEOUT_MULTIPLIER,
+    ADAPTIVE_TIMEOUT_QUANTILE,
+    ADAPTIVE_TIMEOUT_WINDOW,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_SECONDS,
+    RATE_LIMIT_BACKEND,
+    RATE_LIMITS,
+)
+from services.repositories.api.rate_limit import RedisTokenBucket, TokenBucket
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an external API is not requested because its circuit is open,
+    or the request failed with a connection error, a timeout or a server error.
+    """
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f'{upstream} is unavailable: {reason}')
+        self.upstream = upstream
+        self.reason = reason
+
+
+class UpstreamThrottled(UpstreamUnavailable):
+    """
+    Raised when a request is not sent because the client-side rate limit of the upstream is exhausted.
+    """
+
+
+class CircuitState(str, Enum):
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Stops requests to an upstream after `failure_threshold` consecutive failures.
+    After `recovery_seconds` one probe request is let through (half-open state):
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds: float = CIRCUIT_RECOVERY_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Checks if a request may be sent now.
+
+        :return: True if the circuit is closed or the request is the half-open probe
+        """
+        if self.state == CircuitState.closed:
+            return True
+        if self.state == CircuitState.open:
+            if time.monotonic() - self.opened_at < self.recovery_seconds:
+                return False
+            self.state = CircuitState.half_open
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """
+        Closes the circuit.
+
+        :return: None
+        """
+        self.state = CircuitState.closed
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """
+        Counts a failure, opens the circuit after `failure_threshold` failures or a failed probe.
+
+        :return: None
+        """
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == CircuitState.half_open or self.failures >= self.failure_threshold:
+            self.state = CircuitState.open
+            self.opened_at = time.monotonic()
+
+    def record_cancel(self) -> None:
+        """
+        Forgets a cancelled request without counting it as a failure, so another probe may be sent.
+
+        :return: None
+        """
+        self._probe_in_flight = False
+
+
+class AdaptiveTimeout:
+    """
+    Request timeout derived from recent latencies: `quantile` of the last `window` successful requests
+    multiplied by `multiplier` and clamped to [min_seconds, max_seconds].
+    """
+
+    def __init__(
+        self,
+        initial_seconds: float = ADAPTIVE_TIMEOUT_INITIAL_SECONDS,
+        min_seconds: float = ADAPTIVE_TIMEOUT_MIN_SECONDS,
+        max_seconds: float = ADAPTIVE_TIMEOUT_MAX_SECONDS,
+        quantile: float = ADAPTIVE_TIMEOUT_QUANTILE,
+        multiplier: float = ADAPTIVE_TIMEOUT_MULTIPLIER,
+        window: int = ADAPTIVE_TIMEOUT_WINDOW,
+    ):
+        self.initial_seconds = initial_seconds
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.latencies: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        """
+        Records latency of a successful request.
+
+        :param seconds: request duration
+
+        :return: None
+        """
+        self.latencies.append(seconds)
+
+    def latency_quantile(self, quantile: float) -> float | None:
+        """
+        Returns the quantile of recent latencies.
+
+        :param quantile: quantile from 0 to 1
+
+        :return: latency in seconds or None if nothing is observed yet
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def current(self) -> float:
+        """
+        Returns timeout for the next request.
+
+        :return: timeout in seconds
+        """
+        latency = self.latency_quantile(self.quantile)
+        if latency is None:
+            return self.initial_seconds
+        return min(self.max_seconds, max(self.min_seconds, latency * self.multiplier))
+
+
+class Upstream:
+    """
+    Resilience state of one external API shared by all its repository objects in the process.
+    """
+    _registry: dict[str, 'Upstream'] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker()
+        self.timeout = AdaptiveTimeout()
+        self.limiter: TokenBucket | None = None
+        if name in RATE_LIMITS:
+            rate, burst = RATE_LIMITS[name]
+            if RATE_LIMIT_BACKEND == 'redis':
+                self.limiter = RedisTokenBucket(name, rate, burst)
+            else:
+                self.limiter = TokenBucket(rate, burst)
+
+    @staticmethod
+    def get(name: str) -> 'Upstream':
+        """
+        Returns the upstream by name, creating it on first use.
+
+        :param name: upstream name (example: "geocoder")
+
+        :return: :class:`Upstream` object
+        """
+        if name not in Upstream._registry:
+            Upstream._registry[name] = Upstream(name)
+        return Upstream._registry[name]
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Forgets state of all upstreams.
+
+        :return: None
+        """
+        Upstream._registry.clear()
@@ -0,0 +1,86 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+from services.repositories.api.api_settings import (
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_DEADLINE_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+
+RETRY_STATUSES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+
+
+class RetryPolicy:
+    """
+    Retries of idempotent GET requests: at most `max_attempts` attempts with full-jitter exponential backoff,
+    all attempts and pauses fit into `deadline_seconds` from the first attempt.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay_seconds: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay_seconds: float = RETRY_MAX_DELAY_SECONDS,
+        deadline_seconds: float = RETRY_DEADLINE_SECONDS,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.deadline_seconds = deadline_seconds
+
+    def deadline(self) -> float:
+        """
+        Returns the deadline of a request started now.
+
+        :return: time.monotonic() value after which no attempt is made
+        """
+        return time.monotonic() + self.deadline_seconds
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns a random pause before the next attempt (full jitter).
+
+        :param attempt: number of the failed attempt starting from 1
+
+        :return: pause in seconds
+        """
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def is_retryable(response) -> bool:
+        """
+        Checks if the response status is transient.
+
+        :param response: response from API
+
+        :return: True for 429 and 5xx gateway statuses
+        """
+        return getattr(response, 'status', HTTPStatus.OK) in RETRY_STATUSES
+
+    @staticmethod
+    def retry_after(response) -> float | None:
+        """
+        Parses the Retry-After header given either in seconds or as an HTTP date.
+
+        :param response: response from API
+
+        :return: pause in seconds or None if the header is missing or invalid
+        """
+        value = (getattr(response, 'headers', None) or {}).get('Retry-After')
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -1,6 +1,7 @@
 import json
 from http import HTTPStatus
 
+import pytest
 import pytest_asyncio
 from pytest import MonkeyPatch
 
@@ -8,10 +9,19 @@ from services.repositories.api.api_schemas import GeocoderSchema
 from services.repositories.api.country_detail import CountryAPIRepository
 from services.repositories.api.currency import CurrencyAPIRepository
 from services.repositories.api.geocoder import GeocoderAPIRepository
+from services.repositories.api.resilience import Upstream
 from services.repositories.api.tests.mocks import MockClientResponse
 from services.repositories.api.weather import WeatherAPIRepository
 
 
+@pytest.fixture(autouse=True)
+def _reset_upstreams() -> None:
+    """
+    Starts every test with closed circuits and initial timeouts of all upstreams.
+    """
+    Upstream.reset()
+
+
 @pytest_asyncio.fixture
 async def patched_currency_api_repository(monkeypatch: MonkeyPatch, currency_api_response: dict):
     """
@@ -1,10 +1,13 @@
+import io
 import json
 
 
 class MockClientResponse:
-    def __init__(self, text, status):
+    def __init__(self, text, status, headers=None):
         self._text = text
         self.status = status
+        self.headers = headers or {}
+        self.content = MockStreamReader(text)
 
     async def read(self):
         return self._text
@@ -17,3 +20,14 @@ class MockClientResponse:
 
     async def json(self):
         return json.loads(self._text)
+
+
+class MockStreamReader:
+    def __init__(self, text):
+        self._buffer = io.BytesIO(text.encode())
+        self.bytes_read = 0
+
+    async def read(self, n=-1):
+        chunk = self._buffer.read(n)
+        self.bytes_read += len(chunk)
+        return chunk
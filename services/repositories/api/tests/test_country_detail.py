@@ -1,7 +1,13 @@
+import json
+from http import HTTPStatus
+
 import pytest
 
+from services.repositories.api import country_detail, country_mirror
 from services.repositories.api.api_schemas import CountrySchema
 from services.repositories.api.country_detail import CountryAPIRepository
+from services.repositories.api.country_mirror import CountryMirror
+from services.repositories.api.tests.mocks import MockClientResponse
 
 
 @pytest.mark.asyncio
@@ -30,3 +36,47 @@ async def test_get_country_detail(
     assert response.languages == [
         language for language in country_api_response[0]['languages'].values()
     ]
+
+
+@pytest.mark.asyncio
+async def test_get_country_detail_filtered_response(
+        monkeypatch: pytest.MonkeyPatch, country_api_response: list) -> None:
+    """
+    Check that a field-filtered response (an object instead of a list) is parsed
+
+    :param monkeypatch: fixture for monkey-patching
+    :param country_api_response: normal response from country API
+    """
+    async def return_mock(*args, **kwargs):
+        return MockClientResponse(json.dumps(country_api_response[0]), HTTPStatus.OK)
+
+    country_api_repository = CountryAPIRepository()
+    monkeypatch.setattr(country_api_repository, '_send_request', return_mock)
+
+    response = await country_api_repository.get_country_detail('RU')
+
+    assert response == CountryAPIRepository.parse_country(country_api_response[0])
+
+
+@pytest.mark.asyncio
+async def test_get_country_detail_from_mirror(
+        monkeypatch: pytest.MonkeyPatch, tmp_path, country_api_response: list) -> None:
+    """
+    Check that with the mirror enabled country details are taken from the snapshot without requests
+
+    :param monkeypatch: fixture for monkey-patching
+    :param tmp_path: temporary directory for the snapshot
+    :param country_api_response: normal response from country API
+    """
+    async def return_mock(*args, **kwargs):
+        raise AssertionError('request is sent with the mirror enabled')
+
+    monkeypatch.setattr(country_mirror, 'COUNTRY_MIRROR_PATH', str(tmp_path / 'mirror.json'))
+    monkeypatch.setattr(country_detail, 'COUNTRY_MIRROR_ENABLED', True)
+    expected = CountryAPIRepository.parse_country(country_api_response[0])
+    CountryMirror.save([expected])
+    country_api_repository = CountryAPIRepository()
+    monkeypatch.setattr(country_api_repository, '_send_request', return_mock)
+
+    assert await country_api_repository.get_country_detail('RU') == expected
+    assert await country_api_repository.get_country_detail('XX') is None
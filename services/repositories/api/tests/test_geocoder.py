@@ -1,8 +1,17 @@
+import asyncio
+import json
+from http import HTTPStatus
+
 import pytest
 
+from services.metrics import Metrics
+from services.repositories.api import geocoder
 from services.repositories.api.api_schemas import GeocoderSchema
 from services.repositories.api.geocoder import GeocoderAPIRepository
+from services.repositories.api.resilience import Upstream
+from services.repositories.api.retry import RetryPolicy
 from services.repositories.api.tests.cases import get_fixed_request_name_cases
+from services.repositories.api.tests.mocks import MockClientResponse, MockStreamReader
 
 
 @pytest.mark.asyncio
@@ -75,3 +84,169 @@ async def test_parse_fixed_request_name(test_cases: list, expected: list) -> Non
     geocoder_api_repository = GeocoderAPIRepository()
     response = await geocoder_api_repository.parse_fixed_request_name(test_cases)
     assert response == expected
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_matches_parse_response(
+    geocoder_api_country_response: dict,
+    geocoder_api_city_response: dict,
+    geocoder_api_not_found_response: dict,
+) -> None:
+    """
+    Check that streaming parse returns the same result as `_parse_response`
+
+    :param geocoder_api_country_response: country response from geocoder API
+    :param geocoder_api_city_response: city response from geocoder API
+    :param geocoder_api_not_found_response: response with no result from geocoder API
+    """
+    pytest.importorskip('ijson')
+    geocoder_api_repository = GeocoderAPIRepository()
+    for api_response in (geocoder_api_country_response, geocoder_api_city_response, geocoder_api_not_found_response):
+        text = json.dumps(api_response)
+
+        expected = await geocoder_api_repository._parse_response(MockClientResponse(text, HTTPStatus.OK))
+        response = await geocoder_api_repository._parse_stream(MockStreamReader(text))
+
+        assert response == expected
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_stops_early(monkeypatch: pytest.MonkeyPatch, geocoder_api_city_response: dict) -> None:
+    """
+    Check that streaming parse stops reading after `GEOCODER_MAX_RESULTS` results
+
+    :param monkeypatch: fixture for monkey-patching
+    :param geocoder_api_city_response: city response from geocoder API with two localities
+    """
+    pytest.importorskip('ijson')
+    monkeypatch.setattr(geocoder, 'GEOCODER_MAX_RESULTS', 1)
+    main_data = geocoder_api_city_response['response']['GeoObjectCollection']
+    main_data['featureMember'] *= 500
+    main_data['metaDataProperty']['GeocoderResponseMetaData']['found'] = str(len(main_data['featureMember']))
+    text = json.dumps(geocoder_api_city_response)
+    stream = MockStreamReader(text)
+
+    response = await GeocoderAPIRepository()._parse_stream(stream)
+
+    assert isinstance(response, GeocoderSchema)
+    assert stream.bytes_read < len(text.encode())
+
+
+@pytest.mark.asyncio
+async def test_streamed_request_is_retried(monkeypatch: pytest.MonkeyPatch, geocoder_api_country_response: dict) -> None:
+    """
+    Check that a streamed 5xx response is not parsed but retried like a buffered one
+
+    :param monkeypatch: fixture for monkey-patching
+    :param geocoder_api_country_response: country response from geocoder API
+    """
+    pytest.importorskip('ijson')
+    responses = [
+        MockClientResponse('<html>Service Unavailable</html>', HTTPStatus.SERVICE_UNAVAILABLE),
+        MockClientResponse(json.dumps(geocoder_api_country_response), HTTPStatus.OK),
+    ]
+
+    class MockSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        def get(self, url, params=None):
+            return responses.pop(0)
+
+    geocoder_api_repository = GeocoderAPIRepository()
+    monkeypatch.setattr(geocoder, 'ClientSession', MockSession)
+    monkeypatch.setattr(geocoder, 'GEOCODER_STREAMING_PARSE', True)
+    monkeypatch.setattr(geocoder, 'GEOCODER_HEDGING', False)
+    monkeypatch.setattr(geocoder_api_repository, 'retry_policy', RetryPolicy(base_delay_seconds=0.01))
+    Metrics.reset()
+
+    response = await geocoder_api_repository.get_country(country_name='Россия')
+
+    assert isinstance(response, GeocoderSchema)
+    assert not responses
+    assert Metrics.snapshot()['counters']['upstream.geocoder.retried'] == 1
+
+
+def test_build_params(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that geocoder query is shaped with result limits, language and area hints
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    monkeypatch.setattr(geocoder, 'GEOCODER_CITY_RESULTS', 5)
+    monkeypatch.setattr(geocoder, 'GEOCODER_LANG', 'ru_RU')
+    monkeypatch.setattr(geocoder, 'GEOCODER_BBOX', '19.6,41.2~180,81.9')
+    monkeypatch.setattr(geocoder, 'GEOCODER_RESTRICT_AREA', False)
+
+    assert GeocoderAPIRepository.build_params('Россия', is_country=True) == {
+        'geocode': 'Россия', 'results': 1, 'lang': 'ru_RU',
+    }
+    assert GeocoderAPIRepository.build_params('Гурьевск') == {
+        'geocode': 'Гурьевск', 'results': 5, 'lang': 'ru_RU', 'bbox': '19.6,41.2~180,81.9', 'rspn': 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins(monkeypatch: pytest.MonkeyPatch, geocoder_api_country_response: dict) -> None:
+    """
+    Check that a slow geocoder request is hedged and the faster hedge result is returned
+
+    :param monkeypatch: fixture for monkey-patching
+    :param geocoder_api_country_response: country response from geocoder API
+    """
+    delays = [1, 0]
+    cancelled = []
+
+    async def return_mock(*args, **kwargs):
+        try:
+            await asyncio.sleep(delays.pop(0))
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return MockClientResponse(json.dumps(geocoder_api_country_response), HTTPStatus.OK)
+
+    geocoder_api_repository = GeocoderAPIRepository()
+    monkeypatch.setattr(geocoder_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(geocoder, 'GEOCODER_HEDGING', True)
+    monkeypatch.setattr(GeocoderAPIRepository, '_hedge_budget', 1.0)
+    Upstream.get(geocoder_api_repository.upstream).timeout.observe(0.01)
+    Metrics.reset()
+
+    response = await geocoder_api_repository.get_country(country_name='Россия')
+
+    await asyncio.sleep(0.01)
+
+    assert response is not None
+    assert cancelled == [True]
+    counters = Metrics.snapshot()['counters']
+    assert counters['geocoder.hedge.sent'] == 1
+    assert counters['geocoder.hedge.won'] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_budget(monkeypatch: pytest.MonkeyPatch, geocoder_api_country_response: dict) -> None:
+    """
+    Check that no hedge is sent when the hedge budget is exhausted
+
+    :param monkeypatch: fixture for monkey-patching
+    :param geocoder_api_country_response: country response from geocoder API
+    """
+    calls = 0
+
+    async def return_mock(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return MockClientResponse(json.dumps(geocoder_api_country_response), HTTPStatus.OK)
+
+    geocoder_api_repository = GeocoderAPIRepository()
+    monkeypatch.setattr(geocoder_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(geocoder, 'GEOCODER_HEDGING', True)
+    monkeypatch.setattr(GeocoderAPIRepository, '_hedge_budget', 0.0)
+    Upstream.get(geocoder_api_repository.upstream).timeout.observe(0.01)
+
+    assert await geocoder_api_repository.get_country(country_name='Россия') is not None
+    assert calls == 1
@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+
+from cache.test.methods import clear_redis
+from services.metrics import Metrics
+from services.repositories.api.rate_limit import RedisTokenBucket, TokenBucket
+from services.repositories.api.resilience import Upstream
+from services.repositories.api.tests.mocks import MockClientResponse
+from services.repositories.api.weather import WeatherAPIRepository
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('bucket', [TokenBucket(rate=1, burst=2), RedisTokenBucket('test', rate=1, burst=2)])
+async def test_token_bucket_burst(bucket: TokenBucket) -> None:
+    """
+    Check that the bucket serves a burst and then asks to wait for the next token
+
+    :param bucket: in-process or Redis token bucket
+    """
+    if isinstance(bucket, RedisTokenBucket):
+        await clear_redis([bucket.key])
+
+    assert await bucket.take() == 0
+    assert await bucket.take() == 0
+    assert 0 < await bucket.take() <= 1
+    assert not await bucket.acquire(max_wait=0.1)
+
+
+@pytest.mark.asyncio
+async def test_throttled_request_is_degraded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that requests over the rate limit are not sent and counted as throttled
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    calls = 0
+
+    async def return_mock(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return MockClientResponse('{}', HTTPStatus.NOT_FOUND)
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr('services.repositories.api.abstract_api_repository.RATE_LIMIT_MAX_WAIT_SECONDS', 0)
+    Upstream.get(weather_api_repository.upstream).limiter = TokenBucket(rate=0.1, burst=1)
+    Metrics.reset()
+
+    await weather_api_repository.get_weather(latitude=11, longitude=22)
+    assert await weather_api_repository.get_weather(latitude=11, longitude=22) is None
+
+    assert calls == 1
+    counters = Metrics.snapshot()['counters']
+    assert counters['upstream.openweathermap.served'] == 1
+    assert counters['upstream.openweathermap.throttled'] == 1
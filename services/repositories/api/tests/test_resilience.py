@@ -0,0 +1,98 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from services.repositories.api.resilience import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    CircuitState,
+    Upstream,
+)
+from services.repositories.api.retry import RetryPolicy
+from services.repositories.api.tests.mocks import MockClientResponse
+from services.repositories.api.weather import WeatherAPIRepository
+
+
+def test_circuit_breaker_half_open_probe(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that the circuit opens after consecutive failures and lets one probe through after recovery time
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    now = 100.0
+    monkeypatch.setattr('services.repositories.api.resilience.time.monotonic', lambda: now)
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=10)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.open
+    assert not breaker.allow()
+
+    now += 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitState.closed
+    assert breaker.allow()
+
+
+def test_adaptive_timeout() -> None:
+    """
+    Check that timeout follows the latency quantile within bounds
+    """
+    timeout = AdaptiveTimeout(initial_seconds=5, min_seconds=1, max_seconds=10, quantile=0.9, multiplier=2, window=10)
+    assert timeout.current() == 5
+
+    for latency in [0.1] * 9 + [2.0]:
+        timeout.observe(latency)
+    assert timeout.current() == 4.0
+
+    for latency in [0.1] * 10:
+        timeout.observe(latency)
+    assert timeout.current() == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_short_circuits_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that after failures the repository returns None without sending requests,
+    and that retries of a request are counted as one failure
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    calls = 0
+
+    async def return_mock(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        raise ClientConnectionError()
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(weather_api_repository, 'retry_policy', RetryPolicy(max_attempts=2, base_delay_seconds=0.01))
+    threshold = Upstream.get(weather_api_repository.upstream).breaker.failure_threshold
+
+    for _ in range(threshold + 3):
+        assert await weather_api_repository.get_weather(latitude=11, longitude=22) is None
+    assert calls == threshold * 2
+
+
+@pytest.mark.asyncio
+async def test_slow_request_times_out(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that a request slower than the adaptive timeout is abandoned
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    async def return_mock(*args, **kwargs):
+        await asyncio.sleep(1)
+        return MockClientResponse('{}', HTTPStatus.OK)
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    Upstream.get(weather_api_repository.upstream).timeout.initial_seconds = 0.01
+
+    assert await weather_api_repository.get_weather(latitude=11, longitude=22) is None
@@ -0,0 +1,106 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from services.metrics import Metrics
+from services.repositories.api.retry import RetryPolicy
+from services.repositories.api.tests.mocks import MockClientResponse
+from services.repositories.api.weather import WeatherAPIRepository
+
+
+def test_retry_after() -> None:
+    """
+    Check that Retry-After is parsed in seconds and as an HTTP date
+    """
+    assert RetryPolicy.retry_after(MockClientResponse('', HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': '3'})) == 3
+    assert RetryPolicy.retry_after(
+        MockClientResponse('', HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    ) == 0
+    assert RetryPolicy.retry_after(MockClientResponse('', HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': 'soon'})) is None
+    assert RetryPolicy.retry_after(MockClientResponse('', HTTPStatus.SERVICE_UNAVAILABLE)) is None
+
+
+def test_backoff_full_jitter() -> None:
+    """
+    Check that the backoff pause is random within the exponentially growing bound
+    """
+    policy = RetryPolicy(base_delay_seconds=0.1, max_delay_seconds=0.3)
+    for attempt, bound in [(1, 0.1), (2, 0.2), (3, 0.3), (10, 0.3)]:
+        assert all(0 <= policy.backoff(attempt) <= bound for _ in range(100))
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(monkeypatch: pytest.MonkeyPatch, weather_api_response: dict) -> None:
+    """
+    Check that connection errors and 5xx responses are retried until a successful response
+
+    :param monkeypatch: fixture for monkey-patching
+    :param weather_api_response: normal response from weather API
+    """
+    responses = [
+        ClientConnectionError(),
+        MockClientResponse('', HTTPStatus.SERVICE_UNAVAILABLE),
+        MockClientResponse(json.dumps(weather_api_response), HTTPStatus.OK),
+    ]
+
+    async def return_mock(*args, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(weather_api_repository, 'retry_policy', RetryPolicy(base_delay_seconds=0.01))
+    Metrics.reset()
+
+    assert await weather_api_repository.get_weather(latitude=11, longitude=22) is not None
+    assert not responses
+    assert Metrics.snapshot()['counters']['upstream.openweathermap.retried'] == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_respects_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that a Retry-After longer than the request deadline stops retries
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    calls = 0
+
+    async def return_mock(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return MockClientResponse('', HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': '60'})
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(weather_api_repository, 'retry_policy', RetryPolicy(deadline_seconds=1))
+    Metrics.reset()
+
+    assert await weather_api_repository.get_weather(latitude=11, longitude=22) is None
+    assert calls == 1
+    assert Metrics.snapshot()['counters']['upstream.openweathermap.retry_gave_up'] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Check that 4xx responses other than 429 are returned without retries
+
+    :param monkeypatch: fixture for monkey-patching
+    """
+    calls = 0
+
+    async def return_mock(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return MockClientResponse('', HTTPStatus.NOT_FOUND)
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+
+    assert await weather_api_repository.get_weather(latitude=11, longitude=22) is None
+    assert calls == 1
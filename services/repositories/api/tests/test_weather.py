@@ -1,6 +1,13 @@
+import json
+from http import HTTPStatus
+
 import pytest
+from aiohttp import ClientConnectionError
 
 from services.repositories.api.api_schemas import WeatherSchema
+from services.repositories.api.resilience import UpstreamUnavailable
+from services.repositories.api.retry import RetryPolicy
+from services.repositories.api.tests.mocks import MockClientResponse
 from services.repositories.api.weather import WeatherAPIRepository, WeatherType
 
 
@@ -24,3 +31,33 @@ async def test_get_weather(patched_weather_api_repository: WeatherAPIRepository,
     assert response.max_temperature == round(main['temp_max'], 1)
     assert response.min_temperature == round(main['temp_min'], 1)
     assert response.wind_speed == weather_api_response['wind']['speed']
+
+
+@pytest.mark.asyncio
+async def test_get_weather_many(monkeypatch: pytest.MonkeyPatch, weather_api_response: dict) -> None:
+    """
+    Check that bulk weather requests are de-duplicated by rounded coordinates
+    and return results in order with per-item errors
+
+    :param monkeypatch: fixture for monkey-patching
+    :param weather_api_response: expected response from weather API
+    """
+    requested = []
+
+    async def return_mock(*args, params=None, **kwargs):
+        requested.append((params['lat'], params['lon']))
+        if params['lat'] == 0:
+            raise ClientConnectionError()
+        return MockClientResponse(json.dumps(weather_api_response), HTTPStatus.OK)
+
+    weather_api_repository = WeatherAPIRepository()
+    monkeypatch.setattr(weather_api_repository, '_send_request', return_mock)
+    monkeypatch.setattr(weather_api_repository, 'retry_policy', RetryPolicy(max_attempts=1))
+
+    response = await weather_api_repository.get_weather_many([(11, 22), (0, 0), (11.001, 22.001), (33, 44)])
+
+    assert sorted(requested) == [(0, 0), (11, 22), (33, 44)]
+    assert isinstance(response[0], WeatherSchema)
+    assert isinstance(response[1], UpstreamUnavailable)
+    assert response[2] == response[0]
+    assert isinstance(response[3], WeatherSchema)
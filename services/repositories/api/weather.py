@@ -1,3 +1,4 @@
+import asyncio
 from dataclasses import dataclass
 from enum import Enum
 from http import HTTPStatus
@@ -6,7 +7,15 @@ from aiohttp import ClientResponse, ClientSession
 
 from services.repositories.api.abstract_api_repository import AbstractAPIRepository
 from services.repositories.api.api_schemas import WeatherSchema
-from services.repositories.api.api_settings import WEATHER_API_KEY, WEATHER_INFO_URL
+from services.repositories.api.api_settings import (
+    WEATHER_API_KEY,
+    WEATHER_BATCH_CONCURRENCY,
+    WEATHER_COORDINATES_PRECISION,
+    WEATHER_INFO_URL,
+)
+from services.repositories.api.resilience import UpstreamUnavailable
+
+Coordinates = tuple[float, float]
 
 
 class WeatherType(str, Enum):
@@ -34,6 +43,7 @@ class WeatherAPIRepository(AbstractAPIRepository):
     by sending request to external API "Openweathermap.org".
     Extends of the :class:`BaseAPIRepository` class.
     """
+    upstream = 'openweathermap'
 
     async def get_weather(self, latitude: float, longitude: float) -> WeatherSchema | None:
         """
@@ -44,28 +54,74 @@ class WeatherAPIRepository(AbstractAPIRepository):
 
         :return: a tuple of current weather temperature and current weather 'feels like' temperature in Celsius degrees
         """
+        try:
+            return await self._get_weather(latitude, longitude)
+        except UpstreamUnavailable:
+            return None
+
+    async def get_weather_many(
+        self, coordinates: list[Coordinates]
+    ) -> list[WeatherSchema | BaseException | None]:
+        """
+        Bulk version of :meth:`get_weather`. Coordinates are de-duplicated by :func:`round_coordinates`,
+        requests share one session and at most WEATHER_BATCH_CONCURRENCY of them run at once.
+
+        :param coordinates: list of (latitude, longitude) pairs
+
+        :return: weather, None or the raised exception (e.g. :class:`UpstreamUnavailable`) for every pair,
+            in the same order as coordinates
+        """
+        unique = list(dict.fromkeys(round_coordinates(*point) for point in coordinates))
+        semaphore = asyncio.Semaphore(WEATHER_BATCH_CONCURRENCY)
+
+        async def fetch(point: Coordinates, session: ClientSession) -> WeatherSchema | None:
+            async with semaphore:
+                return await self._get_weather(*point, session=session)
+
+        async with ClientSession() as session:
+            results = await asyncio.gather(*(fetch(point, session) for point in unique), return_exceptions=True)
+        by_point = dict(zip(unique, results))
+        return [by_point[round_coordinates(*point)] for point in coordinates]
+
+    async def _get_weather(
+        self, latitude: float, longitude: float, session: ClientSession | None = None
+    ) -> WeatherSchema | None:
+        """
+        Requests and parses current weather.
+
+        :param latitude: latitude coordinate of a place
+        :param longitude: longitude coordinate of a place
+        :param session: optional shared session
+
+        :return: parsed response as a :class:`WeatherSchema` object or None
+        :raises UpstreamUnavailable: if the circuit is open or the request failed
+        """
         params = {
             'lat': latitude,
             'lon': longitude,
             'appid': WEATHER_API_KEY,
             'units': 'metric',
         }
-        response = await self._send_request(url=WEATHER_INFO_URL, params=params)
+        response = await self._get(url=WEATHER_INFO_URL, params=params, session=session)
         if response.status == HTTPStatus.OK:
             return await self._parse_response(response)
         return None
 
-    async def _send_request(self, url: str, params=None, body=None) -> ClientResponse:
+    async def _send_request(
+        self, url: str, params=None, body=None, session: ClientSession | None = None
+    ) -> ClientResponse:
         """
         Send GET response
 
         :param url: API url address
         :param params: optional request's query params
         :param body: optional request's body
+        :param session: optional shared session, the caller reads the response before closing it
 
         :return: response from API
         """
-
+        if session is not None:
+            return await session.get(url=url, params=params)
         async with ClientSession() as session:
             resp = await session.get(url=url, params=params)
         return resp
@@ -91,6 +147,18 @@ class WeatherAPIRepository(AbstractAPIRepository):
         )
 
 
+def round_coordinates(latitude: float, longitude: float) -> Coordinates:
+    """
+    Rounds coordinates to WEATHER_COORDINATES_PRECISION digits, close places share the weather.
+
+    :param latitude: latitude coordinate of a place
+    :param longitude: longitude coordinate of a place
+
+    :return: rounded (latitude, longitude)
+    """
+    return round(latitude, WEATHER_COORDINATES_PRECISION), round(longitude, WEATHER_COORDINATES_PRECISION)
+
+
 def get_weather_repository() -> WeatherAPIRepository:
     """
     Returns object of :class:`WeatherAPIRepository` class
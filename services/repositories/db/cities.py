@@ -40,6 +40,14 @@ class CityBDRepository(AbstractDBRepository):
         except City.DoesNotExist:
             return None
 
+    async def get_names(self) -> list[str]:
+        """
+        Returns distinct names of all cities.
+
+        :return: list of city names
+        """
+        return [name async for name in City.objects.order_by('name').values_list('name', flat=True).distinct()]
+
     async def create(self, data: CitySchema) -> City:
         """
         Create a city record in City table
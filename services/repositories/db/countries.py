@@ -85,6 +85,14 @@ class CountryDBRepository(AbstractDBRepository):
         except Country.DoesNotExist:
             return None
 
+    async def get_names(self) -> list[str]:
+        """
+        Returns names of all countries.
+
+        :return: list of country names
+        """
+        return [name async for name in Country.objects.values_list('name', flat=True)]
+
     async def get_capital(self, country_pk: str) -> City | None:
         """
         Looking for city record with requested country pk.
@@ -5,6 +5,8 @@ from cache.cache_module import Cache
 from cache.test.fixtures import COUNTRY_NAME
 from django_layer.countries_app.models import City, Country
 from services.country_service import CountryService
+from services.repositories.api.currency import CurrencyAPIRepository
+from services.repositories.api.resilience import UpstreamUnavailable
 from services.repositories.db.schemas import CurrencyCodesSchema, LanguageNamesSchema
 from services.service_schemas import CityCoordinatesSchema, CountryUOWSchema
 
@@ -241,3 +243,24 @@ async def test_get_country_all_info_from_cache(expected_geocoder_country_result,
                                       longitude=detail.capital_longitude,)
     )
     assert country_info == expected
+
+
+@pytest.mark.asyncio
+async def test_saved_currency_rates_are_served_when_api_is_unavailable(monkeypatch):
+    currency_repo = CurrencyAPIRepository()
+
+    async def unavailable(char_codes):
+        raise UpstreamUnavailable('cbr', 'circuit is open')
+
+    monkeypatch.setattr(currency_repo, 'get_rate', unavailable)
+    service = CountryService(currency_repo=currency_repo)
+    currencies = CurrencyCodesSchema(currency_codes=['USD', 'XXX'])
+
+    await Cache.set_currency_rates({})
+    with pytest.raises(UpstreamUnavailable):
+        await service.get_currency_rates(currencies)
+
+    await Cache.set_currency_rates({'USD': 91.0, 'EUR': 100.0})
+    rates = await service.get_currency_rates(currencies)
+
+    assert [(rate.char_code, rate.value) for rate in rates] == [('USD', 91.0)]
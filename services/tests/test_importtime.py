@@ -0,0 +1,27 @@
+from services.importtime import (
+    ImportRecord,
+    by_package,
+    parse_importtime,
+    profile_imports,
+)
+
+OUTPUT = '''import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     aiogram.utils
+import time:       300 |        420 |   aiogram.types
+import time:      1000 |       1420 | aiogram
+import time:        50 |         50 | services.query
+'''
+
+
+def test_parse_importtime():
+    records = parse_importtime(OUTPUT)
+
+    assert records[0] == ImportRecord(module='aiogram.utils', self_us=120, cumulative_us=120, depth=2)
+    assert [record.depth for record in records] == [2, 1, 0, 0]
+    assert by_package(records) == {'aiogram': 1420, 'services': 50}
+
+
+def test_profile_imports():
+    records = profile_imports('django')
+
+    assert any(record.module == 'django' and record.depth == 0 for record in records)
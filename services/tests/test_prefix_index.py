@@ -0,0 +1,26 @@
+import time
+
+from services.prefix_index import PrefixIndex
+
+
+def test_prefix_search():
+    index = PrefixIndex([
+        ('Москва', 'city'), ('москва', 'city'), ('Мосул', 'city'), ('Монако', 'country'), ('Монако', 'city'),
+        ('Минск', 'city'), ('Орёл', 'city'),
+    ])
+
+    assert len(index) == 6
+    assert index.search('мос', 10) == [('Москва', 'city'), ('Мосул', 'city')]
+    assert index.search('Мо', 2) == [('Монако', 'city'), ('Монако', 'country')]
+    assert index.search('орел', 10) == [('Орёл', 'city')]
+    assert index.search('  ', 10) == []
+    assert index.search('я', 10) == []
+
+
+def test_prefix_search_is_fast():
+    index = PrefixIndex((f'город {number}', 'city') for number in range(100000))
+
+    started = time.perf_counter()
+    for _ in range(100):
+        assert len(index.search('город 5', 20)) == 20
+    assert (time.perf_counter() - started) / 100 < 0.005
@@ -0,0 +1,25 @@
+import pytest
+
+from services.query import dedup_report, normalize_query
+
+
+@pytest.mark.parametrize('query', ['Москва', 'москва', ' Москва ', 'МОСКВА.', '«Москва»', 'москва!'])
+def test_normalize_query_merges_spellings(query):
+    assert normalize_query(query) == 'москва'
+
+
+def test_normalize_query_keeps_inner_punctuation():
+    assert normalize_query('  Ростов-на-Дону  ') == 'ростов-на-дону'
+    assert normalize_query('Нью   Йорк') == 'нью йорк'
+    assert normalize_query('Орёл') == 'орел'
+    assert normalize_query('Ｌｏｎｄｏｎ') == 'london'
+
+
+def test_dedup_report():
+    report = dedup_report(['Москва', 'москва', ' Москва ', 'Москва', 'Орёл', 'Орел'])
+
+    assert report['total'] == 6
+    assert report['unique_raw'] == 5
+    assert report['unique_normalized'] == 2
+    assert report['removed_requests'] == 3
+    assert report['top_merged'][0] == ('москва', 3)
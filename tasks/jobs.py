@@ -0,0 +1,107 @@
+import asyncio
+
+from cache.budget import CacheBudget
+from cache.cache_module import Cache
+from cache.cache_settings import CACHE_QUOTAS, POPULAR_WEATHER_TOP_N, PREFIX_COUNTRY
+from cache.cache_settings import REDIS as redis
+from services.city_service import CityService
+from services.metrics import Metrics
+from services.repositories.api.country_detail import CountryAPIRepository
+from services.repositories.api.country_mirror import CountryMirror
+from services.repositories.api.currency import CurrencyAPIRepository
+
+LIMIT_COUNT = 5
+
+currency_rep = CurrencyAPIRepository()
+
+
+async def update_currency_cache() -> None:
+    """
+    Updates the currency data in the cache when CBR rates differ from the last processed ones.
+    Only countries using a changed currency are rewritten, found by the currency reverse index,
+    and countries cached since the last run, which still have currency names;
+    the first run scans all countries and fills the index.
+    Records with lifetime of 10 seconds or less are skipped, the remaining lifetime of every record is kept.
+    """
+    currency = await CurrencyAPIRepository().get_all_rate()
+    if not currency:
+        return
+    previous_rates = await Cache.get_currency_rates()
+    new_countries = await Cache.get_new_currency_countries()
+    if previous_rates == currency.all_rate and not new_countries:
+        Metrics.incr('currency_refresh.unchanged')
+        return
+    if previous_rates is None:
+        coordinates_list = [key[len(PREFIX_COUNTRY):] async for key in redis.scan_iter(match=f'{PREFIX_COUNTRY}*')]
+        changed_codes = list(currency.all_rate)
+    else:
+        changed_codes = [code for code, rate in currency.all_rate.items() if previous_rates.get(code) != rate]
+        coordinates_list = sorted(set(await Cache.get_currency_countries(changed_codes)) | set(new_countries))
+    async with redis.pipeline(transaction=False) as pipe:
+        for coordinates in coordinates_list:
+            pipe.ttl(f'{PREFIX_COUNTRY}{coordinates}')
+        ttl_list = await pipe.execute()
+    country_list = await Cache.get_many_countries(coordinates_list)
+    updated_countries, ttls, cached_countries, expired = {}, {}, {}, []
+    for key_coordinate, country_schema, ttl in zip(coordinates_list, country_list, ttl_list):
+        if not country_schema:
+            expired.append(key_coordinate)
+            continue
+        cached_countries[key_coordinate] = country_schema
+        if int(ttl) <= 10:
+            continue
+        for currency_key in country_schema.currencies.keys():
+            value_rate = currency.all_rate.get(currency_key)
+            # currencies of the schema are strings
+            if value_rate and country_schema.currencies[currency_key] != str(value_rate):
+                country_schema.currencies[currency_key] = value_rate
+                updated_countries[key_coordinate] = country_schema
+                ttls[key_coordinate] = int(ttl)
+    await Cache.set_many_countries(updated_countries, ttls, with_rates=True)
+    if previous_rates is None:
+        await Cache.index_country_currencies(cached_countries, with_rates=True)
+    else:
+        await Cache.forget_currency_countries(changed_codes, expired)
+    await Cache.forget_new_currency_countries(new_countries)
+    await Cache.set_currency_rates(currency.all_rate)
+    Metrics.incr('currency_refresh.updated_countries', len(updated_countries))
+    await redis.close()
+
+
+async def refresh_country_mirror() -> int:
+    """
+    Replaces the local snapshot of all countries with fresh data from restcountries.
+    The snapshot is kept if the request fails.
+
+    :return: number of saved countries
+    """
+    countries = await CountryAPIRepository().get_all_country_details()
+    if not countries:
+        return 0
+    await asyncio.to_thread(CountryMirror.save, countries)
+    return len(countries)
+
+
+async def prefetch_popular_weather() -> None:
+    """
+    Refreshes cached weather of the most viewed places, so their weather is served from cache.
+    Popularity decays on every run, places that are not viewed any more drop out of the top.
+    """
+    await Cache.decay_popularity()
+    places = await Cache.get_popular_places(POPULAR_WEATHER_TOP_N)
+    if places:
+        await CityService().refresh_cities_weather(places)
+
+
+async def prune_cache_budget() -> int:
+    """
+    Removes keys expired by TTL from the budget index of every prefix, so they are not counted in quotas.
+
+    :return: number of removed index entries
+    """
+    pruned = 0
+    for prefix in CACHE_QUOTAS:
+        count = await CacheBudget.prune(prefix)
+        Metrics.incr(f'cache.pruned.{prefix}', count)
+        pruned += count
+    return pruned
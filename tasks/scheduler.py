@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import time as day_time
+from typing import Awaitable, Callable
+
+from cache.cache_module import Cache
+from services.metrics import Metrics
+from services.repositories.api.api_settings import COUNTRY_MIRROR_ENABLED
+from tasks.jobs import (
+    prefetch_popular_weather,
+    prune_cache_budget,
+    refresh_country_mirror,
+    update_currency_cache,
+)
+from tasks.tasks_settings import (
+    COUNTRY_MIRROR_AT,
+    COUNTRY_MIRROR_INTERVAL_SECONDS,
+    PREFETCH_WEATHER_INTERVAL_SECONDS,
+    PRUNE_CACHE_BUDGET_INTERVAL_SECONDS,
+    SCHEDULER_JITTER_SECONDS,
+    UPDATE_CACHE_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    """
+    Periodic job of the async scheduler, run once per interval. Intervals are counted from the Unix epoch
+    or, if `at` is given, start at this UTC time of day. A run longer than the interval is cancelled.
+    """
+    name: str
+    run: Callable[[], Awaitable]
+    interval_seconds: float
+    at: day_time | None = None
+
+    def slot(self, now: float) -> int:
+        """
+        Returns number of the interval containing the moment.
+
+        :param now: Unix time
+
+        :return: interval number
+        """
+        return int((now - self._offset()) // self.interval_seconds)
+
+    def slot_start(self, slot: int) -> float:
+        """
+        Returns start of the interval.
+
+        :param slot: interval number
+
+        :return: Unix time
+        """
+        return slot * self.interval_seconds + self._offset()
+
+    def _offset(self) -> float:
+        """
+        Returns seconds from midnight to `at`.
+
+        :return: seconds
+        """
+        return self.at.hour * 3600 + self.at.minute * 60 + self.at.second if self.at else 0
+
+
+def default_jobs() -> list[Job]:
+    """
+    Returns jobs of the Celery beat schedule.
+
+    :return: jobs
+    """
+    jobs = [
+        Job('update_cache', update_currency_cache, UPDATE_CACHE_INTERVAL_SECONDS),
+        Job('prefetch_popular_weather', prefetch_popular_weather, PREFETCH_WEATHER_INTERVAL_SECONDS),
+        Job('prune_cache_budget', prune_cache_budget, PRUNE_CACHE_BUDGET_INTERVAL_SECONDS),
+    ]
+    if COUNTRY_MIRROR_ENABLED:
+        jobs.append(
+            Job('refresh_country_mirror', refresh_country_mirror, COUNTRY_MIRROR_INTERVAL_SECONDS, COUNTRY_MIRROR_AT)
+        )
+    return jobs
+
+
+class AsyncScheduler:
+    """
+    Runs periodic jobs in the running event loop, so runs share the loop and connection pools
+    of the process instead of starting a new loop per run like Celery tasks.
+    Every interval of a job is run by one process only (see :meth:`Cache.acquire_job_lock`).
+    """
+
+    def __init__(self, jobs: list[Job], jitter_seconds: float = SCHEDULER_JITTER_SECONDS):
+        """
+        :param jobs: periodic jobs
+        :param jitter_seconds: max random delay of every run
+        """
+        self.jobs = jobs
+        self.jitter_seconds = jitter_seconds
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """
+        Starts a loop for every job.
+
+        :return: None
+        """
+        self._tasks = [asyncio.create_task(self._loop(job), name=f'job:{job.name}') for job in self.jobs]
+
+    async def stop(self) -> None:
+        """
+        Cancels job loops including runs in progress, their locks expire by timeout.
+
+        :return: None
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self, job: Job, slot: int | None = None) -> bool:
+        """
+        Runs the job unless the interval was run by another process, records the run duration.
+        An error of the job is logged and does not stop the scheduler.
+
+        :param job: job
+        :param slot: interval number, the current one by default
+
+        :return: True if the job was run
+        """
+        if slot is None:
+            slot = job.slot(time.time())
+        if not await Cache.acquire_job_lock(f'{job.name}:{slot}', int(job.interval_seconds * 1000)):
+            Metrics.incr(f'scheduler.{job.name}.skipped')
+            return False
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(job.run(), job.interval_seconds)
+        except asyncio.TimeoutError:
+            logger.error('Job %s did not finish in %s seconds', job.name, job.interval_seconds)
+            Metrics.incr(f'scheduler.{job.name}.failed')
+        except Exception:
+            logger.exception('Job %s failed', job.name)
+            Metrics.incr(f'scheduler.{job.name}.failed')
+        finally:
+            Metrics.observe(f'scheduler.{job.name}', time.monotonic() - started)
+        return True
+
+    async def _loop(self, job: Job) -> None:
+        """
+        Runs the current interval of the job unless it is already run, then every next interval
+        at its start plus jitter.
+
+        :param job: job
+
+        :return: None
+        """
+        slot = job.slot(time.time())
+        while True:
+            await asyncio.sleep(random.uniform(0, self.jitter_seconds))
+            try:
+                await self.run_once(job, slot)
+            except Exception:
+                # Redis is unavailable, the run is skipped
+                logger.exception('Job %s was not started', job.name)
+            slot = max(slot + 1, job.slot(time.time()))
+            await asyncio.sleep(max(job.slot_start(slot) - time.time(), 0))
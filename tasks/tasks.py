@@ -1,41 +1,43 @@
 import asyncio
 
-from cache.cache_module import Cache
-from cache.cache_settings import PREFIX_COUNTRY
-from cache.cache_settings import REDIS as redis
 from django_layer.celery import app
-from services.repositories.api.currency import CurrencyAPIRepository
+from services.repositories.api.api_settings import COUNTRY_MIRROR_ENABLED
+from tasks.jobs import (
+    prefetch_popular_weather,
+    prune_cache_budget,
+    refresh_country_mirror,
+    update_currency_cache,
+)
 
-LIMIT_COUNT = 5
 
-currency_rep = CurrencyAPIRepository()
+@app.task()
+def run_update_cache() -> None:
+    """
+    Function starts asynchronous tasks for Celery.
+    """
+    asyncio.run(update_currency_cache())
 
 
-async def update_currency_cache() -> None:
+@app.task()
+def run_refresh_country_mirror() -> None:
     """
-    Updates the currency data in the cache,
-    if the record lifetime is more than 10 seconds.
+    Function starts country mirror refresh for Celery, if the mirror is enabled.
     """
-    currency = await CurrencyAPIRepository().get_all_rate()
-    if currency:
-        _, key_coordinate_list = await redis.scan(match=f'{PREFIX_COUNTRY}*')
-        for key_coordinate in key_coordinate_list:
-            if int(await redis.ttl(key_coordinate)) > 10:
-                key_coordinate = key_coordinate[8:]
-                country_schema = await Cache.get_country(key_coordinate)
-                if country_schema:
-                    currency_keys_dict = country_schema.currencies.keys()
-                    for currency_key in currency_keys_dict:
-                        value_rate = currency.all_rate.get(currency_key)
-                        if value_rate:
-                            country_schema.currencies[currency_key] = value_rate
-                            await Cache.create_or_update_country(key_coordinate, country_schema)
-        await redis.close()
+    if COUNTRY_MIRROR_ENABLED:
+        asyncio.run(refresh_country_mirror())
 
 
 @app.task()
-def run_update_cache() -> None:
+def run_prefetch_popular_weather() -> None:
     """
-    Function starts asynchronous tasks for Celery.
+    Function starts popular weather prefetch for Celery.
     """
-    asyncio.run(update_currency_cache())
+    asyncio.run(prefetch_popular_weather())
+
+
+@app.task()
+def run_prune_cache_budget() -> None:
+    """
+    Function starts cache budget pruning for Celery.
+    """
+    asyncio.run(prune_cache_budget())
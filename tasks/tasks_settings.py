@@ -0,0 +1,19 @@
+import os
+from datetime import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Periodic jobs are run by Celery beat ("celery") or by the async scheduler in the bot process
+# or `manage.py runscheduler` ("async"), the beat schedule is empty with "async"
+SCHEDULER_BACKEND = os.getenv('SCHEDULER_BACKEND', 'celery')
+# Every run of a job is delayed by a random part of JITTER, so replicas do not run jobs at the same moment
+SCHEDULER_JITTER_SECONDS = float(os.getenv('SCHEDULER_JITTER_SECONDS', 5))
+UPDATE_CACHE_INTERVAL_SECONDS = float(os.getenv('UPDATE_CACHE_INTERVAL_SECONDS', 60))
+PREFETCH_WEATHER_INTERVAL_SECONDS = float(os.getenv('PREFETCH_WEATHER_INTERVAL_SECONDS', 5 * 60))
+PRUNE_CACHE_BUDGET_INTERVAL_SECONDS = float(os.getenv('PRUNE_CACHE_BUDGET_INTERVAL_SECONDS', 60 * 60))
+COUNTRY_MIRROR_INTERVAL_SECONDS = float(os.getenv('COUNTRY_MIRROR_INTERVAL_SECONDS', 24 * 60 * 60))
+# UTC time of day the country mirror intervals start at, like the beat schedule
+COUNTRY_MIRROR_AT = time.fromisoformat(os.getenv('COUNTRY_MIRROR_AT', '03:00'))
@@ -0,0 +1,97 @@
+import pytest
+
+from cache.budget import CacheBudget
+from cache.cache_module import Cache
+from cache.cache_settings import (
+    CURRENCY_RATES_KEY,
+    NEW_CURRENCY_COUNTRIES_KEY,
+    PREFIX_CITY,
+    PREFIX_COUNTRY,
+    PREFIX_CURRENCY_INDEX,
+)
+from cache.cache_settings import REDIS as redis
+from cache.test.methods import clear_redis
+from services.metrics import Metrics
+from services.repositories.api.api_schemas import (
+    AllRateSchema,
+    CitySchema,
+    CountrySchema,
+)
+from services.repositories.api.currency import CurrencyAPIRepository
+from tasks.jobs import prune_cache_budget, update_currency_cache
+
+USD_COUNTRY = 'test_usd'
+EUR_COUNTRY = 'test_eur'
+NEW_COUNTRY = 'test_new'
+
+
+@pytest.mark.asyncio
+async def test_update_currency_cache_rewrites_changed_countries(
+    monkeypatch: pytest.MonkeyPatch, country_data: CountrySchema
+) -> None:
+    """
+    Check that countries are rewritten only when rates of their currencies change
+    or when they were cached after the last refresh
+
+    :param monkeypatch: fixture for monkey-patching
+    :param country_data: cached country
+    """
+    keys = [CURRENCY_RATES_KEY, NEW_CURRENCY_COUNTRIES_KEY, f'{PREFIX_COUNTRY}{USD_COUNTRY}',
+            f'{PREFIX_COUNTRY}{EUR_COUNTRY}', f'{PREFIX_COUNTRY}{NEW_COUNTRY}',
+            f'{PREFIX_CURRENCY_INDEX}USD', f'{PREFIX_CURRENCY_INDEX}EUR']
+    await clear_redis(keys)
+    await Cache.set_many_countries({
+        USD_COUNTRY: country_data.copy(update={'currencies': {'USD': 'US dollar'}}),
+        EUR_COUNTRY: country_data.copy(update={'currencies': {'EUR': 'Euro'}}),
+    })
+    rates = {}
+
+    async def get_all_rate(self):
+        return AllRateSchema(all_rate=rates)
+
+    monkeypatch.setattr(CurrencyAPIRepository, 'get_all_rate', get_all_rate)
+
+    rates.update({'USD': 90.0, 'EUR': 100.0})
+    await update_currency_cache()
+    Metrics.reset()
+    await update_currency_cache()
+    assert Metrics.snapshot()['counters']['currency_refresh.unchanged'] == 1
+
+    rates['USD'] = 91.0
+    await update_currency_cache()
+
+    usd_country, eur_country = await Cache.get_many_countries([USD_COUNTRY, EUR_COUNTRY])
+    assert usd_country.currencies == {'USD': '91.0'}
+    assert eur_country.currencies == {'EUR': '100.0'}
+    assert Metrics.snapshot()['counters']['currency_refresh.updated_countries'] == 1
+    assert await Cache.get_currency_rates() == {'USD': 91.0, 'EUR': 100.0}
+
+    await Cache.set_many_countries({NEW_COUNTRY: country_data.copy(update={'currencies': {'EUR': 'Euro'}})})
+    Metrics.reset()
+    await update_currency_cache()
+
+    new_country, = await Cache.get_many_countries([NEW_COUNTRY])
+    assert new_country.currencies == {'EUR': '100.0'}
+    assert Metrics.snapshot()['counters']['currency_refresh.updated_countries'] == 1
+    assert await Cache.get_new_currency_countries() == []
+    await clear_redis(keys)
+
+
+@pytest.mark.asyncio
+async def test_prune_cache_budget_drops_expired_keys(city_data: CitySchema) -> None:
+    """
+    Check that keys expired by TTL are removed from the budget index
+
+    :param city_data: cached city
+    """
+    key = f'{PREFIX_CITY}{city_data.longitude}_{city_data.latitude}'
+    lru = CacheBudget.index_keys(PREFIX_CITY)[0]
+    await Cache.set_many_cities([city_data])
+    assert await redis.zscore(lru, key) is not None
+    await clear_redis([key])
+    Metrics.reset()
+
+    assert await prune_cache_budget() >= 1
+    assert await redis.zscore(lru, key) is None
+    assert Metrics.snapshot()['counters'][f'cache.pruned.{PREFIX_CITY}'] >= 1
+    await redis.close()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from datetime import datetime
+from datetime import time as day_time
+from datetime import timezone
+
+import pytest
+
+from cache.cache_settings import PREFIX_LOCK
+from cache.test.methods import clear_redis
+from services.metrics import Metrics
+from tasks.scheduler import AsyncScheduler, Job
+
+
+def test_job_intervals_start_at_time_of_day() -> None:
+    """
+    Check that intervals of a daily job start at its time of day
+    """
+    job = Job('test_daily', lambda: None, 24 * 60 * 60, day_time(3))
+
+    before = datetime(2026, 1, 2, 2, 59, tzinfo=timezone.utc).timestamp()
+    at = datetime(2026, 1, 2, 3, 0, tzinfo=timezone.utc).timestamp()
+    assert job.slot_start(job.slot(before)) == datetime(2026, 1, 1, 3, 0, tzinfo=timezone.utc).timestamp()
+    assert job.slot_start(job.slot(at)) == at
+    assert job.slot(at) == job.slot(before) + 1
+
+
+@pytest.mark.asyncio
+async def test_job_runs_once_per_interval() -> None:
+    """
+    Check that an interval of a job is run once across schedulers, also after the run is finished
+    """
+    Metrics.reset()
+    release = asyncio.Event()
+    runs = 0
+
+    async def job_run():
+        nonlocal runs
+        runs += 1
+        await release.wait()
+
+    job = Job('test_overlap', job_run, interval_seconds=5)
+    slot = job.slot(time.time())
+    await clear_redis([f'{PREFIX_LOCK}job:test_overlap:{slot}', f'{PREFIX_LOCK}job:test_overlap:{slot + 1}'])
+    scheduler = AsyncScheduler([job], jitter_seconds=0)
+    first = asyncio.create_task(scheduler.run_once(job, slot))
+    await asyncio.sleep(0.05)
+
+    assert await AsyncScheduler([job]).run_once(job, slot) is False
+    release.set()
+    assert await first is True
+    assert await scheduler.run_once(job, slot) is False
+    assert await scheduler.run_once(job, slot + 1) is True
+    assert runs == 2
+    snapshot = Metrics.snapshot()
+    assert snapshot['counters']['scheduler.test_overlap.skipped'] == 2
+    assert snapshot['timings']['scheduler.test_overlap']['count'] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_and_slow_jobs() -> None:
+    """
+    Check that a failed run and a run longer than the interval are recorded and do not stop the scheduler
+    """
+    Metrics.reset()
+    runs = 0
+
+    async def failing():
+        nonlocal runs
+        runs += 1
+        raise ValueError('failed')
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    scheduler = AsyncScheduler([Job('test_failing', failing, 0.05), Job('test_slow', slow, 0.05)], jitter_seconds=0)
+    scheduler.start()
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+
+    counters = Metrics.snapshot()['counters']
+    assert runs >= 2
+    assert counters['scheduler.test_failing.failed'] == runs
+    assert counters['scheduler.test_slow.failed'] >= 1